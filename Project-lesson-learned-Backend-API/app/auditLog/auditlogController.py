@@ -1,34 +1,48 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from app.auditLog.auditlogSchemas import AuditLogCreate, AuditLogResponse
+from app.auditLog.auditlogEvents import auditWriter
+from app.auditLog.auditlogModel import AuditActionEnum
+from app.auditLog.auditlogSchemas import AuditLogCreate, AuditLogPage, AuditLogResponse, WriterMetrics
 from app.auditLog.auditlogService import (
     create_audit_log,
-    get_all_audit_logs,
+    get_audit_log_page,
     get_audit_logs_by_lesson
 )
 from app.database import SessionLocal
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
 
 router = APIRouter(prefix="/audit-logs", tags=["Audit Logs"])
 
 # Dependency to get DB session
-def getDb():
-    db = SessionLocal()
-    try:
+async def getDb():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 @router.post("/", response_model=AuditLogResponse)
-def log_action(log: AuditLogCreate, db: Session = Depends(getDb)):
-    return create_audit_log(db, log)
+async def log_action(log: AuditLogCreate, db: AsyncSession = Depends(getDb)):
+    return await create_audit_log(db, log)
 
-@router.get("/", response_model=List[AuditLogResponse])
-def list_logs(db: Session = Depends(getDb)):
-    return get_all_audit_logs(db)
+@router.get("/", response_model=AuditLogPage)
+async def list_logs(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    performed_by: Optional[UUID] = None,
+    action: Optional[AuditActionEnum] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(getDb),
+):
+    after = decode_cursor(cursor, datetime.fromisoformat, UUID) if cursor else None
+    return await get_audit_log_page(db, limit, since, until, performed_by, action, after)
+
+@router.get("/writer", response_model=WriterMetrics)
+async def writer_metrics():
+    return auditWriter.metrics()
 
 @router.get("/lesson/{lesson_id}", response_model=List[AuditLogResponse])
-def logs_by_lesson(lesson_id: UUID, db: Session = Depends(getDb)):
-    return get_audit_logs_by_lesson(db, lesson_id)
+async def logs_by_lesson(lesson_id: UUID, db: AsyncSession = Depends(getDb)):
+    return await get_audit_logs_by_lesson(db, lesson_id)
@@ -0,0 +1,91 @@
+import logging
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.auditLog.auditlogModel import AuditActionEnum, AuditLog
+from app.lessonLearned.lessonLearnedModel import LessonLearned, Status
+from app.writeBehind import WriteBehindWriter
+
+STATUS_ACTIONS = {Status.approved: AuditActionEnum.approved, Status.rejected: AuditActionEnum.rejected}
+PENDING_AUDIT_ROWS = "pending_audit_rows"
+AUDIT_ACTOR = "audit_actor"
+
+logger = logging.getLogger(__name__)
+
+# Lesson changes are audited without the request waiting on the insert
+auditWriter = WriteBehindWriter(AuditLog.__table__)
+
+
+def setAuditActor(session, user_id: Optional[UUID]):
+    """Attribute the lesson changes of the session's current transaction to user_id.
+
+    Takes a Session or an AsyncSession; the actor is cleared when the
+    transaction commits or rolls back.
+    """
+    session.info[AUDIT_ACTOR] = user_id
+
+
+def lessonAuditPerformer(session: Session, lesson: LessonLearned, action: AuditActionEnum) -> Optional[UUID]:
+    actor = session.info.get(AUDIT_ACTOR)
+    if actor is not None:
+        return actor
+    # Without an explicit actor, only the rows' own user columns say who acted
+    if action == AuditActionEnum.created:
+        return lesson.submitted_by
+    if action in STATUS_ACTIONS.values():
+        return lesson.approved_by
+    return None
+
+
+def lessonAuditAction(session: Session, lesson: LessonLearned) -> Optional[AuditActionEnum]:
+    if lesson in session.new:
+        return AuditActionEnum.created
+    if not session.is_modified(lesson):
+        return None
+    if inspect(lesson).attrs.status.history.has_changes() and lesson.status in STATUS_ACTIONS:
+        return STATUS_ACTIONS[lesson.status]
+    return AuditActionEnum.updated
+
+
+@event.listens_for(Session, "after_flush")
+def captureLessonChanges(session: Session, flush_context):
+    # new, dirty and attribute history still describe the flush that just ran
+    timestamp = datetime.utcnow()
+    for lesson in [*session.new, *session.dirty]:
+        if not isinstance(lesson, LessonLearned):
+            continue
+        action = lessonAuditAction(session, lesson)
+        if action is None:
+            continue
+        performed_by = lessonAuditPerformer(session, lesson, action)
+        if performed_by is None:
+            logger.warning("Not auditing the %s of lesson %s: no acting user was set", action.value, lesson.lesson_id)
+            continue
+        session.info.setdefault(PENDING_AUDIT_ROWS, []).append(
+            {"lesson_id": lesson.lesson_id, "action": action, "performed_by": performed_by, "timestamp": timestamp}
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def queueCommittedChanges(session: Session):
+    session.info.pop(AUDIT_ACTOR, None)
+    for row in session.info.pop(PENDING_AUDIT_ROWS, []):
+        auditWriter.enqueue(row)
+
+
+@event.listens_for(Session, "after_rollback")
+def discardRolledBackChanges(session: Session):
+    session.info.pop(AUDIT_ACTOR, None)
+    session.info.pop(PENDING_AUDIT_ROWS, None)
+
+
+async def startAuditWriter():
+    auditWriter.start()
+
+
+async def stopAuditWriter():
+    await auditWriter.stop()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, ForeignKey, Enum, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from uuid import uuid4
@@ -17,12 +17,21 @@ class AuditActionEnum(str, enum.Enum):
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_lesson_id_timestamp", "lesson_id", "timestamp"),
+        # Keyset order of the audit log list, overall and per user
+        Index("ix_audit_logs_timestamp", "timestamp", "log_id"),
+        Index("ix_audit_logs_performed_by_timestamp", "performed_by", "timestamp", "log_id"),
+        # Monthly partitions are created by ensure_audit_log_partitions(), see auditlogPartitions
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
     log_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     lesson_id = Column(UUID(as_uuid=True), ForeignKey("lessons_learned.lesson_id"), nullable=False)
     action = Column(Enum(AuditActionEnum), nullable=False)
     performed_by = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    # Part of the primary key: a partitioned table's unique constraints must include the partition key
+    timestamp = Column(DateTime, primary_key=True, nullable=False, default=datetime.utcnow)
 
     # Relationships
     lesson = relationship("LessonLearned", back_populates="audit_logs")
@@ -0,0 +1,112 @@
+"""Monthly partition maintenance for audit_logs.
+
+The app creates upcoming partitions at startup and once a day after that.
+Old months can be detached for archiving, which leaves each of them as a
+standalone audit_logs_YYYY_MM table that can be dumped and dropped:
+
+    python -m app.auditLog.auditlogPartitions list
+    python -m app.auditLog.auditlogPartitions ensure --months-ahead 6
+    python -m app.auditLog.auditlogPartitions detach --before 2025-01-01
+"""
+import asyncio
+import logging
+import os
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal
+
+AUDIT_LOG_PARTITIONS_AHEAD = int(os.getenv("AUDIT_LOG_PARTITIONS_AHEAD", 3))
+PARTITION_CHECK_INTERVAL = 24 * 60 * 60
+
+ENSURE_PARTITIONS = text("SELECT ensure_audit_log_partitions(now() AT TIME ZONE 'utc', :months_ahead)")
+LIST_PARTITIONS = text(
+    "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+    "WHERE pg_inherits.inhparent = 'audit_logs'::regclass ORDER BY child.relname"
+)
+
+logger = logging.getLogger(__name__)
+_maintenance: Optional[asyncio.Task] = None
+
+
+def partitionMonth(name: str) -> date:
+    return datetime.strptime(name[-len("YYYY_MM"):], "%Y_%m").date()
+
+
+def nextMonth(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+async def ensurePartitions(db: AsyncSession, months_ahead: int = AUDIT_LOG_PARTITIONS_AHEAD) -> int:
+    created = await db.scalar(ENSURE_PARTITIONS, {"months_ahead": months_ahead})
+    await db.commit()
+    return created
+
+
+def listPartitions(connection: Connection) -> List[Tuple[str, date, date]]:
+    """Attached partitions as (name, first day, first day of the next month)."""
+    names = connection.execute(LIST_PARTITIONS).scalars()
+    return [(name, partitionMonth(name), nextMonth(partitionMonth(name))) for name in names]
+
+
+def detachPartitionsBefore(connection: Connection, before: date) -> List[str]:
+    """Detach every partition whose month ends on or before `before`. Needs an AUTOCOMMIT connection."""
+    detached = []
+    for name, _, month_end in listPartitions(connection):
+        if month_end <= before:
+            # CONCURRENTLY keeps inserts into the current month flowing while the old one is detached
+            connection.execute(text(f'ALTER TABLE audit_logs DETACH PARTITION "{name}" CONCURRENTLY'))
+            detached.append(name)
+    return detached
+
+
+async def _maintainPartitions():
+    while True:
+        await asyncio.sleep(PARTITION_CHECK_INTERVAL)
+        try:
+            async with SessionLocal() as db:
+                await ensurePartitions(db)
+        except Exception:
+            logger.exception("Could not create upcoming audit_logs partitions")
+
+
+async def startPartitionMaintenance():
+    global _maintenance
+    async with SessionLocal() as db:
+        await ensurePartitions(db)
+    _maintenance = asyncio.create_task(_maintainPartitions())
+
+
+async def stopPartitionMaintenance():
+    if _maintenance is not None:
+        _maintenance.cancel()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.database import syncEngine
+
+    parser = argparse.ArgumentParser(description="Manage the monthly partitions of audit_logs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show the attached partitions")
+    ensure = commands.add_parser("ensure", help="create missing partitions up to N months ahead")
+    ensure.add_argument("--months-ahead", type=int, default=AUDIT_LOG_PARTITIONS_AHEAD)
+    detach = commands.add_parser("detach", help="detach partitions that end on or before a date")
+    detach.add_argument("--before", type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+    args = parser.parse_args()
+
+    with syncEngine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if args.command == "list":
+            for name, start, end in listPartitions(connection):
+                print(f"{name}\t{start}\t{end}")
+        elif args.command == "ensure":
+            created = connection.execute(ENSURE_PARTITIONS, {"months_ahead": args.months_ahead}).scalar()
+            print(f"created {created} partition(s)")
+        else:
+            for name in detachPartitionsBefore(connection, args.before):
+                print(f"detached {name}")
@@ -2,6 +2,7 @@ from pydantic import BaseModel
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
+from typing import List, Optional
 
 
 class AuditActionEnum(str, Enum):
@@ -27,3 +28,21 @@ class AuditLogResponse(AuditLogBase):
 
     class Config:
         from_attributes = True
+
+
+class AuditLogPage(BaseModel):
+    items: List[AuditLogResponse]
+    next_cursor: Optional[str] = None
+
+
+class WriterMetrics(BaseModel):
+    table: str
+    running: bool
+    depth: int
+    max_pending: int
+    written: int
+    dropped: int
+    failed: int
+    batches: int
+    lag_seconds: float
+    max_lag_seconds: float
@@ -1,20 +1,52 @@
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from app.auditLog.auditlogModel import AuditLog
+from app.auditLog.auditlogModel import AuditActionEnum, AuditLog
+from app.pagination import encode_cursor
 from app.auditLog.auditlogSchemas import AuditLogCreate
 
 
-def create_audit_log(db: Session, log_data: AuditLogCreate) -> AuditLog:
+async def create_audit_log(db: AsyncSession, log_data: AuditLogCreate) -> AuditLog:
     log = AuditLog(**log_data.dict())
     db.add(log)
-    db.commit()
-    db.refresh(log)
+    await db.commit()
+    await db.refresh(log)
     return log
 
 
-def get_audit_logs_by_lesson(db: Session, lesson_id: UUID):
-    return db.query(AuditLog).filter(AuditLog.lesson_id == lesson_id).all()
+async def get_audit_logs_by_lesson(db: AsyncSession, lesson_id: UUID):
+    return (await db.scalars(select(AuditLog).where(AuditLog.lesson_id == lesson_id))).all()
 
 
-def get_all_audit_logs(db: Session):
-    return db.query(AuditLog).all()
+async def get_audit_log_page(
+    db: AsyncSession,
+    limit: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    performed_by: Optional[UUID] = None,
+    action: Optional[AuditActionEnum] = None,
+    after: Optional[Tuple[datetime, UUID]] = None,
+) -> dict:
+    """Newest first; the time bounds on the partition key let Postgres skip months outside [since, until)."""
+    query = select(AuditLog)
+    if since:
+        query = query.where(AuditLog.timestamp >= since)
+    if until:
+        query = query.where(AuditLog.timestamp < until)
+    if performed_by:
+        query = query.where(AuditLog.performed_by == performed_by)
+    if action:
+        query = query.where(AuditLog.action == action)
+    if after:
+        # The timestamp bound alone lets the planner prune the months after the cursor
+        query = query.where(AuditLog.timestamp <= after[0], tuple_(AuditLog.timestamp, AuditLog.log_id) < tuple_(*after))
+    logs = (
+        await db.scalars(query.order_by(AuditLog.timestamp.desc(), AuditLog.log_id.desc()).limit(limit + 1))
+    ).all()
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        next_cursor = encode_cursor(logs[-1].timestamp, logs[-1].log_id)
+    return {"items": logs, "next_cursor": next_cursor}
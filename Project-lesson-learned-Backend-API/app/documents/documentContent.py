@@ -0,0 +1,159 @@
+import calendar
+import mimetypes
+import re
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.documents.documentModel import Document
+from app.documents.documentStorage import ContentAddressedStore
+from app.responseCache import etagMatches
+
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+ZERO_COPY_EXTENSION = "http.response.zerocopysend"
+
+
+class DocumentContentResponse(Response):
+    """Sends `count` bytes of a file from `offset`.
+
+    Servers that offer the ASGI zero-copy extension get the open file and hand
+    it to sendfile(); everywhere else the file is read in chunks off the event
+    loop, so memory use does not depend on the file size.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, offset: int, count: int, status_code: int, headers: dict, media_type: str):
+        headers = {**headers, "Content-Length": str(count)}
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.offset = offset
+        self.count = count
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif ZERO_COPY_EXTENSION in scope.get("extensions", {}):
+            file = await run_in_threadpool(open, self.path, "rb")
+            try:
+                await send({
+                    "type": ZERO_COPY_EXTENSION,
+                    "file": file,
+                    "offset": self.offset,
+                    "count": self.count,
+                    "more_body": False,
+                })
+            finally:
+                await run_in_threadpool(file.close)
+        else:
+            async with aiofiles.open(self.path, "rb") as file:
+                await file.seek(self.offset)
+                remaining = self.count
+                while remaining:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def http_date(moment: datetime) -> str:
+    # uploaded_at is a naive UTC timestamp
+    return formatdate(calendar.timegm(moment.utctimetuple()), usegmt=True)
+
+
+def parse_http_date(value: str) -> Optional[int]:
+    try:
+        return calendar.timegm(parsedate_to_datetime(value).utctimetuple())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """The (offset, count) of a single-range Range header.
+
+    None means the header is absent, malformed or asks for several ranges, and
+    the whole file is sent, as RFC 9110 allows. A range that starts past the
+    end of the file is answered with 416.
+    """
+    match = BYTE_RANGE.match(header.strip()) if header else None
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes; a zero-length suffix cannot be satisfied
+        start = max(size - int(last), 0) if int(last) else size
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    if start >= size:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end - start + 1
+
+
+def if_range_matches(if_range: Optional[str], etag: str, last_modified: datetime) -> bool:
+    """Whether a Range request may be honoured. If-Range needs a strong match, otherwise the whole file is sent."""
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date(if_range) == calendar.timegm(last_modified.utctimetuple())
+
+
+def not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return etagMatches(if_none_match, etag)
+    if_modified_since = parse_http_date(request.headers.get("if-modified-since", ""))
+    return if_modified_since is not None and calendar.timegm(last_modified.utctimetuple()) <= if_modified_since
+
+
+def content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+async def document_content_response(request: Request, doc: Document, store: ContentAddressedStore) -> Optional[Response]:
+    """Serve a stored document with conditional GET and single byte ranges; None when its blob is missing."""
+    path = store.path(doc.content_hash)
+    try:
+        size = (await aiofiles.os.stat(path)).st_size
+    except FileNotFoundError:
+        return None
+
+    # A document's content never changes, so its hash is a strong validator
+    etag = f'"{doc.content_hash}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(doc.uploaded_at),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "no-cache",
+    }
+    if not_modified(request, etag, doc.uploaded_at):
+        return Response(status_code=304, headers=headers)
+
+    media_type = doc.content_type or mimetypes.guess_type(doc.filename)[0] or "application/octet-stream"
+    headers["Content-Disposition"] = content_disposition(doc.filename)
+    byte_range = None
+    if if_range_matches(request.headers.get("if-range"), etag, doc.uploaded_at):
+        byte_range = parse_byte_range(request.headers.get("range"), size)
+    if byte_range is None:
+        return DocumentContentResponse(path, 0, size, 200, headers, media_type)
+    offset, count = byte_range
+    headers["Content-Range"] = f"bytes {offset}-{offset + count - 1}/{size}"
+    return DocumentContentResponse(path, offset, count, 206, headers, media_type)
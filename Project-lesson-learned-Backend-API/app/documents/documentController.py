@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
 from app.database import SessionLocal
+from app.lessonLearned.lessonLearnedModel import LessonLearned
 from app.documents.documentSchemas import DocumentCreate, DocumentResponse
+from app.documents.documentContent import document_content_response
+from app.documents.documentStorage import documentStore, receive_files
 from app.documents.documentService import (
     create_document,
+    create_uploaded_documents,
     get_document_by_id,
     get_documents_by_lesson,
     delete_document,
@@ -14,30 +18,56 @@ from app.documents.documentService import (
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 @router.post("/", response_model=DocumentResponse)
-def add_document(document: DocumentCreate, db: Session = Depends(get_db)):
-    return create_document(db, document)
+async def add_document(document: DocumentCreate, db: AsyncSession = Depends(get_db)):
+    return await create_document(db, document)
+
+@router.post("/lesson/{lesson_id}", response_model=List[DocumentResponse], status_code=201)
+async def upload_documents(lesson_id: UUID, request: Request, db: AsyncSession = Depends(get_db)):
+    """Attach the files of a multipart/form-data body to a lesson, streaming them to disk."""
+    if not await db.get(LessonLearned, lesson_id):
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    # Do not hold a pooled connection while a large body trickles in
+    await db.rollback()
+    files = await receive_files(request, documentStore)
+    if not files:
+        raise HTTPException(status_code=400, detail="No file parts in the upload")
+    try:
+        return await create_uploaded_documents(db, lesson_id, files)
+    except BaseException:
+        for received in files:
+            await received.blob.abort()
+        raise
 
 @router.get("/{doc_id}", response_model=DocumentResponse)
-def fetch_document(doc_id: UUID, db: Session = Depends(get_db)):
-    doc = get_document_by_id(db, doc_id)
+async def fetch_document(doc_id: UUID, db: AsyncSession = Depends(get_db)):
+    doc = await get_document_by_id(db, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     return doc
 
+@router.api_route("/{doc_id}/content", methods=["GET", "HEAD"])
+async def download_document(doc_id: UUID, request: Request, db: AsyncSession = Depends(get_db)):
+    """The stored bytes of an uploaded document, with Range and conditional GET support."""
+    doc = await get_document_by_id(db, doc_id)
+    # Only uploaded documents have content in the store; legacy rows just name a path
+    if not doc or not doc.content_hash:
+        raise HTTPException(status_code=404, detail="Document not found")
+    response = await document_content_response(request, doc, documentStore)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Document content is missing")
+    return response
+
 @router.get("/lesson/{lesson_id}", response_model=List[DocumentResponse])
-def fetch_documents_for_lesson(lesson_id: UUID, db: Session = Depends(get_db)):
-    return get_documents_by_lesson(db, lesson_id)
+async def fetch_documents_for_lesson(lesson_id: UUID, db: AsyncSession = Depends(get_db)):
+    return await get_documents_by_lesson(db, lesson_id)
 
 @router.delete("/{doc_id}", status_code=204)
-def remove_document(doc_id: UUID, db: Session = Depends(get_db)):
-    success = delete_document(db, doc_id)
+async def remove_document(doc_id: UUID, db: AsyncSession = Depends(get_db)):
+    success = await delete_document(db, doc_id)
     if not success:
         raise HTTPException(status_code=404, detail="Document not found")
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, ForeignKey, BigInteger, Integer, Text, Enum, Index, Computed, text
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
+import enum
 import uuid
 from app.database import Base
 
@@ -9,9 +10,46 @@ class Document(Base):
     __tablename__ = "documents"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    lesson_id = Column(UUID(as_uuid=True), ForeignKey("lessons_learned.lesson_id"), nullable=False)
+    lesson_id = Column(UUID(as_uuid=True), ForeignKey("lessons_learned.lesson_id"), nullable=False, index=True)
     filename = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    # Set for uploaded files; file_path is then the key of the blob in the document store
+    content_hash = Column(String(64), nullable=True, index=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    content_type = Column(String, nullable=True)
 
-    lesson = relationship("LessonLearned", back_populates="documents")
\ No newline at end of file
+    lesson = relationship("LessonLearned", back_populates="documents")
+
+
+class ExtractionStatus(str, enum.Enum):
+    pending = "pending"
+    processing = "processing"
+    done = "done"
+    failed = "failed"
+    skipped = "skipped"
+
+
+# Attachment text is the lowest-weighted part of a lesson's searchable content (see SEARCH_VECTOR_SQL)
+DOCUMENT_TEXT_VECTOR_SQL = "setweight(to_tsvector('english', coalesce(text, '')), 'D')"
+
+
+class DocumentText(Base):
+    """Text extracted from a document, and the extraction queue: rows start pending and are filled in the background."""
+    __tablename__ = "document_texts"
+    __table_args__ = (
+        Index("ix_document_texts_search_vector", "search_vector", postgresql_using="gin"),
+        # Only unfinished rows are ever scanned for work
+        Index("ix_document_texts_queue", "queued_at", postgresql_where=text("status IN ('pending', 'processing')")),
+    )
+
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    lesson_id = Column(UUID(as_uuid=True), ForeignKey("lessons_learned.lesson_id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(Enum(ExtractionStatus), nullable=False, default=ExtractionStatus.pending)
+    attempts = Column(Integer, nullable=False, default=0)
+    queued_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = Column(DateTime)
+    extracted_at = Column(DateTime)
+    error = Column(String)
+    text = deferred(Column(Text))
+    search_vector = deferred(Column(TSVECTOR, Computed(DOCUMENT_TEXT_VECTOR_SQL, persisted=True)))
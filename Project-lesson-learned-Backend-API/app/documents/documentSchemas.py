@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from uuid import UUID
 from datetime import datetime
+from typing import Optional
 
 class DocumentBase(BaseModel):
     lesson_id: UUID
@@ -13,6 +14,9 @@ class DocumentCreate(DocumentBase):
 class DocumentResponse(DocumentBase):
     id: UUID
     uploaded_at: datetime
+    content_hash: Optional[str] = None
+    size_bytes: Optional[int] = None
+    content_type: Optional[str] = None
 
     class Config:
         from_attributes = True
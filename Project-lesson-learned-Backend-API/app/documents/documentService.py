@@ -1,26 +1,84 @@
-from sqlalchemy.orm import Session
+import logging
+
+from sqlalchemy import select, exists, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from app.documents.documentModel import Document
 from app.documents.documentSchemas import DocumentCreate
+from app.documents.documentStorage import ReceivedFile, documentStore
+from app.documents.documentText import documentTextExtractor, queue_document_text
 from typing import List
 
-def create_document(db: Session, document_data: DocumentCreate) -> Document:
+logger = logging.getLogger(__name__)
+
+async def create_document(db: AsyncSession, document_data: DocumentCreate) -> Document:
     doc = Document(**document_data.dict())
     db.add(doc)
-    db.commit()
-    db.refresh(doc)
+    await db.flush()
+    queue_document_text(db, doc)
+    await db.commit()
+    await db.refresh(doc)
+    documentTextExtractor.notify()
     return doc
 
-def get_document_by_id(db: Session, doc_id: UUID) -> Document:
-    return db.query(Document).filter(Document.id == doc_id).first()
+async def lock_content(db: AsyncSession, digest: str):
+    """Serialize uploads and deletes of the same content, so a blob is never removed while a new row points at it."""
+    await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(digest))))
+
+async def remove_unreferenced_content(db: AsyncSession, digest: str):
+    """Delete a blob from the store unless a document row points at it, then commit."""
+    await lock_content(db, digest)
+    if not await db.scalar(select(exists().where(Document.content_hash == digest))):
+        await documentStore.remove(digest)
+    await db.commit()
+
+async def create_uploaded_documents(db: AsyncSession, lesson_id: UUID, files: List[ReceivedFile]) -> List[Document]:
+    docs = []
+    # Blobs this request put in the store; they are removed again if the rows are never committed
+    stored = []
+    try:
+        for received in files:
+            await received.blob.close()
+            await lock_content(db, received.blob.digest)
+            if not await documentStore.exists(received.blob.digest):
+                stored.append(received.blob.digest)
+            digest = await documentStore.commit(received.blob)
+            docs.append(Document(
+                lesson_id=lesson_id,
+                filename=received.filename,
+                file_path=documentStore.key(digest),
+                content_hash=digest,
+                size_bytes=received.blob.size,
+                content_type=received.content_type,
+            ))
+        db.add_all(docs)
+        await db.flush()
+        for doc in docs:
+            queue_document_text(db, doc)
+        await db.commit()
+    except BaseException:
+        try:
+            await db.rollback()
+            for digest in stored:
+                await remove_unreferenced_content(db, digest)
+        except Exception:
+            logger.exception("Could not remove the content of a failed upload")
+        raise
+    documentTextExtractor.notify()
+    return docs
+
+async def get_document_by_id(db: AsyncSession, doc_id: UUID) -> Document:
+    return await db.scalar(select(Document).where(Document.id == doc_id))
 
-def get_documents_by_lesson(db: Session, lesson_id: UUID) -> List[Document]:
-    return db.query(Document).filter(Document.lesson_id == lesson_id).all()
+async def get_documents_by_lesson(db: AsyncSession, lesson_id: UUID) -> List[Document]:
+    return (await db.scalars(select(Document).where(Document.lesson_id == lesson_id))).all()
 
-def delete_document(db: Session, doc_id: UUID) -> bool:
-    doc = get_document_by_id(db, doc_id)
+async def delete_document(db: AsyncSession, doc_id: UUID) -> bool:
+    doc = await get_document_by_id(db, doc_id)
     if doc:
-        db.delete(doc)
-        db.commit()
+        await db.delete(doc)
+        await db.commit()
+        if doc.content_hash:
+            await remove_unreferenced_content(db, doc.content_hash)
         return True
     return False
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import List, Optional
+
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+
+DOCUMENT_STORAGE_DIR = os.getenv("DOCUMENT_STORAGE_DIR", "data/documents")
+DOCUMENT_MAX_BYTES = int(os.getenv("DOCUMENT_MAX_BYTES", 1024 * 1024 * 1024))
+
+
+class BlobWriter:
+    """A file being received into the store's temp area, hashed as it is written."""
+
+    def __init__(self, temp_path: str, file):
+        self.temp_path = temp_path
+        self.size = 0
+        self._file = file
+        self._hash = hashlib.sha256()
+        self.digest: Optional[str] = None
+
+    async def write(self, data: bytes):
+        await self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    async def close(self):
+        if self.digest is None:
+            await self._file.close()
+            self.digest = self._hash.hexdigest()
+
+    async def abort(self):
+        await self.close()
+        if await aiofiles.os.path.exists(self.temp_path):
+            await aiofiles.os.remove(self.temp_path)
+
+
+class ContentAddressedStore:
+    """Files stored once per sha256 digest under root/ab/cd/<digest>."""
+
+    def __init__(self, root: str = DOCUMENT_STORAGE_DIR):
+        self.root = root
+
+    def key(self, digest: str) -> str:
+        return os.path.join(digest[:2], digest[2:4], digest)
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, self.key(digest))
+
+    async def open_blob(self) -> BlobWriter:
+        # Temp files live under root so the final rename never crosses filesystems
+        temp_dir = os.path.join(self.root, "tmp")
+        await aiofiles.os.makedirs(temp_dir, exist_ok=True)
+        temp_path = os.path.join(temp_dir, uuid.uuid4().hex)
+        return BlobWriter(temp_path, await aiofiles.open(temp_path, "wb"))
+
+    async def commit(self, blob: BlobWriter) -> str:
+        """Move a received blob into place, or drop it when identical content is already stored."""
+        await blob.close()
+        target = self.path(blob.digest)
+        if await aiofiles.os.path.exists(target):
+            await aiofiles.os.remove(blob.temp_path)
+        else:
+            await aiofiles.os.makedirs(os.path.dirname(target), exist_ok=True)
+            await aiofiles.os.replace(blob.temp_path, target)
+        return blob.digest
+
+    async def exists(self, digest: str) -> bool:
+        return await aiofiles.os.path.exists(self.path(digest))
+
+    async def remove(self, digest: str):
+        if await aiofiles.os.path.exists(self.path(digest)):
+            await aiofiles.os.remove(self.path(digest))
+
+
+documentStore = ContentAddressedStore()
+
+
+@dataclass
+class ReceivedFile:
+    filename: str
+    content_type: str
+    blob: BlobWriter
+
+
+async def receive_files(request: Request, store: ContentAddressedStore, max_bytes: int = DOCUMENT_MAX_BYTES) -> List[ReceivedFile]:
+    """Stream every file part of a multipart/form-data body into the store's temp area.
+
+    Chunks go straight from the socket to disk, so memory use does not depend
+    on the file size. Other form fields are ignored. On error every temp file
+    is removed; on success the caller commits or aborts each blob.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=415, detail="Expected a multipart/form-data upload")
+
+    # The parser's callbacks are synchronous; collect events per chunk and handle them with await afterwards
+    events = []
+    header = {"field": b"", "value": b""}
+    headers = {}
+
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        headers[header["field"].lower()] = header["value"]
+        header["field"] = header["value"] = b""
+
+    def on_headers_finished():
+        events.append(("headers", dict(headers)))
+        headers.clear()
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+        "on_part_end": lambda: events.append(("end", None)),
+    })
+
+    files: List[ReceivedFile] = []
+    current: Optional[ReceivedFile] = None
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for kind, payload in events:
+                if kind == "headers":
+                    _, options = parse_options_header(payload.get(b"content-disposition", b""))
+                    if b"filename" in options:
+                        # Browsers may send a client-side path; only the base name is kept
+                        filename = os.path.basename(options[b"filename"].decode("utf-8", "replace").replace("\\", "/"))
+                        part_type = payload.get(b"content-type", b"application/octet-stream").decode("latin-1")
+                        current = ReceivedFile(filename or "upload", part_type, await store.open_blob())
+                        files.append(current)
+                elif kind == "data" and current is not None:
+                    await current.blob.write(payload)
+                    if current.blob.size > max_bytes:
+                        raise HTTPException(status_code=413, detail=f"Files are limited to {max_bytes} bytes")
+                elif kind == "end" and current is not None:
+                    await current.blob.close()
+                    current = None
+            events.clear()
+        parser.finalize()
+        if current is not None:
+            raise HTTPException(status_code=400, detail="The upload ended in the middle of a file")
+    except BaseException:
+        for received in files:
+            await received.blob.abort()
+        raise
+    return files
@@ -0,0 +1,330 @@
+"""Background text extraction from attached documents into the search index.
+
+document_texts doubles as the work queue: a row is added as pending when a
+document is created, and DocumentTextExtractor claims pending rows with
+FOR UPDATE SKIP LOCKED, extracts their text and stores it with its tsvector.
+Extraction never runs in a request. By default each app worker drains the
+queue on a few threads; with DOCUMENT_TEXT_EXTRACTION=worker the app leaves
+it to a dedicated process that extracts on a (spawned) process pool:
+
+    python -m app.documents.documentText run
+    python -m app.documents.documentText backfill
+    python -m app.documents.documentText status
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal
+from app.documents.documentModel import Document, DocumentText, ExtractionStatus
+from app.documents.documentStorage import documentStore
+
+# "app": every app worker extracts on a small thread pool; "worker": only `python -m app.documents.documentText run` does
+DOCUMENT_TEXT_EXTRACTION = os.getenv("DOCUMENT_TEXT_EXTRACTION", "app")
+DOCUMENT_TEXT_WORKERS = int(os.getenv("DOCUMENT_TEXT_WORKERS", min(2, os.cpu_count() or 1)))
+DOCUMENT_TEXT_POLL_INTERVAL = float(os.getenv("DOCUMENT_TEXT_POLL_INTERVAL", 60))
+DOCUMENT_TEXT_MAX_ATTEMPTS = int(os.getenv("DOCUMENT_TEXT_MAX_ATTEMPTS", 3))
+DOCUMENT_TEXT_CLAIM_TIMEOUT = float(os.getenv("DOCUMENT_TEXT_CLAIM_TIMEOUT", 15 * 60))
+# A tsvector is limited to 1 MB, so very long reports are indexed by their beginning
+DOCUMENT_TEXT_MAX_CHARS = int(os.getenv("DOCUMENT_TEXT_MAX_CHARS", 500_000))
+# Documents created through the JSON API only name a file; they are read only when it lies under this directory
+DOCUMENT_LEGACY_ROOT = os.getenv("DOCUMENT_LEGACY_ROOT")
+
+TEXT_TYPES = {".txt", ".md", ".csv", ".log"}
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+logger = logging.getLogger(__name__)
+
+# (status, text, error) as returned by a worker
+Extraction = Tuple[ExtractionStatus, Optional[str], Optional[str]]
+
+
+def _read_text(path: str, max_chars: int) -> str:
+    with open(path, "rb") as file:
+        # UTF-8 takes at most four bytes per character
+        return file.read(max_chars * 4).decode("utf-8", "replace")
+
+
+def _read_pdf(path: str, max_chars: int) -> str:
+    from pypdf import PdfReader
+
+    pages, length = [], 0
+    for page in PdfReader(path).pages:
+        text = page.extract_text() or ""
+        pages.append(text)
+        length += len(text)
+        if length >= max_chars:
+            break
+    return "\n".join(pages)
+
+
+def _read_docx(path: str, max_chars: int) -> str:
+    import docx
+
+    document = docx.Document(path)
+    parts = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        parts.extend(cell.text for row in table.rows for cell in row.cells)
+    return "\n".join(parts)
+
+
+def extract_text(path: Optional[str], filename: str, content_type: Optional[str], max_chars: int = DOCUMENT_TEXT_MAX_CHARS) -> Extraction:
+    """Worker side: the text of one file. Parse errors are final; they are not retried."""
+    extension = os.path.splitext(filename)[1].lower()
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if extension == ".pdf" or content_type == "application/pdf":
+        reader = _read_pdf
+    elif extension == ".docx" or content_type == DOCX_TYPE:
+        reader = _read_docx
+    elif extension in TEXT_TYPES or content_type.startswith("text/"):
+        reader = _read_text
+    else:
+        return ExtractionStatus.skipped, None, f"No text extractor for {content_type or extension or 'this file'}"
+    if path is None:
+        return ExtractionStatus.skipped, None, "The document has no readable file"
+    try:
+        text = reader(path, max_chars)
+    except FileNotFoundError:
+        return ExtractionStatus.failed, None, "File not found"
+    except Exception as exc:
+        return ExtractionStatus.failed, None, f"{type(exc).__name__}: {exc}"[:1000]
+    # Postgres text cannot hold NUL, which PDF text layers sometimes contain
+    return ExtractionStatus.done, text[:max_chars].replace("\x00", ""), None
+
+
+def source_path(file_path: str, content_hash: Optional[str]) -> Optional[str]:
+    """Where a document's bytes are, or None when it has none this server may read."""
+    if content_hash:
+        return documentStore.path(content_hash)
+    if not DOCUMENT_LEGACY_ROOT:
+        return None
+    root = os.path.realpath(DOCUMENT_LEGACY_ROOT)
+    path = os.path.realpath(os.path.join(root, file_path))
+    return path if os.path.commonpath([root, path]) == root else None
+
+
+def queue_document_text(db: AsyncSession, doc: Document):
+    """Queue a new document for extraction in the caller's transaction."""
+    db.add(DocumentText(document_id=doc.id, lesson_id=doc.lesson_id))
+
+
+# One result per row, executed for a whole batch at once
+STORE_RESULT = (
+    update(DocumentText.__table__)
+    .where(DocumentText.__table__.c.document_id == bindparam("b_document_id"))
+    .where(DocumentText.__table__.c.status == ExtractionStatus.processing)
+    .values(status=bindparam("b_status"), text=bindparam("b_text"), error=bindparam("b_error"), extracted_at=bindparam("b_extracted_at"))
+)
+
+
+class DocumentTextExtractor:
+    """Drains the document_texts queue on a thread pool, or on a process pool with processes=True.
+
+    Several app workers can run one each: claims use SKIP LOCKED, and a claim
+    left behind by a crashed worker is taken over after claim_timeout seconds,
+    up to max_attempts times. Process pools are spawned, never forked from a
+    threaded process, and are meant for the dedicated worker and the CLI.
+    """
+
+    def __init__(
+        self,
+        workers: int = DOCUMENT_TEXT_WORKERS,
+        poll_interval: float = DOCUMENT_TEXT_POLL_INTERVAL,
+        max_attempts: int = DOCUMENT_TEXT_MAX_ATTEMPTS,
+        claim_timeout: float = DOCUMENT_TEXT_CLAIM_TIMEOUT,
+        processes: bool = False,
+    ):
+        self.workers = max(1, workers)
+        self.processes = processes
+        self.batch_size = self.workers * 2
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.claim_timeout = claim_timeout
+        self._pool: Optional[Executor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        """Wake the extractor after documents were queued. Safe to call from worker threads."""
+        if self._task is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._pool is not None:
+            # Claims of cancelled extractions are retried after claim_timeout
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def claim(self, db: AsyncSession) -> List[tuple]:
+        """Claim up to batch_size queued documents as (document_id, filename, file_path, content_hash, content_type)."""
+        now = datetime.utcnow()
+        stale = and_(DocumentText.status == ExtractionStatus.processing, DocumentText.claimed_at < now - timedelta(seconds=self.claim_timeout))
+        await db.execute(
+            update(DocumentText)
+            .where(stale, DocumentText.attempts >= self.max_attempts)
+            .values(status=ExtractionStatus.failed, error=f"Gave up after {self.max_attempts} attempts")
+        )
+        claimable = (
+            select(DocumentText.document_id)
+            .where(or_(DocumentText.status == ExtractionStatus.pending, stale), DocumentText.attempts < self.max_attempts)
+            .order_by(DocumentText.queued_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        # Core rather than ORM update: the RETURNING clause reads the joined documents row
+        texts, documents = DocumentText.__table__, Document.__table__
+        claimed = await db.execute(
+            update(texts)
+            .where(texts.c.document_id.in_(claimable.scalar_subquery()), texts.c.document_id == documents.c.id)
+            .values(status=ExtractionStatus.processing, claimed_at=now, attempts=texts.c.attempts + 1)
+            .returning(documents.c.id, documents.c.filename, documents.c.file_path, documents.c.content_hash, documents.c.content_type)
+        )
+        rows = claimed.all()
+        await db.commit()
+        return rows
+
+    async def process_batch(self) -> int:
+        """Extract one claimed batch; the number of documents handled."""
+        async with SessionLocal() as db:
+            rows = await self.claim(db)
+            if not rows:
+                return 0
+            if self._pool is None:
+                self._pool = self._executor()
+            loop = asyncio.get_running_loop()
+            try:
+                results = await asyncio.gather(*[
+                    loop.run_in_executor(self._pool, extract_text, source_path(file_path, content_hash), filename, content_type)
+                    for _, filename, file_path, content_hash, content_type in rows
+                ])
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory on a huge PDF); start a fresh pool, the claims are retried later
+                self._pool = None
+                raise
+            extracted_at = datetime.utcnow()
+            await db.execute(STORE_RESULT, [
+                {"b_document_id": row[0], "b_status": status, "b_text": text, "b_error": error, "b_extracted_at": extracted_at}
+                for row, (status, text, error) in zip(rows, results)
+            ])
+            await db.commit()
+        return len(rows)
+
+    def _executor(self) -> Executor:
+        if self.processes:
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="document-text")
+
+    async def drain(self) -> int:
+        """Process batches until the queue is empty; the number of documents handled."""
+        handled = 0
+        while True:
+            batch = await self.process_batch()
+            if not batch:
+                return handled
+            handled += batch
+
+    async def _run(self):
+        while True:
+            try:
+                await self.drain()
+            except Exception:
+                logger.exception("Document text extraction failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+documentTextExtractor = DocumentTextExtractor()
+
+
+async def startDocumentTextExtractor():
+    if DOCUMENT_TEXT_EXTRACTION == "app":
+        documentTextExtractor.start()
+
+
+async def stopDocumentTextExtractor():
+    await documentTextExtractor.stop()
+
+
+def queue_missing_texts(connection, retry: bool = False) -> int:
+    """Queue every document without extracted text; with retry, failed and skipped ones too."""
+    queued = connection.execute(
+        insert(DocumentText)
+        .from_select(["document_id", "lesson_id", "status", "attempts", "queued_at"], select(
+            Document.id, Document.lesson_id, literal(ExtractionStatus.pending, DocumentText.status.type), literal(0),
+            func.timezone("utc", func.now()),
+        ))
+        .on_conflict_do_nothing(index_elements=[DocumentText.document_id])
+    ).rowcount
+    if retry:
+        queued += connection.execute(
+            update(DocumentText)
+            .where(DocumentText.status.in_([ExtractionStatus.failed, ExtractionStatus.skipped]))
+            .values(status=ExtractionStatus.pending, attempts=0, error=None, queued_at=func.timezone("utc", func.now()))
+        ).rowcount
+    return queued
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.database import engine, syncEngine
+
+    parser = argparse.ArgumentParser(description="Extract searchable text from attached documents.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill = commands.add_parser("backfill", help="queue documents without text and extract them")
+    backfill.add_argument("--retry", action="store_true", help="also retry failed and skipped documents")
+    backfill.add_argument("--queue-only", action="store_true", help="leave the extraction to the running app")
+    commands.add_parser("status", help="count documents per extraction status")
+    run = commands.add_parser("run", help="keep extracting queued documents (for DOCUMENT_TEXT_EXTRACTION=worker)")
+    run.add_argument("--workers", type=int, default=DOCUMENT_TEXT_WORKERS, help="extraction processes")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        async def extract_forever():
+            extractor = DocumentTextExtractor(workers=args.workers, processes=True)
+            extractor.start()
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await extractor.stop()
+                await engine.dispose()
+
+        asyncio.run(extract_forever())
+    elif args.command == "status":
+        with syncEngine.connect() as connection:
+            for status, count in connection.execute(select(DocumentText.status, func.count()).group_by(DocumentText.status)):
+                print(f"{status.value}\t{count}")
+    else:
+        with syncEngine.begin() as connection:
+            print(f"queued {queue_missing_texts(connection, args.retry)} document(s)")
+        if not args.queue_only:
+            async def extract_all():
+                extractor = DocumentTextExtractor(processes=True)
+                try:
+                    print(f"extracted {await extractor.drain()} document(s)")
+                finally:
+                    await extractor.stop()
+                    await engine.dispose()
+
+            asyncio.run(extract_all())
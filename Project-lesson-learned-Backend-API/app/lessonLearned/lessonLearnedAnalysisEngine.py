@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import re
+import string
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import nltk
+from nltk.corpus import stopwords
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.lessonLearned.lessonLearnedModel import LessonLearned
+
+PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+# Tokenizer processes for rebuilds; several app workers may each run an engine, so the default stays small
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", min(4, os.cpu_count() or 1)))
+ANALYSIS_CHUNK_SIZE = int(os.getenv("ANALYSIS_CHUNK_SIZE", 2000))
+
+# (lesson_id, description, created_at) as streamed from lessons_learned
+LessonRow = Tuple[object, Optional[str], Optional[datetime]]
+MonthlyCounts = Dict[date, Counter]
+
+
+@lru_cache(maxsize=1)
+def stopWords() -> frozenset:
+    return frozenset(stopwords.words("english"))
+
+
+def tokenize(text: str) -> List[str]:
+    text = PUNCTUATION.sub(" ", text.lower())
+    stop_words = stopWords()
+    return [w for w in nltk.word_tokenize(text) if w.isalpha() and w not in stop_words]
+
+
+def termCounts(text: Optional[str]) -> Counter:
+    return Counter(tokenize(text)) if text else Counter()
+
+
+def monthOf(created_at: datetime) -> date:
+    return created_at.date().replace(day=1)
+
+
+def _tokenizeChunk(rows: List[LessonRow]) -> Tuple[List[dict], MonthlyCounts, MonthlyCounts]:
+    """Worker side: per-lesson term rows plus this chunk's monthly term and lesson totals."""
+    lesson_terms = []
+    term_totals: MonthlyCounts = defaultdict(Counter)
+    lesson_totals: MonthlyCounts = defaultdict(Counter)
+    for lesson_id, description, created_at in rows:
+        counts = termCounts(description)
+        if not counts or not created_at:
+            continue
+        month = monthOf(created_at)
+        term_totals[month].update(counts)
+        lesson_totals[month].update(counts.keys())
+        lesson_terms.extend({"lesson_id": lesson_id, "term": term, "count": count} for term, count in counts.items())
+    return lesson_terms, term_totals, lesson_totals
+
+
+def streamLessons(db: Session, *criteria, chunk_size: int = ANALYSIS_CHUNK_SIZE) -> Iterator[List[LessonRow]]:
+    """Read lessons matching criteria through a server-side cursor, chunk_size rows at a time."""
+    stmt = select(LessonLearned.lesson_id, LessonLearned.description, LessonLearned.created_at).where(*criteria)
+    result = db.execute(stmt.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
+
+
+class AnalysisEngine:
+    """Tokenizes lesson chunks on a process pool and merges the partial counts.
+
+    At most ``workers * 2`` chunks are in flight, so memory stays bounded by the
+    chunk size rather than the corpus size. Workers are spawned, not forked:
+    forking a process that runs threads (uvicorn's threadpool, asyncpg) can
+    deadlock the child on a lock held by another thread.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = ANALYSIS_CHUNK_SIZE):
+        self.workers = max(1, workers or ANALYSIS_WORKERS)
+        self.chunk_size = chunk_size
+
+    def analyze(
+        self,
+        chunks: Iterable[List[LessonRow]],
+        on_lesson_terms: Optional[Callable[[List[dict]], None]] = None,
+    ) -> Tuple[MonthlyCounts, MonthlyCounts]:
+        term_totals: MonthlyCounts = defaultdict(Counter)
+        lesson_totals: MonthlyCounts = defaultdict(Counter)
+
+        def merge(partial):
+            lesson_terms, chunk_terms, chunk_lessons = partial
+            for month, counts in chunk_terms.items():
+                term_totals[month].update(counts)
+            for month, counts in chunk_lessons.items():
+                lesson_totals[month].update(counts)
+            if on_lesson_terms and lesson_terms:
+                on_lesson_terms(lesson_terms)
+
+        if self.workers == 1:
+            for chunk in chunks:
+                merge(_tokenizeChunk(chunk))
+            return term_totals, lesson_totals
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            pending = set()
+            for chunk in chunks:
+                pending.add(pool.submit(_tokenizeChunk, chunk))
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge(future.result())
+            for future in pending:
+                merge(future.result())
+        return term_totals, lesson_totals
+
+    def analyzeLessons(
+        self, db: Session, on_lesson_terms: Optional[Callable[[List[dict]], None]] = None, *criteria
+    ) -> Tuple[MonthlyCounts, MonthlyCounts]:
+        return self.analyze(streamLessons(db, *criteria, chunk_size=self.chunk_size), on_lesson_terms)
@@ -1,49 +1,234 @@
-from typing import List
+import csv
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.lessonLearned.lessonLearnedModel import Impacts, Status, Categories
 from app.lessonLearned.lessonLearnedSchemas import (
     LessonLearnedUpdate,
     LessonLearnedCreate,
     LessonLearnedResponse,
+    LessonLearnedDetail,
+    LessonLearnedFilter,
+    LessonLearnedPage,
+    LessonFacets,
+    LessonStats,
+    LessonSearchPage,
+    SimilarLesson,
+    LessonDuplicateCheck,
+    DuplicateCandidate,
+    LessonImportResult,
+    LessonStatusTransition,
+    LessonStatusResult,
 )
 from app.lessonLearned.lessonLearnedServices import (
     createLesson,
     getLessonById,
+    getLessonDetail,
     updateLesson,
-    getAllLesson,
+    getLessonPage,
+    getLessonFacets,
+    searchLessons,
+    getSimilarLessons,
+    findDuplicateLessons,
+    transitionLessonStatus,
+    LESSON_CACHE_NAMESPACE,
+    STATUS_ACTIONS,
 )
+from app.lessonLearned.lessonLearnedImport import importLessons, indexImportedLessons
+from app.lessonLearned.lessonLearnedExport import MEDIA_TYPES, exportLessons
+from app.lessonLearned.lessonLearnedStats import STATS_CACHE_NAMESPACE, getLessonStats
+from app.lessonLearned.lessonLearnedSimilarity import similarityIndex
+from app.lessonLearned.lessonLearnedDuplicates import duplicateIndex
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
+from app.responseCache import cacheKey, responseCache
 
-from app.database import SessionLocal
+from app.database import SessionLocal, SyncSessionLocal
 
 router = APIRouter(prefix="/lessons", tags=["Lessons Learned"])
 
-def getDb():
-    db = SessionLocal()
+MAX_STATUS_BATCH = 1000
+# Seconds a client is asked to wait while an in-memory lesson index is still being built
+INDEX_RETRY_AFTER = 10
+
+async def getDb():
+    async with SessionLocal() as db:
+        yield db
+
+# Bulk endpoints are plain def handlers and run in the threadpool on a blocking session
+def getSyncDb():
+    db = SyncSessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def getLessonFilter(
+    status: Optional[Status] = None,
+    category_main: Optional[Categories] = None,
+    impact: Optional[Impacts] = None,
+    project_name: Optional[str] = None,
+    submitted_by: Optional[UUID] = None,
+    tags: Optional[List[str]] = Query(None),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> LessonLearnedFilter:
+    return LessonLearnedFilter(
+        status=status,
+        category_main=category_main,
+        impact=impact,
+        project_name=project_name,
+        submitted_by=submitted_by,
+        tags=tags,
+        created_from=created_from,
+        created_to=created_to,
+    )
+
 @router.post("/", response_model=LessonLearnedResponse)
-async def createLessonEndpoint(lesson: LessonLearnedCreate, db: Session = Depends(getDb)): 
-    return createLesson(db, lesson)
+async def createLessonEndpoint(lesson: LessonLearnedCreate, db: AsyncSession = Depends(getDb)): 
+    return await createLesson(db, lesson)
+
+@router.post("/import", response_model=LessonImportResult)
+def importLessonsEndpoint(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    db: Session = Depends(getSyncDb),
+):
+    file_format = format or ("csv" if (file.filename or "").lower().endswith(".csv") else "jsonl")
+    started_at = datetime.utcnow()
+    try:
+        result = importLessons(db, file.file, file_format)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Unreadable {file_format} file: {e}")
+    if result["imported"]:
+        background_tasks.add_task(indexImportedLessons, started_at)
+    return result
+
+@router.get("/export")
+def exportLessonsEndpoint(
+    filters: LessonLearnedFilter = Depends(getLessonFilter),
+    format: str = Query("csv", pattern="^(csv|jsonl)$"),
+    gzip: bool = False,
+):
+    filename = f"lessons.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        exportLessons(filters, format, gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.post("/duplicates", response_model=List[DuplicateCandidate])
+async def checkDuplicateLessons(
+    check: LessonDuplicateCheck,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(getDb),
+):
+    if not duplicateIndex.ready:
+        raise HTTPException(status_code=503, detail="The duplicate index is still loading", headers={"Retry-After": str(INDEX_RETRY_AFTER)})
+    return await findDuplicateLessons(db, check, limit)
+
+@router.post("/status", response_model=List[LessonStatusResult])
+async def transitionLessonStatusEndpoint(transition: LessonStatusTransition, db: AsyncSession = Depends(getDb)):
+    if transition.status not in STATUS_ACTIONS:
+        raise HTTPException(status_code=422, detail="Lessons can only be bulk approved or rejected")
+    if not 1 <= len(transition.lesson_ids) <= MAX_STATUS_BATCH:
+        raise HTTPException(status_code=422, detail=f"Send between 1 and {MAX_STATUS_BATCH} lesson ids")
+    return await transitionLessonStatus(db, transition)
+
+@router.get("/search", response_model=LessonSearchPage)
+async def searchLessonsEndpoint(
+    q: str = Query(..., min_length=1),
+    filters: LessonLearnedFilter = Depends(getLessonFilter),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    highlight: bool = True,
+    documents: bool = Query(True, description="Also match text extracted from attached documents"),
+    db: AsyncSession = Depends(getDb),
+):
+    after = decode_cursor(cursor, float, UUID) if cursor else None
+    return await searchLessons(db, q, filters, limit, after, highlight, documents)
+
+@router.get("/facets", response_model=LessonFacets)
+async def lessonFacets(
+    request: Request,
+    filters: LessonLearnedFilter = Depends(getLessonFilter),
+    tag_limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(getDb),
+):
+    async def build():
+        return LessonFacets.model_validate(await getLessonFacets(db, filters, tag_limit)), None
+
+    return await responseCache.respond(request, cacheKey(LESSON_CACHE_NAMESPACE, request), build)
+
+@router.get("/stats", response_model=LessonStats)
+async def lessonStats(request: Request, db: AsyncSession = Depends(getDb)):
+    async def build():
+        stats = await getLessonStats(db)
+        # The views only change when they are refreshed
+        return LessonStats.model_validate(stats), str(stats["refreshed_at"])
+
+    return await responseCache.respond(request, cacheKey(STATS_CACHE_NAMESPACE, request), build)
 
 @router.get("/{lessonId}", response_model=LessonLearnedResponse)
-async def getLesson(lessonId: UUID, db: Session = Depends(getDb)):
-    lesson = getLessonById(db, lessonId)
+async def getLesson(lessonId: UUID, request: Request, db: AsyncSession = Depends(getDb)):
+    async def build():
+        lesson = await getLessonById(db, lessonId)
+        if not lesson:
+            return None
+        return LessonLearnedResponse.model_validate(lesson, from_attributes=True), lesson.updated_at.isoformat()
+
+    response = await responseCache.respond(request, cacheKey(LESSON_CACHE_NAMESPACE, request), build)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    return response
+
+@router.get("/{lessonId}/detail", response_model=LessonLearnedDetail)
+async def getLessonDetailEndpoint(lessonId: UUID, db: AsyncSession = Depends(getDb)):
+    lesson = await getLessonDetail(db, lessonId)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     return lesson
 
+@router.get("/{lessonId}/similar", response_model=List[SimilarLesson])
+async def similarLessons(lessonId: UUID, k: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(getDb)):
+    if not similarityIndex.ready:
+        raise HTTPException(status_code=503, detail="The similarity index is still loading", headers={"Retry-After": str(INDEX_RETRY_AFTER)})
+    if not await getLessonById(db, lessonId):
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    return await getSimilarLessons(db, lessonId, k)
+
 @router.put("/{lessonId}", response_model=LessonLearnedResponse)  # ✅ fixed this line
-async def updateLessonEndpoint(lessonId: UUID, lesson: LessonLearnedUpdate, db: Session = Depends(getDb)):
-    update = updateLesson(db, lessonId, lesson)
+async def updateLessonEndpoint(
+    lessonId: UUID,
+    lesson: LessonLearnedUpdate,
+    performed_by: Optional[UUID] = Query(None, description="The user making the change, recorded in the audit log"),
+    db: AsyncSession = Depends(getDb),
+):
+    update = await updateLesson(db, lessonId, lesson, performed_by)
     if not update:
         raise HTTPException(status_code=404, detail="Lesson not found")
     return update
 
-@router.get("/", response_model=List[LessonLearnedResponse])  # ✅ fixed this line
-async def listLessons(db: Session = Depends(getDb)):
-    return getAllLesson(db)
+@router.get("/", response_model=LessonLearnedPage)
+async def listLessons(
+    request: Request,
+    filters: LessonLearnedFilter = Depends(getLessonFilter),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(getDb),
+):
+    after = decode_cursor(cursor, datetime.fromisoformat, UUID) if cursor else None
+
+    async def build():
+        page = await getLessonPage(db, filters, limit, after)
+        # next_cursor changes when a lesson past the page starts or stops matching, even if the items do not
+        version = ",".join(f"{lesson.lesson_id}@{lesson.updated_at.isoformat()}" for lesson in page["items"])
+        version += f"|{page['next_cursor']}"
+        return LessonLearnedPage.model_validate(page, from_attributes=True), version
+
+    return await responseCache.respond(request, cacheKey(LESSON_CACHE_NAMESPACE, request), build)
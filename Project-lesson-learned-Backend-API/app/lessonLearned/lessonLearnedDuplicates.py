@@ -0,0 +1,158 @@
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from app.lessonLearned.lessonLearnedIndexStore import PersistentIndex
+
+DUPLICATE_INDEX_PATH = os.getenv("DUPLICATE_INDEX_PATH", "data/duplicate_index.npz")
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", 0.5))
+TEXT_FIELDS = ("description", "root_cause")
+SHINGLE_SIZE = 3
+# 32 bands of 4 rows: pairs above ~0.42 Jaccard collide in at least one band with high probability
+NUM_PERM = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERM // BANDS
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_LOW_29 = np.uint64((1 << 29) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 61) - 1, size=NUM_PERM, dtype=np.uint64)
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def shingles(text: str) -> Set[str]:
+    words = WORD.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _modPrime(values: np.ndarray) -> np.ndarray:
+    """values mod 2^61 - 1 for uint64 values, using 2^61 = 1 (mod p)."""
+    values = (values & _MERSENNE_PRIME) + (values >> np.uint64(61))
+    return np.where(values >= _MERSENNE_PRIME, values - _MERSENNE_PRIME, values)
+
+
+def _mulModPrime(x: np.ndarray, a: np.ndarray) -> np.ndarray:
+    """x * a mod 2^61 - 1 without uint64 overflow, for x < 2^32 and a < 2^61.
+
+    a is split at bit 32 so every partial product fits in 64 bits.
+    """
+    high = (a >> np.uint64(32)) * x
+    # high * 2^32 mod p: the bits of high above 29 wrap around to the bottom
+    high = ((high & _LOW_29) << np.uint64(32)) + (high >> np.uint64(29))
+    low = _modPrime((a & _MAX_HASH) * x)
+    return _modPrime(high + low)
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """MinHash signature over word shingles; None when the text has no words."""
+    shingle_set = shingles(text)
+    if not shingle_set:
+        return None
+    hashed = np.fromiter((zlib.crc32(s.encode()) for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+    # (a * x + b) mod p, computed exactly so the permutations form a universal family
+    permuted = _modPrime(_mulModPrime(hashed[:, None], _PERM_A) + _PERM_B) & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def duplicateText(*texts: Optional[str]) -> str:
+    return " ".join(text or "" for text in texts)
+
+
+class DuplicateIndex(PersistentIndex):
+    """MinHash signatures with an LSH band index for sub-linear near-duplicate lookups."""
+
+    TEXT_FIELDS = TEXT_FIELDS
+    # 2: signatures from the exact (a * x + b) mod p permutations
+    SNAPSHOT_VERSION = 2
+
+    def __init__(self, path: str = DUPLICATE_INDEX_PATH):
+        super().__init__(path)
+        self._signatures: Dict[UUID, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[UUID]]] = [defaultdict(set) for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    @staticmethod
+    def _bandKeys(signature: np.ndarray) -> List[bytes]:
+        return [signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes() for band in range(BANDS)]
+
+    def upsert(self, lesson_id: UUID, text: str):
+        signature = minhash(text)
+        with self._lock:
+            self.remove(lesson_id)
+            if signature is not None:
+                self._signatures[lesson_id] = signature
+                for band, key in enumerate(self._bandKeys(signature)):
+                    self._buckets[band][key].add(lesson_id)
+
+    def remove(self, lesson_id: UUID):
+        with self._lock:
+            signature = self._signatures.pop(lesson_id, None)
+            if signature is None:
+                return
+            for band, key in enumerate(self._bandKeys(signature)):
+                bucket = self._buckets[band].get(key)
+                if bucket is not None:
+                    bucket.discard(lesson_id)
+                    if not bucket:
+                        del self._buckets[band][key]
+
+    def query(
+        self,
+        text: str,
+        threshold: float = DUPLICATE_THRESHOLD,
+        exclude: Optional[UUID] = None,
+    ) -> List[Tuple[UUID, float]]:
+        """Lessons whose estimated Jaccard similarity to text is at least threshold, best first."""
+        signature = minhash(text)
+        if signature is None:
+            return []
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._bandKeys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            candidates.discard(exclude)
+            scored = [
+                (lesson_id, float(np.mean(self._signatures[lesson_id] == signature)))
+                for lesson_id in candidates
+            ]
+        return sorted((hit for hit in scored if hit[1] >= threshold), key=lambda hit: hit[1], reverse=True)
+
+    def _snapshot(self) -> Dict[str, np.ndarray]:
+        return {
+            "ids": np.array([lesson_id.hex for lesson_id in self._signatures], dtype="U32"),
+            "signatures": (
+                np.stack(list(self._signatures.values()))
+                if self._signatures
+                else np.empty((0, NUM_PERM), dtype=np.uint32)
+            ),
+        }
+
+    def _restore(self, arrays: Dict[str, np.ndarray]):
+        self._signatures = {}
+        self._buckets = [defaultdict(set) for _ in range(BANDS)]
+        for lesson_id, signature in zip((UUID(hex=str(h)) for h in arrays["ids"]), arrays["signatures"]):
+            self._signatures[lesson_id] = signature
+            for band, key in enumerate(self._bandKeys(signature)):
+                self._buckets[band][key].add(lesson_id)
+
+
+duplicateIndex = DuplicateIndex()
+
+
+def startDuplicateIndex():
+    duplicateIndex.start()
+
+
+def stopDuplicateIndex():
+    duplicateIndex.stop()
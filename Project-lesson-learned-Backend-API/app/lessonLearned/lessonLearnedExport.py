@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+import zlib
+from enum import Enum
+from typing import Iterator, List
+
+from sqlalchemy import select
+
+from app.database import SyncSessionLocal
+from app.lessonLearned.lessonLearnedImport import CSV_LIST_SEPARATOR
+from app.lessonLearned.lessonLearnedModel import LessonLearned
+from app.lessonLearned.lessonLearnedSchemas import LessonLearnedFilter, LessonLearnedResponse
+from app.lessonLearned.lessonLearnedServices import filterLessons
+
+EXPORT_FIELDS = list(LessonLearnedResponse.model_fields)
+EXPORT_CHUNK_SIZE = 1000
+MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+def _jsonValue(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _csvValue(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return CSV_LIST_SEPARATOR.join(value)
+    if isinstance(value, Enum):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _encodeCsv(rows: List[tuple], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows([_csvValue(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def _encodeJsonl(rows: List[tuple]) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, row)), default=_jsonValue) + "\n" for row in rows
+    ).encode()
+
+
+def exportLessons(filters: LessonLearnedFilter, file_format: str, compress: bool = False) -> Iterator[bytes]:
+    """Yield the matching lessons as CSV or JSONL, one encoded chunk per server-side cursor fetch.
+
+    The generator owns its session: it outlives the request's dependencies
+    while the response body is being streamed.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    db = SyncSessionLocal()
+    try:
+        columns = [getattr(LessonLearned, field) for field in EXPORT_FIELDS]
+        query = db.execute(
+            filterLessons(select(*columns), filters)
+            .order_by(LessonLearned.created_at, LessonLearned.lesson_id)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        rows: List[tuple] = []
+        first = True
+
+        def encode() -> bytes:
+            data = _encodeCsv(rows, first) if file_format == "csv" else _encodeJsonl(rows)
+            return compressor.compress(data) if compressor else data
+
+        for row in query:
+            rows.append(tuple(row))
+            if len(rows) >= EXPORT_CHUNK_SIZE:
+                yield encode()
+                rows, first = [], False
+        if rows or (first and file_format == "csv"):
+            yield encode()
+        if compressor:
+            yield compressor.flush()
+    finally:
+        db.close()
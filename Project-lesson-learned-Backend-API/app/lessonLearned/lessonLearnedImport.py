@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import BinaryIO, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.database import SyncSessionLocal
+from app.lessonLearned.lessonLearnedDuplicates import duplicateIndex
+from app.lessonLearned.lessonLearnedModel import LessonLearned
+from app.lessonLearned.lessonLearnedSchemas import LessonLearnedCreate
+from app.lessonLearned.lessonLearnedServices import invalidateLessonCache
+from app.lessonLearned.lessonLearnedSimilarity import similarityIndex
+from app.lessonLearned.lessonLearnedTermStats import catchUpTermStats
+
+IMPORT_BATCH_SIZE = 1000
+# Enough to fix a broken export without letting a bad file blow up the response
+MAX_REPORTED_ERRORS = 1000
+CSV_LIST_SEPARATOR = ";"
+
+
+def _csvRows(text: io.TextIOWrapper) -> Iterator[Tuple[int, object]]:
+    reader = csv.DictReader(text)
+    for row in reader:
+        data = {key: (value if value != "" else None) for key, value in row.items() if key}
+        if data.get("tags"):
+            data["tags"] = [tag.strip() for tag in data["tags"].split(CSV_LIST_SEPARATOR) if tag.strip()]
+        yield reader.line_num, data
+
+
+def _jsonlRows(text: io.TextIOWrapper) -> Iterator[Tuple[int, object]]:
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+
+def _validate(data: object) -> LessonLearnedCreate:
+    if isinstance(data, Exception):
+        raise ValueError(f"invalid JSON: {data}")
+    if isinstance(data, dict):
+        # Empty cells and nulls mean "not given", so defaults such as status=Pending apply
+        data = {key: value for key, value in data.items() if value is not None}
+    return LessonLearnedCreate.model_validate(data)
+
+
+def _errorMessages(error: Exception) -> List[str]:
+    if isinstance(error, ValidationError):
+        return [f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()]
+    if isinstance(error, DBAPIError):
+        return [str(error.orig).strip().splitlines()[0]]
+    return [str(error)]
+
+
+class LessonImport:
+    def __init__(self, db: Session):
+        self.db = db
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def fail(self, row: int, error: Exception):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": _errorMessages(error)})
+
+    def insert(self, batch: List[Tuple[int, LessonLearnedCreate]]):
+        """Multi-row INSERT ... RETURNING for the batch, falling back to row by row to pin down DB errors."""
+        try:
+            with self.db.begin_nested():
+                ids = self.db.scalars(
+                    insert(LessonLearned).returning(LessonLearned.lesson_id),
+                    [lesson.dict() for _, lesson in batch],
+                ).all()
+            self.imported += len(ids)
+            return
+        except DBAPIError:
+            if len(batch) == 1:
+                raise
+        for row in batch:
+            try:
+                self.insert([row])
+            except DBAPIError as e:
+                self.fail(row[0], e)
+
+    def run(self, rows: Iterator[Tuple[int, object]]) -> dict:
+        batch = []
+        for row_number, data in rows:
+            try:
+                batch.append((row_number, _validate(data)))
+            except (ValidationError, ValueError) as e:
+                self.fail(row_number, e)
+                continue
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                self.insert(batch)
+                batch = []
+        if batch:
+            self.insert(batch)
+        self.db.commit()
+        if self.imported:
+            invalidateLessonCache(self.imported)
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def importLessons(db: Session, upload: BinaryIO, file_format: str) -> dict:
+    text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    rows = _csvRows(text) if file_format == "csv" else _jsonlRows(text)
+    return LessonImport(db).run(rows)
+
+
+def indexImportedLessons(since: datetime):
+    """Bring the term rollups and in-memory indexes up to date after an import, off the request path."""
+    db = SyncSessionLocal()
+    try:
+        # Runs in the app's threadpool: tokenize in this thread rather than starting worker processes
+        # from the web worker. Large backfills belong to `python -m app.lessonLearned.lessonLearnedTermStats`.
+        catchUpTermStats(db, since, workers=1)
+        similarityIndex.syncFromDb(db)
+        duplicateIndex.syncFromDb(db)
+    finally:
+        db.close()
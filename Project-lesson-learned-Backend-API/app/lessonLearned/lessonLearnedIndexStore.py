@@ -0,0 +1,154 @@
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.lessonLearned.lessonLearnedModel import LessonLearned
+
+# Seconds between catching up from the database and saving a snapshot; 0 saves only on shutdown
+INDEX_SAVE_INTERVAL = float(os.getenv("INDEX_SAVE_INTERVAL", 300))
+# updated_at is stamped at flush, not commit, so re-read a little before the watermark
+SYNC_OVERLAP = timedelta(minutes=5)
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentIndex:
+    """An in-memory lesson index kept in an .npz snapshot and caught up from lessons_learned.
+
+    Subclasses list the columns they index in TEXT_FIELDS and implement
+    upsert, _snapshot and _restore. The watermark only advances when the
+    index reads the database, so a snapshot never claims lessons that another
+    app worker wrote and this one has not seen. start() builds the index in a
+    background thread; ready is False until that build finishes.
+    """
+
+    TEXT_FIELDS: Tuple[str, ...] = ()
+    # Bump when the saved arrays change meaning; older snapshots are then rebuilt from the database
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self.watermark: Optional[datetime] = None
+        self._stopping = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        # An index that is not being built serves whatever it holds
+        self._ready = threading.Event()
+        self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def waitUntilReady(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def upsert(self, lesson_id: UUID, text: str):
+        raise NotImplementedError
+
+    def _snapshot(self) -> Dict[str, np.ndarray]:
+        """Copies of the arrays to save; called with the lock held."""
+        raise NotImplementedError
+
+    def _restore(self, arrays: Dict[str, np.ndarray]):
+        """Replace the index with saved arrays; called with the lock held."""
+        raise NotImplementedError
+
+    def text(self, texts: Iterable[Optional[str]]) -> str:
+        return " ".join(text or "" for text in texts)
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        with self._lock:
+            arrays = self._snapshot()
+            watermark = self.watermark.isoformat() if self.watermark else ""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # Every process writes its own temp file beside the target and renames it, so
+        # concurrent saves from several app workers each replace the file whole
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez(file, **arrays, watermark=np.array(watermark), version=np.array(self.SNAPSHOT_VERSION))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, path: Optional[str] = None):
+        with np.load(path or self.path) as stored:
+            arrays = {name: stored[name] for name in stored.files}
+        watermark = str(arrays.pop("watermark"))
+        version = int(arrays.pop("version", 1))
+        if version != self.SNAPSHOT_VERSION:
+            logger.warning("Ignoring %s: snapshot version %s, expected %s", path or self.path, version, self.SNAPSHOT_VERSION)
+            return
+        with self._lock:
+            self._restore(arrays)
+            self.watermark = datetime.fromisoformat(watermark) if watermark else None
+
+    def syncFromDb(self, db: Session, batch_size: int = 1000):
+        """Index every lesson changed since the watermark (all lessons for an empty index)."""
+        columns = [getattr(LessonLearned, field) for field in self.TEXT_FIELDS]
+        query = db.query(LessonLearned.lesson_id, LessonLearned.updated_at, *columns)
+        watermark = self.watermark
+        if watermark:
+            query = query.filter(LessonLearned.updated_at > watermark - SYNC_OVERLAP)
+        for lesson_id, updated_at, *texts in query.yield_per(batch_size):
+            self.upsert(lesson_id, self.text(texts))
+            if updated_at and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+        with self._lock:
+            if watermark and (self.watermark is None or watermark > self.watermark):
+                self.watermark = watermark
+
+    def sync(self):
+        from app.database import SyncSessionLocal
+
+        db = SyncSessionLocal()
+        try:
+            self.syncFromDb(db)
+        finally:
+            db.close()
+
+    def start(self, save_interval: float = INDEX_SAVE_INTERVAL):
+        """Restore the snapshot and re-index lessons written since it was saved, off the caller's thread,
+        then keep saving in the background."""
+        self._ready.clear()
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, args=(save_interval,), name=f"{type(self).__name__}-worker", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        if self._worker is not None:
+            self._stopping.set()
+            self._worker.join()
+            self._worker = None
+        self.save()
+
+    def _run(self, save_interval: float):
+        try:
+            if os.path.exists(self.path):
+                self.load()
+            self.sync()
+        except Exception:
+            logger.exception("Could not build %s", self.path)
+        finally:
+            self._ready.set()
+        if save_interval > 0:
+            self._saveEvery(save_interval)
+
+    def _saveEvery(self, interval: float):
+        while not self._stopping.wait(interval):
+            try:
+                self.sync()
+                self.save()
+            except Exception:
+                logger.exception("Could not save %s", self.path)
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Date, Enum, ForeignKey, Text, DateTime
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Date, Enum, ForeignKey, Text, DateTime, Index, Computed, Integer
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy import ForeignKey
 from uuid import uuid4
 from datetime import datetime
@@ -25,8 +25,28 @@ class Status(str, enum.Enum):
     rejected = "Rejected"
 
 
+# Weighted document for full-text search; Postgres keeps the stored column current on insert/update
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(project_name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(root_cause, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(suggested_actions, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(outcomes, '')), 'C')"
+)
+
+
 class LessonLearned(Base):
     __tablename__ = "lessons_learned"
+    __table_args__ = (
+        # Keyset pagination walks the list in (created_at, lesson_id) order
+        Index("ix_lessons_learned_created_at_lesson_id", "created_at", "lesson_id"),
+        Index("ix_lessons_learned_search_vector", "search_vector", postgresql_using="gin"),
+        # Filtered lists keep the keyset order, so the filter column leads the same key
+        Index("ix_lessons_learned_status_created_at", "status", "created_at", "lesson_id"),
+        Index("ix_lessons_learned_submitted_by_created_at", "submitted_by", "created_at", "lesson_id"),
+        Index("ix_lessons_learned_category_sub", "category_sub"),
+        Index("ix_lessons_learned_tags", "tags", postgresql_using="gin"),
+    )
     
     lesson_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4, index=True)
     project_name = Column(String, nullable=False)
@@ -45,6 +65,7 @@ class LessonLearned(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
     submitted_by = Column(UUID(as_uuid=True), ForeignKey("users.user_id")) 
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
 
     #Relationship
     documents = relationship("Document", back_populates="lesson", cascade="all, delete")
@@ -52,5 +73,27 @@ class LessonLearned(Base):
     subcategory = relationship("SubCategory", back_populates="lessons")
     submitted_by_user = relationship("User", back_populates="lessons")
 
-    
-    
\ No newline at end of file
+
+class LessonTermCount(Base):
+    __tablename__ = "lesson_term_counts"
+
+    lesson_id = Column(UUID(as_uuid=True), ForeignKey("lessons_learned.lesson_id", ondelete="CASCADE"), primary_key=True)
+    term = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
+
+
+class TermMonthlyStat(Base):
+    __tablename__ = "term_monthly_stats"
+
+    month = Column(Date, primary_key=True)
+    term = Column(String, primary_key=True)
+    term_count = Column(Integer, nullable=False, default=0)
+    lesson_count = Column(Integer, nullable=False, default=0)
+
+
+class StatsRefresh(Base):
+    """When each statistics materialized view was last refreshed."""
+    __tablename__ = "stats_refreshes"
+
+    view_name = Column(String, primary_key=True)
+    refreshed_at = Column(DateTime, nullable=False)
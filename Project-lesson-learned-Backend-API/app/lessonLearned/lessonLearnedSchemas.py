@@ -3,6 +3,9 @@ from pydantic import BaseModel
 from uuid import UUID
 from datetime import datetime, date
 from app.lessonLearned.lessonLearnedModel import Impacts, Status, Categories
+from app.documents.documentSchemas import DocumentResponse
+from app.auditLog.auditlogSchemas import AuditLogResponse
+from app.user.userSchema import UserRole
 
 class LessonLearnedBase(BaseModel):
     project_name: str
@@ -41,5 +44,110 @@ class LessonLearnedResponse(LessonLearnedBase):
     created_at: datetime
     updated_at: datetime
 
+class LessonLearnedFilter(BaseModel):
+    status: Optional[Status] = None
+    category_main: Optional[Categories] = None
+    impact: Optional[Impacts] = None
+    project_name: Optional[str] = None
+    submitted_by: Optional[UUID] = None
+    tags: Optional[List[str]] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+class LessonLearnedPage(BaseModel):
+    items: List[LessonLearnedResponse]
+    next_cursor: Optional[str] = None
+
+class LessonSearchHit(BaseModel):
+    lesson: LessonLearnedResponse
+    rank: float
+    snippet: Optional[str] = None
+
+class LessonSearchPage(BaseModel):
+    items: List[LessonSearchHit]
+    next_cursor: Optional[str] = None
+
+class SimilarLesson(BaseModel):
+    lesson: LessonLearnedResponse
+    score: float
+
+class LessonDuplicateCheck(BaseModel):
+    description: str
+    root_cause: Optional[str] = None
+    project_name: Optional[str] = None
+    exclude_lesson_id: Optional[UUID] = None
+
+class LessonImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+class LessonImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[LessonImportError]
+    errors_truncated: bool = False
+
+class DuplicateCandidate(BaseModel):
+    lesson_id: UUID
+    project_name: str
+    description: str
+    similarity: float
+
+class LessonStatusTransition(BaseModel):
+    lesson_ids: List[UUID]
+    status: Status
+    performed_by: UUID
+
+class LessonStatusResult(BaseModel):
+    lesson_id: UUID
+    result: str  # "updated", "unchanged" or "not_found"
+
+class FacetCount(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+class LessonFacets(BaseModel):
+    tags: List[FacetCount]
+    category_main: List[FacetCount]
+    impact: List[FacetCount]
+    status: List[FacetCount]
+
+class LessonMonthlyStat(BaseModel):
+    month: date
+    category_main: Categories
+    impact: Impacts
+    status: Status
+    lesson_count: int
+
+class LessonProjectStat(BaseModel):
+    project_name: str
+    lesson_count: int
+    pending_count: int
+    approved_count: int
+    rejected_count: int
+    last_created_at: Optional[datetime] = None
+
+class LessonStats(BaseModel):
+    refreshed_at: Optional[datetime] = None
+    months: List[LessonMonthlyStat]
+    projects: List[LessonProjectStat]
+
+class LessonSubCategory(BaseModel):
+    subcategory_id: UUID
+    main_category: str
+    name: str
+
+class LessonSubmitter(BaseModel):
+    user_id: UUID
+    name: str
+    email: str
+    role: UserRole
+
+class LessonLearnedDetail(LessonLearnedResponse):
+    subcategory: Optional[LessonSubCategory] = None
+    submitted_by_user: Optional[LessonSubmitter] = None
+    documents: List[DocumentResponse] = []
+    audit_logs: List[AuditLogResponse] = []
+
 class Config:
     from_attributes = True        
\ No newline at end of file
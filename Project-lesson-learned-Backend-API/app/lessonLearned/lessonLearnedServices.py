@@ -1,27 +1,284 @@
 from uuid import UUID
-from typing import List
-from app.lessonLearned.lessonLearnedModel import LessonLearned
-from app.lessonLearned.lessonLearnedSchemas import LessonLearnedUpdate, LessonLearnedCreate
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import Select, select, insert, update, tuple_, func, cast, any_, bindparam, union_all, REAL
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from starlette.concurrency import run_in_threadpool
+from app.lessonLearned.lessonLearnedModel import LessonLearned, Status
+from app.auditLog.auditlogModel import AuditLog
+from app.auditLog.auditlogEvents import STATUS_ACTIONS, setAuditActor
+from app.documents.documentModel import DocumentText
+from app.lessonLearned.lessonLearnedSchemas import (
+    LessonLearnedUpdate,
+    LessonLearnedCreate,
+    LessonLearnedFilter,
+    LessonDuplicateCheck,
+    LessonStatusTransition,
+)
+from app.lessonLearned.lessonLearnedAnalysisEngine import termCounts
+from app.lessonLearned.lessonLearnedTermStats import recordLessonTerms, removeLessonTerms
+from app.lessonLearned.lessonLearnedSimilarity import TEXT_FIELDS, lessonText, similarityIndex
+from app.lessonLearned.lessonLearnedDuplicates import TEXT_FIELDS as DUPLICATE_FIELDS, duplicateIndex, duplicateText
+from app.lessonLearned.lessonLearnedStats import statsRefresher
+from app.pagination import encode_cursor
+from app.responseCache import responseCache
 
-def createLesson(db: Session, lesson: LessonLearnedCreate) -> LessonLearned :
+SEARCH_CONFIG = "english"
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10"
+LESSON_CACHE_NAMESPACE = "lessons"
+FACET_FIELDS = ("category_main", "impact", "status")
+
+def _indexLesson(lesson: LessonLearned, fields: set):
+    if fields & set(TEXT_FIELDS):
+        similarityIndex.upsert(lesson.lesson_id, lessonText(lesson))
+    if fields & set(DUPLICATE_FIELDS):
+        duplicateIndex.upsert(lesson.lesson_id, duplicateText(lesson.description, lesson.root_cause))
+
+async def createLesson(db: AsyncSession, lesson: LessonLearnedCreate) -> LessonLearned :
     db_lesson = LessonLearned(**lesson.dict())
+    # Tokenizing and index maintenance are CPU work; keep them off the event loop
+    counts = await run_in_threadpool(termCounts, db_lesson.description)
     db.add(db_lesson)
-    db.commit()
-    db.refresh(db_lesson)
+    await db.flush()
+    await db.run_sync(recordLessonTerms, db_lesson, counts)
+    await db.commit()
+    await db.refresh(db_lesson)
+    invalidateLessonCache()
+    await run_in_threadpool(_indexLesson, db_lesson, set(TEXT_FIELDS) | set(DUPLICATE_FIELDS))
     return db_lesson
 
-def getLessonById(db: Session, lesson_id: UUID):
-    return db.query(LessonLearned).filter(LessonLearned.lesson_id == lesson_id).first()
+def invalidateLessonCache(writes: int = 1):
+    responseCache.invalidate(f"{LESSON_CACHE_NAMESPACE}:")
+    statsRefresher.noteWrites(writes)
+
+async def getLessonById(db: AsyncSession, lesson_id: UUID):
+    return await db.scalar(select(LessonLearned).where(LessonLearned.lesson_id == lesson_id))
+
+async def getLessonDetail(db: AsyncSession, lesson_id: UUID):
+    """The lesson with its subcategory, submitter, documents and audit trail in three queries."""
+    return await db.scalar(
+        select(LessonLearned)
+        .options(
+            joinedload(LessonLearned.subcategory),
+            joinedload(LessonLearned.submitted_by_user),
+            # Collections load with one IN query each instead of multiplying the joined rows
+            selectinload(LessonLearned.documents),
+            selectinload(LessonLearned.audit_logs),
+        )
+        .where(LessonLearned.lesson_id == lesson_id)
+    )
 
-def updateLesson(db: Session, lesson_id: UUID, update_data: LessonLearnedUpdate):
-    lesson = getLessonById(db, lesson_id)
+async def updateLesson(db: AsyncSession, lesson_id: UUID, update_data: LessonLearnedUpdate, performed_by: Optional[UUID] = None):
+    lesson = await getLessonById(db, lesson_id)
     if lesson:
-        for field, value in update_data.dict(exclude_unset=True).items():
+        setAuditActor(db, performed_by)
+        changes = update_data.dict(exclude_unset=True)
+        if "description" in changes:
+            counts = await run_in_threadpool(termCounts, changes["description"])
+            await db.run_sync(removeLessonTerms, lesson)
+        for field, value in changes.items():
             setattr(lesson, field, value)
-        db.commit()
-        db.refresh(lesson)
+        if "description" in changes:
+            await db.run_sync(recordLessonTerms, lesson, counts)
+        await db.commit()
+        await db.refresh(lesson)
+        invalidateLessonCache()
+        await run_in_threadpool(_indexLesson, lesson, changes.keys())
     return lesson
 
-def getAllLesson(db: Session) -> List[LessonLearned]:       
-    return db.query(LessonLearned).all()
\ No newline at end of file
+async def transitionLessonStatus(db: AsyncSession, transition: LessonStatusTransition) -> List[dict]:
+    """Move many lessons to an approved/rejected status and audit each change in one transaction."""
+    lesson_ids = list(dict.fromkeys(transition.lesson_ids))
+    # One array parameter, so the statement text is the same for every batch size
+    ids = bindparam("lesson_ids", lesson_ids, type_=ARRAY(PG_UUID(as_uuid=True)))
+    now = datetime.utcnow()
+    values = {"status": transition.status, "updated_at": now}
+    if transition.status == Status.approved:
+        values["approved_by"] = transition.performed_by
+    updated = set(
+        await db.scalars(
+            update(LessonLearned)
+            .where(LessonLearned.lesson_id == any_(ids), LessonLearned.status.is_distinct_from(transition.status))
+            .values(**values)
+            .returning(LessonLearned.lesson_id)
+            .execution_options(synchronize_session=False)
+        )
+    )
+    existing = updated
+    if len(updated) < len(lesson_ids):
+        existing = updated | set(await db.scalars(select(LessonLearned.lesson_id).where(LessonLearned.lesson_id == any_(ids))))
+    if updated:
+        action = STATUS_ACTIONS[transition.status]
+        await db.execute(
+            insert(AuditLog).values([
+                {"lesson_id": lesson_id, "action": action, "performed_by": transition.performed_by, "timestamp": now}
+                for lesson_id in lesson_ids if lesson_id in updated
+            ])
+        )
+    await db.commit()
+    if updated:
+        invalidateLessonCache(len(updated))
+    return [
+        {"lesson_id": lesson_id, "result": "updated" if lesson_id in updated else "unchanged" if lesson_id in existing else "not_found"}
+        for lesson_id in lesson_ids
+    ]
+
+def filterLessons(query: Select, filters: LessonLearnedFilter) -> Select:
+    if filters.status:
+        query = query.filter(LessonLearned.status == filters.status)
+    if filters.category_main:
+        query = query.filter(LessonLearned.category_main == filters.category_main)
+    if filters.impact:
+        query = query.filter(LessonLearned.impact == filters.impact)
+    if filters.project_name:
+        query = query.filter(LessonLearned.project_name == filters.project_name)
+    if filters.submitted_by:
+        query = query.filter(LessonLearned.submitted_by == filters.submitted_by)
+    if filters.tags:
+        query = query.filter(LessonLearned.tags.contains(filters.tags))
+    if filters.created_from:
+        query = query.filter(LessonLearned.created_at >= filters.created_from)
+    if filters.created_to:
+        query = query.filter(LessonLearned.created_at < filters.created_to)
+    return query
+
+async def getLessonPage(
+    db: AsyncSession,
+    filters: LessonLearnedFilter,
+    limit: int,
+    after: Optional[Tuple[datetime, UUID]] = None,
+) -> dict:
+    query = filterLessons(select(LessonLearned), filters)
+    if after:
+        query = query.filter(tuple_(LessonLearned.created_at, LessonLearned.lesson_id) < tuple_(*after))
+    # Fetch one extra row to learn whether another page exists
+    lessons = (
+        await db.scalars(
+            query.order_by(LessonLearned.created_at.desc(), LessonLearned.lesson_id.desc()).limit(limit + 1)
+        )
+    ).all()
+    next_cursor = None
+    if len(lessons) > limit:
+        lessons = lessons[:limit]
+        next_cursor = encode_cursor(lessons[-1].created_at, lessons[-1].lesson_id)
+    return {"items": lessons, "next_cursor": next_cursor}
+
+async def searchLessons(
+    db: AsyncSession,
+    text: str,
+    filters: LessonLearnedFilter,
+    limit: int,
+    after: Optional[Tuple[float, UUID]] = None,
+    highlight: bool = True,
+    documents: bool = True,
+) -> dict:
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+    rank = func.ts_rank_cd(LessonLearned.search_vector, query)
+    matching = LessonLearned.search_vector.bool_op("@@")(query)
+    if documents:
+        # Lessons match on their own text or on extracted attachment text (weight D); each side uses its GIN index
+        matches = union_all(
+            select(LessonLearned.lesson_id, rank.label("rank")).filter(matching),
+            select(DocumentText.lesson_id, func.max(func.ts_rank_cd(DocumentText.search_vector, query)))
+            .filter(DocumentText.search_vector.bool_op("@@")(query))
+            .group_by(DocumentText.lesson_id),
+        ).subquery()
+        rank = func.sum(matches.c.rank)
+        hits = filterLessons(
+            select(LessonLearned.lesson_id, rank.label("rank")).join(matches, matches.c.lesson_id == LessonLearned.lesson_id),
+            filters,
+        ).group_by(LessonLearned.lesson_id)
+    else:
+        hits = filterLessons(select(LessonLearned.lesson_id, rank.label("rank")), filters).filter(matching)
+    if after:
+        # ts_rank_cd returns real; compare at the same precision or the boundary row repeats
+        keyset = tuple_(rank, LessonLearned.lesson_id) < tuple_(cast(after[0], REAL), after[1])
+        hits = hits.having(keyset) if documents else hits.filter(keyset)
+    # Rank and cut the page in a subquery so snippets are only built for rows we return
+    hits = hits.order_by(rank.desc(), LessonLearned.lesson_id.desc()).limit(limit + 1).subquery()
+
+    columns = [LessonLearned, hits.c.rank]
+    if highlight:
+        document = func.concat_ws(
+            " ",
+            LessonLearned.description,
+            LessonLearned.root_cause,
+            LessonLearned.outcomes,
+            LessonLearned.suggested_actions,
+        )
+        columns.append(func.ts_headline(SEARCH_CONFIG, document, query, HEADLINE_OPTIONS))
+    rows = (
+        await db.execute(
+            select(*columns)
+            .join(hits, hits.c.lesson_id == LessonLearned.lesson_id)
+            .order_by(hits.c.rank.desc(), LessonLearned.lesson_id.desc())
+        )
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0].lesson_id)
+    items = [
+        {"lesson": row[0], "rank": row[1], "snippet": row[2] if highlight else None}
+        for row in rows
+    ]
+    return {"items": items, "next_cursor": next_cursor}
+
+async def getLessonFacets(db: AsyncSession, filters: LessonLearnedFilter, tag_limit: int) -> dict:
+    """Lesson counts per category, impact, status and tag over the filtered lessons."""
+    columns = [getattr(LessonLearned, field) for field in FACET_FIELDS]
+    # One pass for the scalar facets; GROUPING() tells a grouped NULL from a rolled-up column
+    rows = await db.execute(
+        filterLessons(select(*columns, *[func.grouping(column) for column in columns], func.count()), filters)
+        .group_by(func.grouping_sets(*[tuple_(column) for column in columns]))
+    )
+    facets = {field: [] for field in ("tags",) + FACET_FIELDS}
+    for row in rows:
+        values, rolled_up, count = row[:len(columns)], row[len(columns):-1], row[-1]
+        field = next(i for i, flag in enumerate(rolled_up) if not flag)
+        value = values[field]
+        facets[FACET_FIELDS[field]].append({"value": value.value if value else None, "count": count})
+    for field in FACET_FIELDS:
+        facets[field].sort(key=lambda facet: facet["count"], reverse=True)
+
+    tags = filterLessons(select(func.unnest(LessonLearned.tags).label("tag")), filters).subquery()
+    count = func.count().label("count")
+    rows = await db.execute(select(tags.c.tag, count).group_by(tags.c.tag).order_by(count.desc(), tags.c.tag).limit(tag_limit))
+    facets["tags"] = [{"value": tag, "count": count} for tag, count in rows]
+    return facets
+
+async def getSimilarLessons(db: AsyncSession, lesson_id: UUID, k: int) -> List[dict]:
+    neighbours = await run_in_threadpool(similarityIndex.similar, lesson_id, k) or []
+    if not neighbours:
+        return []
+    lessons = (
+        await db.scalars(select(LessonLearned).where(LessonLearned.lesson_id.in_([i for i, _ in neighbours])))
+    ).all()
+    by_id = {lesson.lesson_id: lesson for lesson in lessons}
+    return [
+        {"lesson": by_id[neighbour], "score": score}
+        for neighbour, score in neighbours
+        if neighbour in by_id
+    ]
+
+async def findDuplicateLessons(db: AsyncSession, check: LessonDuplicateCheck, limit: int) -> List[dict]:
+    hits = await run_in_threadpool(
+        duplicateIndex.query, duplicateText(check.description, check.root_cause), exclude=check.exclude_lesson_id
+    )
+    if not hits:
+        return []
+    similarity = dict(hits)
+    query = select(LessonLearned.lesson_id, LessonLearned.project_name, LessonLearned.description).where(
+        LessonLearned.lesson_id.in_(list(similarity))
+    )
+    if check.project_name:
+        query = query.filter(LessonLearned.project_name == check.project_name)
+    candidates = [
+        {"lesson_id": lesson_id, "project_name": project_name, "description": description, "similarity": similarity[lesson_id]}
+        for lesson_id, project_name, description in (await db.execute(query)).all()
+    ]
+    candidates.sort(key=lambda candidate: candidate["similarity"], reverse=True)
+    return candidates[:limit]
@@ -0,0 +1,163 @@
+import os
+import zlib
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from scipy import sparse
+
+from app.lessonLearned.lessonLearnedAnalysisEngine import tokenize
+from app.lessonLearned.lessonLearnedIndexStore import PersistentIndex
+from app.lessonLearned.lessonLearnedModel import LessonLearned
+
+SIMILARITY_INDEX_PATH = os.getenv("SIMILARITY_INDEX_PATH", "data/similarity_index.npz")
+N_FEATURES = 2 ** 18
+TEXT_FIELDS = ("description", "root_cause", "outcomes", "suggested_actions")
+# Tombstoned rows are dropped once they make up this share of the matrix
+COMPACT_RATIO = 0.25
+
+
+def lessonText(lesson: LessonLearned) -> str:
+    return " ".join(getattr(lesson, field) or "" for field in TEXT_FIELDS)
+
+
+def hashFeatures(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Sparse hashed term frequencies (sublinear) for one document.
+
+    crc32 is used instead of hash() so feature ids are stable across processes and restarts.
+    """
+    tokens = tokenize(text) if text else []
+    if not tokens:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    hashed = np.fromiter((zlib.crc32(t.encode()) for t in tokens), dtype=np.uint32, count=len(tokens))
+    features, counts = np.unique((hashed % N_FEATURES).astype(np.int32), return_counts=True)
+    return features, (1.0 + np.log(counts)).astype(np.float32)
+
+
+class SimilarityIndex(PersistentIndex):
+    """In-process TF-IDF matrix over lesson text with cosine top-k lookups.
+
+    Rows are appended as lessons are written; an updated lesson tombstones its
+    old row. IDF weights and row norms are recomputed lazily on the first
+    query after a write, which is a single vectorised pass over the matrix.
+    """
+
+    TEXT_FIELDS = TEXT_FIELDS
+
+    def __init__(self, n_features: int = N_FEATURES, path: str = SIMILARITY_INDEX_PATH):
+        super().__init__(path)
+        self.n_features = n_features
+        self._ids: List[Optional[UUID]] = []
+        self._rows: Dict[UUID, int] = {}
+        self._tf = sparse.csr_matrix((0, n_features), dtype=np.float32)
+        self._pending_features: List[np.ndarray] = []
+        self._pending_weights: List[np.ndarray] = []
+        self._df = np.zeros(n_features, dtype=np.int32)
+        self._weighted: Optional[sparse.csr_matrix] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def upsert(self, lesson_id: UUID, text: str):
+        features, weights = hashFeatures(text)
+        with self._lock:
+            if lesson_id in self._rows:
+                self._remove(lesson_id)
+            self._rows[lesson_id] = len(self._ids)
+            self._ids.append(lesson_id)
+            self._pending_features.append(features)
+            self._pending_weights.append(weights)
+            self._df[features] += 1
+            self._weighted = None
+
+    def similar(self, lesson_id: UUID, k: int = 10) -> Optional[List[Tuple[UUID, float]]]:
+        """Top-k (lesson_id, cosine) neighbours, or None if the lesson is not indexed."""
+        with self._lock:
+            row = self._rows.get(lesson_id)
+            if row is None:
+                return None
+            matrix = self._weightedMatrix()
+            ids = self._ids
+        scores = (matrix @ matrix[row].T).toarray().ravel()
+        scores[row] = 0.0
+        k = min(k, scores.size - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top if scores[i] > 0 and ids[i] is not None]
+
+    def _materialize(self):
+        if not self._pending_features:
+            return
+        lengths = [len(f) for f in self._pending_features]
+        indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        appended = sparse.csr_matrix(
+            (np.concatenate(self._pending_weights), np.concatenate(self._pending_features), indptr),
+            shape=(len(lengths), self.n_features),
+            dtype=np.float32,
+        )
+        self._tf = sparse.vstack([self._tf, appended], format="csr")
+        self._pending_features, self._pending_weights = [], []
+
+    def _remove(self, lesson_id: UUID):
+        self._materialize()
+        row = self._rows.pop(lesson_id)
+        start, end = self._tf.indptr[row], self._tf.indptr[row + 1]
+        self._df[self._tf.indices[start:end]] -= 1
+        self._tf.data[start:end] = 0.0
+        self._ids[row] = None
+        if len(self._ids) - len(self._rows) > COMPACT_RATIO * len(self._ids):
+            self._compact()
+
+    def _compact(self):
+        keep = np.array([i for i, lesson_id in enumerate(self._ids) if lesson_id is not None], dtype=np.int64)
+        self._tf = self._tf[keep]
+        self._tf.eliminate_zeros()
+        self._ids = [self._ids[i] for i in keep]
+        self._rows = {lesson_id: row for row, lesson_id in enumerate(self._ids)}
+
+    def _weightedMatrix(self) -> sparse.csr_matrix:
+        if self._weighted is None:
+            self._materialize()
+            n_docs = max(len(self._rows), 1)
+            idf = (np.log((1.0 + n_docs) / (1.0 + self._df)) + 1.0).astype(np.float32)
+            weighted = self._tf @ sparse.diags(idf)
+            norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+            norms[norms == 0] = 1.0
+            self._weighted = sparse.csr_matrix(sparse.diags(1.0 / norms) @ weighted, dtype=np.float32)
+        return self._weighted
+
+    def _snapshot(self) -> Dict[str, np.ndarray]:
+        self._materialize()
+        if self._ids and len(self._ids) != len(self._rows):
+            self._compact()
+        # Copies: tombstoning zeroes rows of the live matrix in place
+        return {
+            "data": self._tf.data.copy(),
+            "indices": self._tf.indices.copy(),
+            "indptr": self._tf.indptr.copy(),
+            "ids": np.array([lesson_id.hex for lesson_id in self._ids], dtype="U32"),
+            "df": self._df.copy(),
+            "n_features": np.array(self.n_features),
+        }
+
+    def _restore(self, arrays: Dict[str, np.ndarray]):
+        self.n_features = int(arrays["n_features"])
+        self._ids = [UUID(hex=str(h)) for h in arrays["ids"]]
+        self._tf = sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=(len(self._ids), self.n_features))
+        self._df = arrays["df"].copy()
+        self._rows = {lesson_id: row for row, lesson_id in enumerate(self._ids)}
+        self._pending_features, self._pending_weights = [], []
+        self._weighted = None
+
+
+similarityIndex = SimilarityIndex()
+
+
+def startSimilarityIndex():
+    similarityIndex.start()
+
+
+def stopSimilarityIndex():
+    similarityIndex.stop()
@@ -0,0 +1,166 @@
+"""Dashboard statistics served from materialized views.
+
+lesson_monthly_stats and lesson_project_stats (see migration 0004) are
+refreshed CONCURRENTLY, so readers are never blocked. The refresher runs every
+STATS_REFRESH_INTERVAL seconds when lessons changed, or as soon as
+STATS_REFRESH_AFTER_WRITES lesson writes have piled up. Refresh by hand with:
+
+    python -m app.lessonLearned.lessonLearnedStats
+"""
+import asyncio
+import logging
+import os
+import threading
+from typing import Optional
+
+from sqlalchemy import JSON, Column, Date, DateTime, Enum, Integer, MetaData, String, Table, func, select, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal
+from app.lessonLearned.lessonLearnedModel import Categories, Impacts, Status, StatsRefresh
+from app.responseCache import responseCache
+
+STATS_REFRESH_INTERVAL = float(os.getenv("STATS_REFRESH_INTERVAL", 300))
+STATS_REFRESH_AFTER_WRITES = int(os.getenv("STATS_REFRESH_AFTER_WRITES", 100))
+STATS_CACHE_NAMESPACE = "lesson-stats"
+
+logger = logging.getLogger(__name__)
+
+# The views are created by migration 0004; they stay off Base.metadata so autogenerate leaves them alone
+views = MetaData()
+lessonMonthlyStats = Table(
+    "lesson_monthly_stats", views,
+    Column("month", Date),
+    Column("category_main", Enum(Categories)),
+    Column("impact", Enum(Impacts)),
+    Column("status", Enum(Status)),
+    Column("lesson_count", Integer),
+)
+lessonProjectStats = Table(
+    "lesson_project_stats", views,
+    Column("project_name", String),
+    Column("lesson_count", Integer),
+    Column("pending_count", Integer),
+    Column("approved_count", Integer),
+    Column("rejected_count", Integer),
+    Column("last_created_at", DateTime),
+)
+STATS_VIEWS = (lessonMonthlyStats, lessonProjectStats)
+
+
+def _jsonRows(view: Table, *order_by):
+    return select(func.json_agg(aggregate_order_by(view.table_valued(), *order_by), type_=JSON)).scalar_subquery()
+
+
+# Everything a dashboard needs in one round trip
+STATS_QUERY = select(
+    _jsonRows(lessonMonthlyStats, *lessonMonthlyStats.c["month", "category_main", "impact", "status"]).label("months"),
+    _jsonRows(lessonProjectStats, lessonProjectStats.c.lesson_count.desc(), lessonProjectStats.c.project_name).label("projects"),
+    select(func.min(StatsRefresh.refreshed_at)).where(
+        StatsRefresh.view_name.in_([view.name for view in STATS_VIEWS])
+    ).scalar_subquery().label("refreshed_at"),
+)
+
+
+async def getLessonStats(db: AsyncSession) -> dict:
+    months, projects, refreshed_at = (await db.execute(STATS_QUERY)).one()
+    # json_agg bypasses the Enum columns, so the rows carry the stored member names
+    for row in months or []:
+        row["category_main"] = Categories[row["category_main"]]
+        row["impact"] = Impacts[row["impact"]]
+        row["status"] = Status[row["status"]]
+    return {"refreshed_at": refreshed_at, "months": months or [], "projects": projects or []}
+
+
+async def refreshStats(db: AsyncSession) -> bool:
+    """Refresh every stats view in one transaction. False when another worker is already refreshing them."""
+    if not await db.scalar(select(func.pg_try_advisory_xact_lock(func.hashtext("refresh_lesson_stats")))):
+        await db.rollback()
+        return False
+    for view in STATS_VIEWS:
+        await db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view.name}"))
+    refreshed = insert(StatsRefresh).values(
+        [{"view_name": view.name, "refreshed_at": func.timezone("utc", func.now())} for view in STATS_VIEWS]
+    )
+    await db.execute(refreshed.on_conflict_do_update(
+        index_elements=[StatsRefresh.view_name], set_={"refreshed_at": refreshed.excluded.refreshed_at}
+    ))
+    await db.commit()
+    responseCache.invalidate(f"{STATS_CACHE_NAMESPACE}:")
+    return True
+
+
+class StatsRefresher:
+    """Refreshes the stats views on a timer, or early once enough lesson writes have accumulated."""
+
+    def __init__(self, interval: float = STATS_REFRESH_INTERVAL, after_writes: int = STATS_REFRESH_AFTER_WRITES):
+        self.interval = interval
+        self.after_writes = after_writes
+        self.pending_writes = 0
+        # Writes are counted from worker threads as well as the loop
+        self._pending_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def noteWrites(self, count: int = 1):
+        """Count lesson writes. Safe to call from worker threads."""
+        with self._pending_lock:
+            self.pending_writes += count
+            due = self.pending_writes >= self.after_writes
+        if due and self._task is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            with self._pending_lock:
+                writes, self.pending_writes = self.pending_writes, 0
+            if not writes:
+                continue
+            try:
+                async with SessionLocal() as db:
+                    refreshed = await refreshStats(db)
+            except Exception:
+                logger.exception("Could not refresh the lesson statistics views")
+                refreshed = False
+            if not refreshed:
+                self.noteWrites(writes)
+
+
+statsRefresher = StatsRefresher()
+
+
+async def startStatsRefresher():
+    statsRefresher.start()
+
+
+async def stopStatsRefresher():
+    await statsRefresher.stop()
+
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    async def refreshOnce():
+        async with SessionLocal() as db:
+            refreshed = await refreshStats(db)
+        await engine.dispose()
+        print("refreshed" if refreshed else "another refresh is already running")
+
+    asyncio.run(refreshOnce())
@@ -0,0 +1,116 @@
+from collections import Counter
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import exists
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.lessonLearned.lessonLearnedAnalysisEngine import AnalysisEngine, MonthlyCounts, monthOf
+from app.lessonLearned.lessonLearnedModel import LessonLearned, LessonTermCount, TermMonthlyStat
+
+INSERT_BATCH_SIZE = 1000
+
+
+def _upsertMonthly(db: Session, rows: List[dict]):
+    """Add signed term_count/lesson_count deltas into the monthly rollup."""
+    # Sorted so concurrent writers lock the rollup rows in the same order
+    rows.sort(key=lambda row: (row["month"], row["term"]))
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        stmt = insert(TermMonthlyStat).values(rows[start:start + INSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TermMonthlyStat.month, TermMonthlyStat.term],
+            set_={
+                "term_count": TermMonthlyStat.term_count + stmt.excluded.term_count,
+                "lesson_count": TermMonthlyStat.lesson_count + stmt.excluded.lesson_count,
+            },
+        )
+        db.execute(stmt)
+
+
+def _applyMonthlyDeltas(db: Session, month: date, counts: Counter, sign: int):
+    if not counts:
+        return
+    _upsertMonthly(db, [
+        {"month": month, "term": term, "term_count": sign * count, "lesson_count": sign}
+        for term, count in counts.items()
+    ])
+    if sign < 0:
+        db.query(TermMonthlyStat).filter(
+            TermMonthlyStat.month == month,
+            TermMonthlyStat.term.in_(list(counts)),
+            TermMonthlyStat.lesson_count <= 0,
+        ).delete(synchronize_session=False)
+
+
+def _monthlyRows(term_totals: MonthlyCounts, lesson_totals: MonthlyCounts) -> List[dict]:
+    return [
+        {"month": month, "term": term, "term_count": count, "lesson_count": lesson_totals[month][term]}
+        for month, counts in term_totals.items()
+        for term, count in counts.items()
+    ]
+
+
+def _insertLessonTerms(db: Session):
+    def insertRows(rows: List[dict]):
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            db.execute(insert(LessonTermCount), rows[start:start + INSERT_BATCH_SIZE])
+    return insertRows
+
+
+def recordLessonTerms(db: Session, lesson: LessonLearned, counts: Counter):
+    """Add a flushed lesson's term counts (see termCounts) to the per-lesson counts and monthly rollups."""
+    if not counts or not lesson.created_at:
+        return
+    db.execute(
+        insert(LessonTermCount),
+        [{"lesson_id": lesson.lesson_id, "term": term, "count": count} for term, count in counts.items()],
+    )
+    _applyMonthlyDeltas(db, monthOf(lesson.created_at), counts, 1)
+
+
+def removeLessonTerms(db: Session, lesson: LessonLearned):
+    """Take a lesson's previously recorded terms back out of the rollups."""
+    rows = db.query(LessonTermCount.term, LessonTermCount.count).filter(
+        LessonTermCount.lesson_id == lesson.lesson_id
+    ).all()
+    if not rows or not lesson.created_at:
+        return
+    db.query(LessonTermCount).filter(LessonTermCount.lesson_id == lesson.lesson_id).delete(synchronize_session=False)
+    _applyMonthlyDeltas(db, monthOf(lesson.created_at), Counter(dict(rows)), -1)
+
+
+def rebuildTermStats(db: Session, workers: Optional[int] = None):
+    """Recompute every aggregate from scratch, e.g. to backfill lessons written before the tables existed."""
+    db.query(TermMonthlyStat).delete(synchronize_session=False)
+    db.query(LessonTermCount).delete(synchronize_session=False)
+    term_totals, lesson_totals = AnalysisEngine(workers).analyzeLessons(db, _insertLessonTerms(db))
+    _upsertMonthly(db, _monthlyRows(term_totals, lesson_totals))
+    db.commit()
+
+
+def catchUpTermStats(db: Session, since: datetime, workers: Optional[int] = None):
+    """Record terms for lessons created since `since` that have none yet, e.g. after a bulk import."""
+    recorded = exists().where(LessonTermCount.lesson_id == LessonLearned.lesson_id)
+    term_totals, lesson_totals = AnalysisEngine(workers).analyzeLessons(
+        db, _insertLessonTerms(db), LessonLearned.created_at >= since, ~recorded
+    )
+    _upsertMonthly(db, _monthlyRows(term_totals, lesson_totals))
+    db.commit()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import app.models  # noqa: F401
+    from app.database import SyncSessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild the lesson term statistics from lessons_learned.")
+    parser.add_argument("--workers", type=int, default=None, help="tokenizer processes (default: ANALYSIS_WORKERS)")
+    args = parser.parse_args()
+
+    db = SyncSessionLocal()
+    try:
+        rebuildTermStats(db, args.workers)
+    finally:
+        db.close()
@@ -1,31 +1,63 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from uuid import UUID
+from datetime import datetime
 
 from app.message.messageModel import Message  # if needed
-from app.message.messageSchema import MessageCreate, MessageResponse
-from app.message.messageService import create_message, get_messages_for_user, mark_message_as_read
+from app.message.messageSchema import MessageCreate, MessagePage, MessageReadRequest, MessageResponse, MessagesRead, UnreadCount
+from app.message.messageService import (
+    create_message,
+    count_unread_messages,
+    get_inbox_page,
+    mark_message_as_read,
+    mark_messages_read,
+)
+from app.auditLog.auditlogSchemas import WriterMetrics
 from app.database import SessionLocal
+from app.message.messageWriter import messageWriter
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor
 
 router = APIRouter(prefix="/messages", tags=["Messages"])
 
+MAX_READ_BATCH = 1000
+
 # Include get_db() locally
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 @router.post("/", response_model=MessageResponse)
-def send_message(message: MessageCreate, db: Session = Depends(get_db)):
-    return create_message(db, message)
+async def send_message(message: MessageCreate, db: AsyncSession = Depends(get_db)):
+    return await create_message(db, message)
+
+@router.get("/inbox/{user_id}", response_model=MessagePage)
+async def inbox(
+    user_id: UUID,
+    unread: bool = False,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    after = decode_cursor(cursor, datetime.fromisoformat, UUID) if cursor else None
+    return await get_inbox_page(db, user_id, limit, unread, after)
+
+@router.get("/unread-count/{user_id}", response_model=UnreadCount)
+async def unread_count(user_id: UUID, db: AsyncSession = Depends(get_db)):
+    return {"user_id": user_id, "unread": await count_unread_messages(db, user_id)}
+
+@router.get("/writer", response_model=WriterMetrics)
+async def writer_metrics():
+    return messageWriter.metrics()
 
-@router.get("/inbox/{user_id}", response_model=List[MessageResponse])
-def inbox(user_id: UUID, db: Session = Depends(get_db)):
-    return get_messages_for_user(db, user_id)
+@router.patch("/read", response_model=MessagesRead)
+async def read_messages(read: MessageReadRequest, db: AsyncSession = Depends(get_db)):
+    if (read.message_ids is None) == (read.sender_id is None):
+        raise HTTPException(status_code=422, detail="Send either message_ids or sender_id")
+    if read.message_ids is not None and not 1 <= len(read.message_ids) <= MAX_READ_BATCH:
+        raise HTTPException(status_code=422, detail=f"Send between 1 and {MAX_READ_BATCH} message ids")
+    return await mark_messages_read(db, read)
 
 @router.patch("/read/{message_id}", response_model=MessageResponse)
-def read_message(message_id: UUID, db: Session = Depends(get_db)):
-    return mark_message_as_read(db, message_id)
+async def read_message(message_id: UUID, db: AsyncSession = Depends(get_db)):
+    return await mark_message_as_read(db, message_id)
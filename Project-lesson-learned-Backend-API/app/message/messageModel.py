@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Text, DateTime, Boolean
+from sqlalchemy import Column, ForeignKey, Text, DateTime, Boolean, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from uuid import uuid4
@@ -7,6 +7,12 @@ from app.database import Base
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # The inbox is read newest first in (timestamp, message_id) keyset order
+        Index("ix_messages_receiver_id_timestamp", "receiver_id", "timestamp", "message_id"),
+        # Unread messages are a small slice of a long history; counting them only touches this index
+        Index("ix_messages_unread", "receiver_id", "timestamp", "message_id", postgresql_where=text("NOT is_read")),
+    )
 
     message_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     sender_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False)
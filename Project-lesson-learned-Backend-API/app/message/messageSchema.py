@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from uuid import UUID
 from datetime import datetime
+from typing import List, Optional
 
 class MessageBase(BaseModel):
     content: str
@@ -18,4 +19,24 @@ class MessageResponse(BaseModel):
     is_read: bool
 
     class Config:
-        from_atributtes = True
+        from_attributes = True
+
+class MessagePage(BaseModel):
+    items: List[MessageResponse]
+    next_cursor: Optional[str] = None
+
+class UnreadCount(BaseModel):
+    user_id: UUID
+    unread: int
+
+class MessageReadRequest(BaseModel):
+    """Mark a reader's messages as read, either by id or everything from one sender up to a point in time."""
+    receiver_id: UUID
+    message_ids: Optional[List[UUID]] = None
+    sender_id: Optional[UUID] = None
+    up_to: Optional[datetime] = None
+
+class MessagesRead(BaseModel):
+    updated: int
+    message_ids: List[UUID]
+    unread: int
@@ -1,21 +1,101 @@
-from sqlalchemy.orm import Session
+import logging
+from collections import defaultdict
+from sqlalchemy import Select, select, update, func, tuple_, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
+from datetime import datetime
+from typing import Optional, Tuple
 from app.message.messageModel import Message
-from app.message.messageSchema import MessageCreate
+from app.message.messageSchema import MessageCreate, MessageReadRequest
+from app.pagination import encode_cursor
+from app.socketCommunication import manager
 
-def create_message(db: Session, message: MessageCreate) -> Message:
+logger = logging.getLogger(__name__)
+
+async def create_message(db: AsyncSession, message: MessageCreate) -> Message:
     new_msg = Message(**message.dict())
     db.add(new_msg)
-    db.commit()
-    db.refresh(new_msg)
+    await db.commit()
+    await db.refresh(new_msg)
     return new_msg
 
-def get_messages_for_user(db: Session, user_id: UUID):
-    return db.query(Message).filter(Message.receiver_id == user_id).all()
+def inbox_query(user_id: UUID, limit: int, unread: bool = False, after: Optional[Tuple[datetime, UUID]] = None) -> Select:
+    """Newest first; each page is a range scan of ix_messages_receiver_id_timestamp (or ix_messages_unread)."""
+    query = select(Message).where(Message.receiver_id == user_id)
+    if unread:
+        query = query.where(~Message.is_read)
+    if after:
+        query = query.where(tuple_(Message.timestamp, Message.message_id) < tuple_(*after))
+    return query.order_by(Message.timestamp.desc(), Message.message_id.desc()).limit(limit + 1)
+
+def unread_count_query(user_id: UUID) -> Select:
+    # The predicate matches ix_messages_unread, so this is an index-only scan over unread rows
+    return select(func.count()).select_from(Message).where(Message.receiver_id == user_id, ~Message.is_read)
+
+async def get_inbox_page(
+    db: AsyncSession,
+    user_id: UUID,
+    limit: int,
+    unread: bool = False,
+    after: Optional[Tuple[datetime, UUID]] = None,
+) -> dict:
+    messages = (await db.scalars(inbox_query(user_id, limit, unread, after))).all()
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = encode_cursor(messages[-1].timestamp, messages[-1].message_id)
+    return {"items": messages, "next_cursor": next_cursor}
+
+async def count_unread_messages(db: AsyncSession, user_id: UUID) -> int:
+    return await db.scalar(unread_count_query(user_id))
 
-def mark_message_as_read(db: Session, message_id: UUID):
-    msg = db.query(Message).filter(Message.message_id == message_id).first()
+async def mark_message_as_read(db: AsyncSession, message_id: UUID):
+    msg = await db.scalar(select(Message).where(Message.message_id == message_id))
     if msg:
         msg.is_read = True
-        db.commit()
-    return msg
\ No newline at end of file
+        await db.commit()
+    return msg
+
+async def send_read_receipts(reader_id: UUID, rows, unread: int):
+    by_sender = defaultdict(list)
+    for message_id, sender_id in rows:
+        by_sender[sender_id].append(message_id)
+    read_at = datetime.utcnow()
+    for sender_id, message_ids in by_sender.items():
+        await manager.send_event(str(sender_id), {
+            "type": "read_receipt", "reader_id": reader_id, "message_ids": message_ids, "read_at": read_at,
+        })
+    # The reader's other open tabs update their badge without polling
+    await manager.send_event(str(reader_id), {
+        "type": "messages_read", "message_ids": [row[0] for row in rows], "unread": unread, "read_at": read_at,
+    })
+
+async def mark_messages_read(db: AsyncSession, read: MessageReadRequest) -> dict:
+    """Mark many messages read in one UPDATE and send one read receipt per sender, plus one to the reader."""
+    query = update(Message).where(Message.receiver_id == read.receiver_id, ~Message.is_read)
+    if read.message_ids is not None:
+        # One array parameter, so the statement text is the same for every batch size
+        ids = bindparam("message_ids", list(dict.fromkeys(read.message_ids)), type_=ARRAY(PG_UUID(as_uuid=True)))
+        query = query.where(Message.message_id == any_(ids))
+    else:
+        query = query.where(Message.sender_id == read.sender_id)
+        if read.up_to:
+            query = query.where(Message.timestamp <= read.up_to)
+    rows = (
+        await db.execute(
+            query.values(is_read=True)
+            .returning(Message.message_id, Message.sender_id)
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    await db.commit()
+    unread = await count_unread_messages(db, read.receiver_id)
+
+    if rows:
+        try:
+            await send_read_receipts(read.receiver_id, rows, unread)
+        except Exception:
+            # The broker may be unavailable; the messages are already marked read
+            logger.warning("Could not send read receipts for %s", read.receiver_id, exc_info=True)
+    return {"updated": len(rows), "message_ids": [row[0] for row in rows], "unread": unread}
@@ -0,0 +1,13 @@
+from app.message.messageModel import Message
+from app.writeBehind import WriteBehindWriter
+
+# Websocket chat messages are inserted in group commits, so no socket holds a pooled connection
+messageWriter = WriteBehindWriter(Message.__table__)
+
+
+async def startMessageWriter():
+    messageWriter.start()
+
+
+async def stopMessageWriter():
+    await messageWriter.stop()
@@ -0,0 +1,68 @@
+import asyncio
+import re
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import NullPool
+
+import app.models  # noqa: F401  registers every table on Base.metadata
+from app.database import Base, engine
+
+config = context.config
+config.set_main_option("sqlalchemy.url", engine.url.render_as_string(hide_password=False).replace("%", "%%"))
+target_metadata = Base.metadata
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+# Monthly audit_logs partitions (attached or detached for archiving) are managed at runtime, not by autogenerate
+PARTITION_NAME = re.compile(r"audit_logs_\d{4}_\d{2}")
+
+
+def include_name(name, type_, parent_names) -> bool:
+    return not (type_ == "table" and PARTITION_NAME.fullmatch(name))
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL to stdout instead of running it against a database."""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    connectable = AsyncEngine(
+        engine_from_config(
+            config.get_section(config.config_ini_section),  # type: ignore
+            prefix="sqlalchemy.",
+            poolclass=NullPool,
+            future=True,
+        )
+    )
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,45 @@
+"""hot query indexes
+
+Built with CREATE INDEX CONCURRENTLY so the tables stay writable while a large
+register is indexed. CONCURRENTLY cannot run inside a transaction, so each
+statement runs in its own autocommit block; IF NOT EXISTS makes a re-run after
+an interrupted build safe (drop any INVALID leftovers first).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, extra create_index kwargs)
+INDEXES = [
+    # Filtered lesson lists keep the keyset order, so the filter column leads the (created_at, lesson_id) key
+    ('ix_lessons_learned_status_created_at', 'lessons_learned', ['status', 'created_at', 'lesson_id'], {}),
+    ('ix_lessons_learned_submitted_by_created_at', 'lessons_learned', ['submitted_by', 'created_at', 'lesson_id'], {}),
+    ('ix_lessons_learned_category_sub', 'lessons_learned', ['category_sub'], {}),
+    ('ix_lessons_learned_tags', 'lessons_learned', ['tags'], {'postgresql_using': 'gin'}),
+    ('ix_documents_lesson_id', 'documents', ['lesson_id'], {}),
+    ('ix_audit_logs_lesson_id_timestamp', 'audit_logs', ['lesson_id', 'timestamp'], {}),
+    ('ix_audit_logs_timestamp', 'audit_logs', ['timestamp'], {}),
+    ('ix_messages_receiver_id_is_read', 'messages', ['receiver_id', 'is_read'], {}),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns, kwargs in INDEXES:
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,109 @@
+"""partition audit_logs by month
+
+audit_logs becomes a table partitioned by RANGE (timestamp) with one
+partition per month. The existing rows are copied into the new table; rows
+without a timestamp get the migration time, since timestamp is now part of
+the primary key.
+
+ensure_audit_log_partitions(since, months_ahead) creates any missing monthly
+partitions from `since` through `months_ahead` months past the current one.
+The app calls it at startup. Partitions that were detached for archiving keep
+their name, so they are never re-created.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+AUDIT_ACTION = postgresql.ENUM('created', 'updated', 'approved', 'rejected', name='auditactionenum', create_type=False)
+
+ENSURE_PARTITIONS = """
+CREATE OR REPLACE FUNCTION ensure_audit_log_partitions(since timestamp, months_ahead integer)
+RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    month_start timestamp := date_trunc('month', since);
+    last_month timestamp := date_trunc('month', now() AT TIME ZONE 'utc') + make_interval(months => months_ahead);
+    partition_name text;
+    created integer := 0;
+BEGIN
+    -- Every worker calls this at startup; serialize them instead of racing on CREATE TABLE
+    PERFORM pg_advisory_xact_lock(hashtext('ensure_audit_log_partitions'));
+    WHILE month_start <= last_month LOOP
+        partition_name := 'audit_logs_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_start + interval '1 month'
+            );
+            created := created + 1;
+        END IF;
+        month_start := month_start + interval '1 month';
+    END LOOP;
+    RETURN created;
+END
+$$
+"""
+
+
+def create_audit_logs(name, partitioned):
+    op.create_table(name,
+    sa.Column('log_id', sa.UUID(), nullable=False),
+    sa.Column('lesson_id', sa.UUID(), nullable=False),
+    sa.Column('action', AUDIT_ACTION, nullable=False),
+    sa.Column('performed_by', sa.UUID(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=not partitioned),
+    sa.ForeignKeyConstraint(['lesson_id'], ['lessons_learned.lesson_id'], ),
+    sa.ForeignKeyConstraint(['performed_by'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('log_id', 'timestamp') if partitioned else sa.PrimaryKeyConstraint('log_id'),
+    **({'postgresql_partition_by': 'RANGE (timestamp)'} if partitioned else {})
+    )
+
+
+def upgrade() -> None:
+    op.rename_table('audit_logs', 'audit_logs_unpartitioned')
+    op.execute('ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey')
+    op.drop_index('ix_audit_logs_lesson_id_timestamp', table_name='audit_logs_unpartitioned')
+    op.drop_index('ix_audit_logs_timestamp', table_name='audit_logs_unpartitioned')
+
+    create_audit_logs('audit_logs', partitioned=True)
+    op.create_index('ix_audit_logs_lesson_id_timestamp', 'audit_logs', ['lesson_id', 'timestamp'], unique=False)
+    op.create_index('ix_audit_logs_timestamp', 'audit_logs', ['timestamp', 'log_id'], unique=False)
+    op.create_index('ix_audit_logs_performed_by_timestamp', 'audit_logs', ['performed_by', 'timestamp', 'log_id'], unique=False)
+    op.execute(ENSURE_PARTITIONS)
+    op.execute(
+        "SELECT ensure_audit_log_partitions("
+        "coalesce((SELECT min(timestamp) FROM audit_logs_unpartitioned), now() AT TIME ZONE 'utc'), 3)"
+    )
+    op.execute(
+        "INSERT INTO audit_logs (log_id, lesson_id, action, performed_by, timestamp) "
+        "SELECT log_id, lesson_id, action, performed_by, coalesce(timestamp, now() AT TIME ZONE 'utc') "
+        "FROM audit_logs_unpartitioned"
+    )
+    op.drop_table('audit_logs_unpartitioned')
+
+
+def downgrade() -> None:
+    op.rename_table('audit_logs', 'audit_logs_partitioned')
+    op.execute('ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey')
+    op.drop_index('ix_audit_logs_performed_by_timestamp', table_name='audit_logs_partitioned')
+    op.drop_index('ix_audit_logs_timestamp', table_name='audit_logs_partitioned')
+    op.drop_index('ix_audit_logs_lesson_id_timestamp', table_name='audit_logs_partitioned')
+
+    create_audit_logs('audit_logs', partitioned=False)
+    op.create_index('ix_audit_logs_lesson_id_timestamp', 'audit_logs', ['lesson_id', 'timestamp'], unique=False)
+    op.create_index('ix_audit_logs_timestamp', 'audit_logs', ['timestamp'], unique=False)
+    # Detached partitions are standalone tables now and stay behind for the archive
+    op.execute('INSERT INTO audit_logs SELECT log_id, lesson_id, action, performed_by, timestamp FROM audit_logs_partitioned')
+    op.drop_table('audit_logs_partitioned')
+    op.execute('DROP FUNCTION ensure_audit_log_partitions(timestamp, integer)')
@@ -0,0 +1,69 @@
+"""lesson statistics materialized views
+
+lesson_monthly_stats counts lessons per month x category_main x impact x
+status, and lesson_project_stats holds per-project totals. Each view has a
+unique index so it can be refreshed CONCURRENTLY without blocking readers.
+stats_refreshes records when each view was last refreshed.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# Unique indexes treat NULLs as distinct, so the grouping keys are made non-null
+VIEWS = {
+    'lesson_monthly_stats': (
+        """
+        SELECT date_trunc('month', created_at)::date AS month,
+               category_main,
+               impact,
+               coalesce(status, 'pending') AS status,
+               count(*) AS lesson_count
+        FROM lessons_learned
+        WHERE created_at IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        """,
+        ['month', 'category_main', 'impact', 'status'],
+    ),
+    'lesson_project_stats': (
+        """
+        SELECT project_name,
+               count(*) AS lesson_count,
+               count(*) FILTER (WHERE coalesce(status, 'pending') = 'pending') AS pending_count,
+               count(*) FILTER (WHERE status = 'approved') AS approved_count,
+               count(*) FILTER (WHERE status = 'rejected') AS rejected_count,
+               max(created_at) AS last_created_at
+        FROM lessons_learned
+        GROUP BY project_name
+        """,
+        ['project_name'],
+    ),
+}
+
+
+def upgrade() -> None:
+    op.create_table('stats_refreshes',
+    sa.Column('view_name', sa.String(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('view_name')
+    )
+    for name, (query, key) in VIEWS.items():
+        op.execute(f'CREATE MATERIALIZED VIEW {name} AS {query}')
+        op.create_index(f'ux_{name}', name, key, unique=True)
+        op.execute(f"INSERT INTO stats_refreshes (view_name, refreshed_at) VALUES ('{name}', now() AT TIME ZONE 'utc')")
+
+
+def downgrade() -> None:
+    for name in reversed(list(VIEWS)):
+        op.execute(f'DROP MATERIALIZED VIEW {name}')
+    op.drop_table('stats_refreshes')
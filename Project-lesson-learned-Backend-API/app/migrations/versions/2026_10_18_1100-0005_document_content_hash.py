@@ -0,0 +1,37 @@
+"""document content hash
+
+Uploaded documents are stored content-addressed: file_path holds the key of a
+blob named after its sha256 digest, and content_hash/size_bytes/content_type
+describe it. Rows created before uploads existed keep NULLs. The hash index is
+built CONCURRENTLY, like the indexes of 0002.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('documents', sa.Column('size_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('documents', sa.Column('content_type', sa.String(), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_documents_content_hash', 'documents', ['content_hash'], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_documents_content_hash', table_name='documents', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('documents', 'content_type')
+    op.drop_column('documents', 'size_bytes')
+    op.drop_column('documents', 'content_hash')
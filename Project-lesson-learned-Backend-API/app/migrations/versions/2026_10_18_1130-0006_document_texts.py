@@ -0,0 +1,51 @@
+"""document texts
+
+Text extracted from attached documents, with a stored tsvector (weight D) and
+a GIN index so lesson search can match attachments. The table is also the
+extraction queue; the partial index covers only unfinished rows. Existing
+documents are queued by `python -m app.documents.documentText backfill`.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('document_texts',
+    sa.Column('document_id', sa.UUID(), nullable=False),
+    sa.Column('lesson_id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.Enum('pending', 'processing', 'done', 'failed', 'skipped', name='extractionstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('queued_at', sa.DateTime(), nullable=False),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('extracted_at', sa.DateTime(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("setweight(to_tsvector('english', coalesce(text, '')), 'D')", persisted=True), nullable=True),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['lesson_id'], ['lessons_learned.lesson_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('document_id')
+    )
+    op.create_index('ix_document_texts_lesson_id', 'document_texts', ['lesson_id'], unique=False)
+    op.create_index('ix_document_texts_search_vector', 'document_texts', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_document_texts_queue', 'document_texts', ['queued_at'], unique=False, postgresql_where=sa.text("status IN ('pending', 'processing')"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_document_texts_queue', table_name='document_texts', postgresql_where=sa.text("status IN ('pending', 'processing')"))
+    op.drop_index('ix_document_texts_search_vector', table_name='document_texts', postgresql_using='gin')
+    op.drop_index('ix_document_texts_lesson_id', table_name='document_texts')
+    op.drop_table('document_texts')
+    sa.Enum(name='extractionstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,39 @@
+"""message inbox indexes
+
+The inbox is paged newest first on (receiver_id, timestamp, message_id), and
+the unread badge counts rows of a partial index that only holds unread
+messages, so neither grows with a user's message history. Both replace
+ix_messages_receiver_id_is_read. Built CONCURRENTLY, like 0002.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_messages_receiver_id_timestamp', 'messages', ['receiver_id', 'timestamp', 'message_id'], postgresql_concurrently=True, if_not_exists=True)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_messages_unread', 'messages', ['receiver_id', 'timestamp', 'message_id'], postgresql_where=sa.text('NOT is_read'), postgresql_concurrently=True, if_not_exists=True)
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_messages_receiver_id_is_read', table_name='messages', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_messages_receiver_id_is_read', 'messages', ['receiver_id', 'is_read'], postgresql_concurrently=True, if_not_exists=True)
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_messages_unread', table_name='messages', postgresql_concurrently=True, if_exists=True)
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_messages_receiver_id_timestamp', table_name='messages', postgresql_concurrently=True, if_exists=True)
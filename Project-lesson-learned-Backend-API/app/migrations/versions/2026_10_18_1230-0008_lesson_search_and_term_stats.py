@@ -0,0 +1,66 @@
+"""lesson search and term stats
+
+The full-text search vector and its GIN index, the (created_at, lesson_id)
+keyset index and the term statistics tables. They were first added to the
+models without a migration, so databases stamped at 0001 pick them up here.
+
+Adding the stored search_vector rewrites lessons_learned under an exclusive
+lock; the indexes are built CONCURRENTLY afterwards, like 0002. The term
+tables start empty: fill them with
+`python -m app.lessonLearned.lessonLearnedTermStats`.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(project_name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(root_cause, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(suggested_actions, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(outcomes, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    op.add_column('lessons_learned', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True))
+    op.create_table('term_monthly_stats',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('term', sa.String(), nullable=False),
+    sa.Column('term_count', sa.Integer(), nullable=False),
+    sa.Column('lesson_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('month', 'term')
+    )
+    op.create_table('lesson_term_counts',
+    sa.Column('lesson_id', sa.UUID(), nullable=False),
+    sa.Column('term', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['lesson_id'], ['lessons_learned.lesson_id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('lesson_id', 'term')
+    )
+    with op.get_context().autocommit_block():
+        op.create_index('ix_lessons_learned_created_at_lesson_id', 'lessons_learned', ['created_at', 'lesson_id'], postgresql_concurrently=True, if_not_exists=True)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_lessons_learned_search_vector', 'lessons_learned', ['search_vector'], postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lessons_learned_search_vector', table_name='lessons_learned', postgresql_concurrently=True, if_exists=True)
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lessons_learned_created_at_lesson_id', table_name='lessons_learned', postgresql_concurrently=True, if_exists=True)
+    op.drop_table('lesson_term_counts')
+    op.drop_table('term_monthly_stats')
+    op.drop_column('lessons_learned', 'search_vector')
@@ -0,0 +1,8 @@
+# Importing every model registers its table on Base.metadata and lets the
+# string-based relationships between them resolve outside of main.py
+from app.auditLog.auditlogModel import AuditLog
+from app.documents.documentModel import Document, DocumentText
+from app.lessonLearned.lessonLearnedModel import LessonLearned, LessonTermCount, StatsRefresh, TermMonthlyStat
+from app.message.messageModel import Message
+from app.subCategories.subCategoryModel import SubCategory
+from app.user.userModel import User
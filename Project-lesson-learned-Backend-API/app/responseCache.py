@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2048))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Writes only invalidate the worker that handled them; the TTL bounds how stale other workers get
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 30))
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+
+
+class CacheBackend:
+    """Storage for serialized responses. Implement this to share the cache between workers."""
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: CachedResponse):
+        raise NotImplementedError
+
+    def invalidate(self, prefix: str = ""):
+        raise NotImplementedError
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process LRU bounded by entry count and total body size, with a per-entry TTL."""
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        ttl: float = RESPONSE_CACHE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse):
+        if len(value.body) > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._bytes += len(value.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, prefix: str = ""):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._pop(key)
+
+    def _pop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1].body)
+
+
+def etagMatches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    return "*" in candidates or etag in [c[2:] if c.startswith("W/") else c for c in candidates]
+
+
+def cacheKey(namespace: str, request: Request) -> str:
+    return f"{namespace}:{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+class ResponseCache:
+    """Serves JSON responses from a CacheBackend with strong ETags and If-None-Match handling.
+
+    build() is only called on a miss. It returns the response content and a
+    version string (e.g. updated_at of the rows involved) that the ETag is
+    derived from, or None when the resource does not exist. Aggregates with
+    no row version pass None as the version to hash the body instead.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+
+    async def respond(
+        self, request: Request, key: str, build: Callable[[], Awaitable[Optional[Tuple[Any, Optional[str]]]]]
+    ) -> Optional[Response]:
+        cached = self.backend.get(key)
+        if cached is None:
+            built = await build()
+            if built is None:
+                return None
+            content, version = built
+            body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+            digest = hashlib.sha256(f"{key}|".encode() + (version.encode() if version is not None else body))
+            etag = '"%s"' % digest.hexdigest()[:32]
+            cached = CachedResponse(body, etag)
+            self.backend.set(key, cached)
+
+        headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+        if etagMatches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+
+    def invalidate(self, prefix: str = ""):
+        self.backend.invalidate(prefix)
+
+
+responseCache = ResponseCache(LRUCacheBackend())
@@ -0,0 +1,195 @@
+"""Pub/sub backplane for websocket deliveries.
+
+Every delivery is published to the broker, and every worker subscribes once
+and hands what it receives to its own sockets, so a user connected to any
+worker (or node) gets their messages. WS_BROKER picks the implementation:
+"memory" for a single worker, "postgres" for LISTEN/NOTIFY on the app's
+database.
+"""
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+import asyncpg
+from sqlalchemy import func, select
+
+from app.database import URL_DATABASE, engine
+
+WS_BROKER = os.getenv("WS_BROKER", "memory")
+WS_BROKER_CHANNEL = os.getenv("WS_BROKER_CHANNEL", "ws_deliveries")
+WS_BROKER_RECONNECT_DELAY = float(os.getenv("WS_BROKER_RECONNECT_DELAY", 1))
+WS_BROKER_START_TIMEOUT = 10
+
+# NOTIFY payloads must stay under 8000 bytes; longer deliveries are sent in pieces
+NOTIFY_MAX_BYTES = 7900
+# Escaped size of one piece; the rest of the limit is left for the piece's id, index and count
+NOTIFY_PIECE_BYTES = NOTIFY_MAX_BYTES - 100
+MAX_PARTIAL_DELIVERIES = 1000
+
+# Called with (user_id, text) for every delivery this worker receives
+DeliveryHandler = Callable[[str, str], Awaitable[None]]
+
+logger = logging.getLogger(__name__)
+
+
+class Broker:
+    """Carries deliveries between workers. Implement this to use another backplane (Redis, NATS, ...)."""
+
+    async def start(self, handler: DeliveryHandler):
+        raise NotImplementedError
+
+    async def stop(self):
+        raise NotImplementedError
+
+    async def publish(self, user_id: str, text: str):
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    """Single-worker deployments: a delivery goes straight to this worker's sockets."""
+
+    def __init__(self):
+        self._handler: Optional[DeliveryHandler] = None
+
+    async def start(self, handler: DeliveryHandler):
+        self._handler = handler
+
+    async def stop(self):
+        self._handler = None
+
+    async def publish(self, user_id: str, text: str):
+        if self._handler is not None:
+            await self._handler(user_id, text)
+
+
+def _split_escaped(text: str, max_bytes: int) -> List[str]:
+    """Cut text into the longest pieces whose JSON string encoding fits in max_bytes.
+
+    Escaping takes a character from 1 byte up to 12 (a surrogate pair outside
+    the BMP), so each cut is found by bisecting on the encoded length.
+    """
+    pieces = []
+    start = 0
+    while start < len(text):
+        low, high = start + 1, min(len(text), start + max_bytes)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if len(json.dumps(text[start:middle])) <= max_bytes:
+                low = middle
+            else:
+                high = middle - 1
+        pieces.append(text[start:low])
+        start = low
+    return pieces
+
+
+def encode_notifications(user_id: str, text: str) -> List[str]:
+    """NOTIFY payloads for one delivery: "m<json>" when it fits, otherwise "c<json>" pieces to reassemble."""
+    envelope = json.dumps([user_id, text], ensure_ascii=False)
+    if len(envelope.encode()) <= NOTIFY_MAX_BYTES:
+        return ["m" + envelope]
+    delivery_id = uuid.uuid4().hex
+    pieces = _split_escaped(envelope, NOTIFY_PIECE_BYTES)
+    return ["c" + json.dumps([delivery_id, index, len(pieces), piece]) for index, piece in enumerate(pieces)]
+
+
+class PostgresBroker(Broker):
+    """LISTEN/NOTIFY on the app's database.
+
+    Each worker keeps one dedicated asyncpg connection listening on the
+    channel and reconnects when it drops; deliveries published while it is
+    down are lost, like messages for a user who is offline. Publishing uses
+    the regular pool, and the pieces of a long delivery go out in one
+    transaction so they arrive together.
+    """
+
+    def __init__(self, dsn: str = URL_DATABASE, channel: str = WS_BROKER_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._handler: Optional[DeliveryHandler] = None
+        self._inbox: Optional[asyncio.Queue] = None
+        self._partial: "OrderedDict[str, list]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+        self._listening = asyncio.Event()
+
+    async def start(self, handler: DeliveryHandler):
+        self._handler = handler
+        self._inbox = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._listen()), asyncio.create_task(self._dispatch())]
+        try:
+            await asyncio.wait_for(self._listening.wait(), WS_BROKER_START_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("The websocket broker is not listening yet; it keeps retrying in the background")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._listening.clear()
+
+    async def publish(self, user_id: str, text: str):
+        async with engine.begin() as connection:
+            for payload in encode_notifications(user_id, text):
+                await connection.execute(select(func.pg_notify(self.channel, payload)))
+
+    def _notified(self, connection, pid, channel, payload: str):
+        # asyncpg calls listeners synchronously; deliveries are handed over in arrival order
+        self._inbox.put_nowait(payload)
+
+    async def _listen(self):
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(self.channel, self._notified)
+                self._listening.set()
+                await closed.wait()
+                logger.warning("Lost the websocket broker connection; reconnecting")
+            except asyncio.CancelledError:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+                raise
+            except Exception:
+                logger.exception("Could not listen for websocket deliveries")
+            self._listening.clear()
+            await asyncio.sleep(WS_BROKER_RECONNECT_DELAY)
+
+    async def _dispatch(self):
+        while True:
+            payload = await self._inbox.get()
+            try:
+                delivery = self._decode(payload)
+                if delivery is not None:
+                    await self._handler(*delivery)
+            except Exception:
+                logger.exception("Could not deliver a websocket message")
+
+    def _decode(self, payload: str):
+        if payload.startswith("m"):
+            return json.loads(payload[1:])
+        delivery_id, index, total, piece = json.loads(payload[1:])
+        pieces = self._partial.setdefault(delivery_id, [None] * total)
+        pieces[index] = piece
+        if any(piece is None for piece in pieces):
+            # Pieces of deliveries whose publisher died midway are eventually evicted
+            while len(self._partial) > MAX_PARTIAL_DELIVERIES:
+                self._partial.popitem(last=False)
+            return None
+        del self._partial[delivery_id]
+        return json.loads("".join(pieces))
+
+
+BROKERS = {"memory": InProcessBroker, "postgres": PostgresBroker}
+
+
+def create_broker(name: str = WS_BROKER) -> Broker:
+    if name not in BROKERS:
+        raise ValueError(f"Unknown WS_BROKER {name!r}; expected one of {', '.join(BROKERS)}")
+    return BROKERS[name]()
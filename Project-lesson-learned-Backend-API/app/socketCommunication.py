@@ -1,73 +1,280 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from typing import Dict, List
-from sqlalchemy.orm import Session
-from uuid import UUID
+import asyncio
+import json
+import logging
+import os
+import time
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from typing import Dict, Optional, Set
+from uuid import UUID, uuid4
 from datetime import datetime
 
-from app.message.messageModel import Message
-from app.user.userModel import User
-from app.database import SessionLocal  # Only import SessionLocal, not get_db
+from app.message.messageWriter import messageWriter
+from app.socketBroker import Broker, create_broker
+
+WS_MAX_IN_FLIGHT = int(os.getenv("WS_MAX_IN_FLIGHT", 100))
+# Frames waiting to be sent to one socket; a client this far behind gets newer frames dropped
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", 256))
+# A socket that takes longer than this to accept one frame is a slow consumer and is closed
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", 10))
+# Close code 1013 (try again later) tells an evicted client to reconnect
+WS_EVICTED_CLOSE_CODE = 1013
+# Close code 1001 (going away) on shutdown
+WS_SHUTDOWN_CLOSE_CODE = 1001
+# How long shutdown waits for sockets to finish reading and for their messages to be stored
+WS_SHUTDOWN_TIMEOUT = float(os.getenv("WS_SHUTDOWN_TIMEOUT", 10))
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# --- Local DB Dependency ---
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+class ConnectionMetrics(BaseModel):
+    users: int
+    connections: int
+    queued_frames: int
+    max_queue_depth: int
+    sent_frames: int
+    dropped_frames: int
+    evicted_connections: int
+    max_send_lag_seconds: float
 
 # --- Connection Manager ---
+class Connection:
+    """One socket and its outbound queue, drained by a writer task so a stalled client only delays itself."""
+
+    def __init__(self, manager: "ConnectionManager", websocket: WebSocket, user_id: str):
+        self.manager = manager
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(WS_SEND_QUEUE_SIZE)
+        self.closed = False
+        self._task = asyncio.create_task(self._run())
+
+    def send(self, text: str) -> bool:
+        """Queue a frame without waiting; False when the queue is full and the frame was dropped."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait((time.monotonic(), text))
+        except asyncio.QueueFull:
+            self.manager.dropped_frames += 1
+            return False
+        return True
+
+    def send_json(self, data) -> bool:
+        return self.send(json.dumps(jsonable_encoder(data)))
+
+    async def flush(self):
+        await self.queue.join()
+
+    def close(self):
+        self.closed = True
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+        # Frames that will never be sent must not keep flush() waiting
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+
+    async def _run(self):
+        while True:
+            enqueued_at, text = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(text), WS_SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("Evicting a websocket of user %s that stopped reading", self.user_id)
+                await self.manager.evict(self)
+                return
+            except Exception:
+                logger.info("Dropping a closed websocket of user %s", self.user_id)
+                self.manager.disconnect(self)
+                return
+            else:
+                self.manager.sent_frames += 1
+                self.manager.max_send_lag = max(self.manager.max_send_lag, time.monotonic() - enqueued_at)
+            finally:
+                self.queue.task_done()
+
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    """This worker's sockets. Sends go through the broker, which routes them to whichever worker holds the user's sockets."""
+
+    def __init__(self, broker: Broker):
+        self.broker = broker
+        self.active_connections: Dict[str, Set[Connection]] = {}
+        self.sent_frames = 0
+        self.dropped_frames = 0
+        self.evicted_connections = 0
+        self.max_send_lag = 0.0
+        # Endpoint tasks still reading their socket, and messages they received that are not stored and delivered yet
+        self.receivers: Set[asyncio.Task] = set()
+        self.in_flight: Set[asyncio.Task] = set()
+
+    async def start(self):
+        # Subscribe once per worker; the broker calls deliver for every message addressed to anyone
+        await self.broker.start(self.deliver)
+
+    async def stop(self):
+        """Stop receiving, finish the messages already received, then drop the sockets.
 
-    async def connect(self, websocket: WebSocket, user_id: str):
+        Runs before the message writer stops, so every received message is
+        queued for its final flush.
+        """
+        connections = [connection for user_connections in self.active_connections.values() for connection in user_connections]
+        for connection in connections:
+            try:
+                await connection.websocket.close(code=WS_SHUTDOWN_CLOSE_CODE)
+            except Exception:
+                pass
+        # Frames the clients sent before the close are still read and stored
+        if self.receivers:
+            await asyncio.wait(list(self.receivers), timeout=WS_SHUTDOWN_TIMEOUT)
+        if self.in_flight:
+            await asyncio.wait(list(self.in_flight), timeout=WS_SHUTDOWN_TIMEOUT)
+        await self.broker.stop()
+        for connection in connections:
+            self.disconnect(connection)
+
+    async def connect(self, websocket: WebSocket, user_id: str) -> Connection:
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        return self.register(websocket, user_id)
+
+    def register(self, websocket: WebSocket, user_id: str) -> Connection:
+        connection = Connection(self, websocket, user_id)
+        self.active_connections.setdefault(user_id, set()).add(connection)
+        return connection
 
-    def disconnect(self, websocket: WebSocket, user_id: str):
-        if user_id in self.active_connections:
-            self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
+    def disconnect(self, connection: Connection):
+        connection.close()
+        connections = self.active_connections.get(connection.user_id)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del self.active_connections[connection.user_id]
+
+    async def evict(self, connection: Connection):
+        self.evicted_connections += 1
+        self.disconnect(connection)
+        try:
+            await asyncio.wait_for(connection.websocket.close(code=WS_EVICTED_CLOSE_CODE), WS_SEND_TIMEOUT)
+        except Exception:
+            pass
 
     async def send_to_user(self, receiver_id: str, message: str):
-        if receiver_id in self.active_connections:
-            for connection in self.active_connections[receiver_id]:
-                await connection.send_text(message)
-            return True
-        return False
+        """Publish a message for every connection of a user, on any worker."""
+        await self.broker.publish(receiver_id, message)
+
+    async def send_event(self, user_id: str, event: dict):
+        await self.send_to_user(user_id, json.dumps(jsonable_encoder(event)))
+
+    async def deliver(self, user_id: str, message: str):
+        """Queue a message on this worker's connections of a user; never waits for a socket."""
+        for connection in list(self.active_connections.get(user_id, ())):
+            connection.send(message)
+
+    async def flush(self):
+        """Wait until every frame queued so far has been sent or dropped."""
+        await asyncio.gather(*[
+            connection.flush() for connections in list(self.active_connections.values()) for connection in connections
+        ])
+
+    def metrics(self) -> dict:
+        depths = [connection.queue.qsize() for connections in self.active_connections.values() for connection in connections]
+        return {
+            "users": len(self.active_connections),
+            "connections": len(depths),
+            "queued_frames": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "sent_frames": self.sent_frames,
+            "dropped_frames": self.dropped_frames,
+            "evicted_connections": self.evicted_connections,
+            "max_send_lag_seconds": self.max_send_lag,
+        }
+
+manager = ConnectionManager(create_broker())
 
-manager = ConnectionManager()
+async def startConnectionManager():
+    await manager.start()
+
+async def stopConnectionManager():
+    await manager.stop()
 
 # --- WebSocket Endpoint ---
+def message_row(sender_id: UUID, data) -> Optional[dict]:
+    """The messages row for an incoming {"to": ..., "message": ...} frame, or None when it is malformed."""
+    if not isinstance(data, dict) or not isinstance(data.get("message"), str):
+        return None
+    try:
+        receiver_id = UUID(str(data.get("to")))
+    except ValueError:
+        return None
+    return {
+        "message_id": uuid4(),
+        "sender_id": sender_id,
+        "receiver_id": receiver_id,
+        "content": data["message"],
+        "timestamp": datetime.utcnow(),
+        "is_read": False,
+    }
+
+async def persist_and_deliver(connection: Connection, sender_id: UUID, data, in_flight: asyncio.Semaphore):
+    """Write one chat message, ack the sender once it is committed, then deliver it to the receiver."""
+    client_id = data.get("id") if isinstance(data, dict) else None
+    try:
+        try:
+            row = message_row(sender_id, data)
+            if row is None:
+                connection.send_json({"type": "error", "id": client_id, "detail": 'Send {"to": <user id>, "message": <text>}'})
+                return
+            try:
+                # Returns once the batch holding this row has committed
+                await messageWriter.write(row)
+            except Exception:
+                logger.exception("Could not store a websocket message from %s", sender_id)
+                connection.send_json({"type": "error", "id": client_id, "detail": "The message could not be stored"})
+                return
+        finally:
+            in_flight.release()
+        connection.send_json({"type": "ack", "id": client_id, "message_id": row["message_id"], "timestamp": row["timestamp"]})
+        # Send to receiver, wherever they are connected
+        await manager.send_to_user(str(row["receiver_id"]), f"[From {sender_id}] {row['content']}")
+    except Exception:
+        # The broker may be unavailable; the message itself is already stored
+        logger.info("Could not finish delivering a message from %s", sender_id, exc_info=True)
+
 @router.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: str, db: Session = Depends(get_db)):
-    await manager.connect(websocket, user_id)
+async def websocket_endpoint(websocket: WebSocket, user_id: str):
+    try:
+        sender_id = UUID(user_id)
+    except ValueError:
+        await websocket.close(code=1008)
+        return
+    connection = await manager.connect(websocket, user_id)
+    receiver = asyncio.current_task()
+    manager.receivers.add(receiver)
+    # Receiving pauses while this many messages wait for their commit, so a flood cannot outrun the writer
+    in_flight = asyncio.Semaphore(WS_MAX_IN_FLIGHT)
     try:
         while True:
-            data = await websocket.receive_json()
-            to = data.get("to")
-            content = data.get("message")
-
-            # Save to DB
-            message_db = Message(
-                sender_id=UUID(user_id),
-                receiver_id=UUID(to),
-                content=content,
-                timestamp=datetime.utcnow(),
-                is_read=False
-            )
-            db.add(message_db)
-            db.commit()
-
-            # Send to receiver
-            sent = await manager.send_to_user(to, f"[From {user_id}] {content}")
-            if not sent:
-                pass  # Optional: fallback email
+            try:
+                data = json.loads(await websocket.receive_text())
+            except ValueError:
+                data = None
+            await in_flight.acquire()
+            task = asyncio.create_task(persist_and_deliver(connection, sender_id, data, in_flight))
+            manager.in_flight.add(task)
+            task.add_done_callback(manager.in_flight.discard)
     except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
+        pass
+    except RuntimeError:
+        # Receiving after the socket was evicted as a slow consumer and closed
+        if not connection.closed:
+            raise
+    finally:
+        manager.receivers.discard(receiver)
+        manager.disconnect(connection)
+
+@router.get("/ws/metrics", response_model=ConnectionMetrics)
+async def connection_metrics():
+    return manager.metrics()
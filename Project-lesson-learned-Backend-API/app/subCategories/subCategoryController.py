@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
@@ -10,21 +10,18 @@ from app.database import SessionLocal
 router = APIRouter(prefix="/subcategories", tags=["SubCategories"])
 
 # Local DB dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 @router.post("/", response_model=SubCategoryResponse)
-def add_subcategory(subcategory: SubCategoryCreate, db: Session = Depends(get_db)):
-    return create_subcategory(db, subcategory)
+async def add_subcategory(subcategory: SubCategoryCreate, db: AsyncSession = Depends(get_db)):
+    return await create_subcategory(db, subcategory)
 
 @router.get("/", response_model=List[SubCategoryResponse])
-def list_subcategories(db: Session = Depends(get_db)):
-    return get_all_subcategories(db)
+async def list_subcategories(db: AsyncSession = Depends(get_db)):
+    return await get_all_subcategories(db)
 
 @router.get("/category/{category_id}", response_model=List[SubCategoryResponse])
-def list_by_category(category_id: UUID, db: Session = Depends(get_db)):
-    return get_subcategories_by_category(db, category_id)
+async def list_by_category(category_id: UUID, db: AsyncSession = Depends(get_db)):
+    return await get_subcategories_by_category(db, category_id)
@@ -1,17 +1,18 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from app.subCategories.subCategoryModel import SubCategory
 from app.subCategories.subCategorySchemas import SubCategoryCreate
 
-def create_subcategory(db: Session, subcategory_data: SubCategoryCreate) -> SubCategory:
+async def create_subcategory(db: AsyncSession, subcategory_data: SubCategoryCreate) -> SubCategory:
     subcategory = SubCategory(**subcategory_data.dict())
     db.add(subcategory)
-    db.commit()
-    db.refresh(subcategory)
+    await db.commit()
+    await db.refresh(subcategory)
     return subcategory
 
-def get_all_subcategories(db: Session):
-    return db.query(SubCategory).all()
+async def get_all_subcategories(db: AsyncSession):
+    return (await db.scalars(select(SubCategory))).all()
 
-def get_subcategories_by_category(db: Session, category_id: UUID):
-    return db.query(SubCategory).filter(SubCategory.category_id == category_id).all()
+async def get_subcategories_by_category(db: AsyncSession, category_id: UUID):
+    return (await db.scalars(select(SubCategory).where(SubCategory.category_id == category_id))).all()
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from typing import List
 from pydantic import EmailStr
@@ -12,24 +12,21 @@ from app.user.userService import create_user, get_user_by_id, get_all_users
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 @router.post("/", response_model=UserResponse)
-def create_user_endpoint(user: UserCreate, db: Session = Depends(get_db)):
-    return create_user(db, user)
+async def create_user_endpoint(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    return await create_user(db, user)
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user_endpoint(user_id: UUID, db: Session = Depends(get_db)):
-    user = get_user_by_id(db, user_id)
+async def get_user_endpoint(user_id: UUID, db: AsyncSession = Depends(get_db)):
+    user = await get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 @router.get("/", response_model=List[UserResponse])
-def list_users(db: Session = Depends(get_db)):
-    return get_all_users(db)
+async def list_users(db: AsyncSession = Depends(get_db)):
+    return await get_all_users(db)
@@ -1,9 +1,10 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from app.user.userModel import User
 from app.user.userSchema import UserCreate
 
-def create_user(db: Session, user: UserCreate) -> User:
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
     db_user = User(
         name=user.name,
         email=user.email,
@@ -11,12 +12,12 @@ def create_user(db: Session, user: UserCreate) -> User:
         password_hash=user.password_hash,
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def get_user_by_id(db: Session, user_id: UUID) -> User:
-    return db.query(User).filter(User.user_id == user_id).first()
+async def get_user_by_id(db: AsyncSession, user_id: UUID) -> User:
+    return await db.scalar(select(User).where(User.user_id == user_id))
 
-def get_all_users(db: Session):
-    return db.query(User).all()
+async def get_all_users(db: AsyncSession):
+    return (await db.scalars(select(User))).all()
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Table, insert
+
+from app.database import SessionLocal
+
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 500))
+# How long the first row of a batch waits for others to join it before the batch commits
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", 0.05))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", 10000))
+
+logger = logging.getLogger(__name__)
+
+# (enqueued at, row, future resolved once the row is committed)
+PendingRow = Tuple[float, dict, Optional[asyncio.Future]]
+
+
+class WriteBehindWriter:
+    """Buffers rows for one table and inserts them in group commits from a background task.
+
+    enqueue() never blocks and may be called from any thread; when the bounded
+    buffer is full the row is dropped and counted. write() waits for buffer
+    space and returns once the row's batch has committed.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        max_pending: int = WRITE_BEHIND_MAX_PENDING,
+    ):
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[int] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.get_ident()
+        self._queue = asyncio.Queue(self.max_pending)
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        """Commit everything still buffered, then stop the background task."""
+        if not self.running:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def enqueue(self, row: dict) -> bool:
+        if not self.running:
+            self.dropped += 1
+            return False
+        item = (time.monotonic(), row, None)
+        if threading.get_ident() == self._thread:
+            return self._offer(item)
+        self._loop.call_soon_threadsafe(self._offer, item)
+        return True
+
+    async def write(self, row: dict):
+        if not self.running:
+            raise RuntimeError(f"The {self.table.name} writer is not running")
+        future = self._loop.create_future()
+        await self._queue.put((time.monotonic(), row, future))
+        await future
+
+    async def flush(self):
+        """Wait until every row queued so far has been committed or has failed."""
+        if self.running:
+            await self._queue.join()
+
+    def metrics(self) -> dict:
+        return {
+            "table": self.table.name,
+            "running": self.running,
+            "depth": self._queue.qsize() if self._queue else 0,
+            "max_pending": self.max_pending,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+        }
+
+    def _offer(self, item: PendingRow) -> bool:
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("%s write-behind buffer is full; dropped a row", self.table.name)
+            return False
+        return True
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._commit(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _commit(self, batch: List[PendingRow]):
+        errors = await self._insertBisecting([row for _, row, _ in batch])
+
+        committed_at = time.monotonic()
+        self.batches += 1
+        for (enqueued_at, row, future), error in zip(batch, errors):
+            if error is None:
+                self.written += 1
+                self.lag = committed_at - enqueued_at
+                self.max_lag = max(self.max_lag, self.lag)
+            else:
+                self.failed += 1
+                logger.error("Could not write %s row %r: %s", self.table.name, row, error)
+            if future is not None and not future.done():
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+    async def _insertBisecting(self, rows: List[dict]) -> List[Optional[Exception]]:
+        """Insert rows, splitting a failed insert in halves so a few bad rows cost
+        a few extra inserts each instead of one insert per row of the batch."""
+        try:
+            await self._insert(rows)
+        except Exception as e:
+            if len(rows) == 1:
+                return [e]
+            middle = len(rows) // 2
+            return await self._insertBisecting(rows[:middle]) + await self._insertBisecting(rows[middle:])
+        return [None] * len(rows)
+
+    async def _insert(self, rows: List[dict]):
+        async with SessionLocal() as db:
+            await db.execute(insert(self.table), rows)
+            await db.commit()
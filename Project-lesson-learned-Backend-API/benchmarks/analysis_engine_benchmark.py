@@ -0,0 +1,64 @@
+"""Throughput of AnalysisEngine across worker counts on a synthetic corpus.
+
+Run from Project-lesson-learned-Backend-API/:
+
+    python -m benchmarks.analysis_engine_benchmark --lessons 100000
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from app.lessonLearned.lessonLearnedAnalysisEngine import AnalysisEngine
+
+VOCABULARY = (
+    "antenna cable receiver dish correlator firmware budget schedule vendor supplier contract "
+    "delay failure water ingress power cooling software release testing integration review "
+    "documentation training risk scope requirement design procurement shipping installation"
+).split()
+
+
+def syntheticCorpus(lessons: int, words: int, seed: int = 7):
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    return [
+        (
+            uuid4(),
+            " ".join(rng.choice(VOCABULARY) for _ in range(words)) + ". The issue was resolved.",
+            start + timedelta(days=rng.randrange(5 * 365)),
+        )
+        for _ in range(lessons)
+    ]
+
+
+def chunked(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=50000)
+    parser.add_argument("--words", type=int, default=80, help="words per description")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    corpus = syntheticCorpus(args.lessons, args.words)
+    worker_counts = sorted({1, *(2 ** i for i in range(1, args.max_workers.bit_length())), args.max_workers})
+
+    baseline = None
+    print(f"{'workers':>8} {'seconds':>9} {'lessons/s':>11} {'speedup':>8}")
+    for workers in worker_counts:
+        engine = AnalysisEngine(workers=workers, chunk_size=args.chunk_size)
+        started = time.perf_counter()
+        engine.analyze(chunked(corpus, args.chunk_size))
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {args.lessons / elapsed:>11.0f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Request throughput of AsyncSession handlers versus blocking-Session handlers under concurrency.
+
+Two probe routes run the same statement, with pg_sleep standing in for the
+network round trip to Postgres: one awaits it on an AsyncSession, the other
+calls the blocking Session from an ``async def`` handler, which is how every
+handler in this API used to work. Requests are driven in-process through
+httpx's ASGI transport, so both routes share one event loop just as they
+would under uvicorn. Needs a reachable DATABASE_URL.
+
+Run from Project-lesson-learned-Backend-API/:
+
+    python -m benchmarks.async_load_benchmark --requests 2000 --concurrency 50 --latency-ms 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func, select
+
+from app.database import SessionLocal, SyncSessionLocal, engine
+
+
+def probeApp(latency: float) -> FastAPI:
+    app = FastAPI()
+    statement = select(func.pg_sleep(latency))
+
+    @app.get("/async")
+    async def asyncProbe():
+        async with SessionLocal() as db:
+            await db.execute(statement)
+        return {}
+
+    @app.get("/blocking")
+    async def blockingProbe():
+        with SyncSessionLocal() as db:
+            db.execute(statement)
+        return {}
+
+    return app
+
+
+async def drive(client: httpx.AsyncClient, path: str, requests: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, sorted(latencies)
+
+
+async def run(args):
+    app = probeApp(args.latency_ms / 1000)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path in ("/blocking", "/async"):
+            # Warm the connection pool so neither run pays for connection setup
+            await drive(client, path, args.concurrency, args.concurrency)
+            elapsed, latencies = await drive(client, path, args.requests, args.concurrency)
+            print(f"{path:<10} {args.requests / elapsed:8.0f} req/s   p50 {statistics.median(latencies):7.1f} ms"
+                  f"   p95 {latencies[int(len(latencies) * 0.95)]:7.1f} ms")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated database round trip")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Build, query and persistence cost of SimilarityIndex at lesson-register scale.
+
+Run from Project-lesson-learned-Backend-API/:
+
+    python -m benchmarks.similarity_benchmark --lessons 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from uuid import uuid4
+
+from app.lessonLearned.lessonLearnedSimilarity import SimilarityIndex
+from benchmarks.analysis_engine_benchmark import VOCABULARY
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lessons", type=int, default=100000)
+    parser.add_argument("--words", type=int, default=60, help="words per lesson")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    # A larger synthetic vocabulary so the hashed matrix has realistic sparsity
+    vocabulary = VOCABULARY + [f"{word}{n}" for word in VOCABULARY for n in range(200)]
+    lessons = [(uuid4(), " ".join(rng.choice(vocabulary) for _ in range(args.words))) for _ in range(args.lessons)]
+
+    index = SimilarityIndex()
+    started = time.perf_counter()
+    for lesson_id, text in lessons:
+        index.upsert(lesson_id, text)
+    print(f"index {args.lessons} lessons:      {time.perf_counter() - started:8.2f} s")
+
+    started = time.perf_counter()
+    index.similar(lessons[0][0], args.k)
+    print(f"first query (re-weighting):  {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+    latencies = []
+    for lesson_id, _ in rng.sample(lessons, args.queries):
+        started = time.perf_counter()
+        index.similar(lesson_id, args.k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    print(f"query p50 / p95:             {statistics.median(latencies):8.1f} / "
+          f"{latencies[int(len(latencies) * 0.95)]:.1f} ms")
+
+    lesson_id, text = lessons[-1]
+    started = time.perf_counter()
+    index.upsert(lesson_id, text + " revised")
+    index.similar(lesson_id, args.k)
+    print(f"update + next query:         {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "similarity_index.npz")
+        started = time.perf_counter()
+        index.save(path)
+        print(f"save ({os.path.getsize(path) / 2 ** 20:.1f} MiB):             {time.perf_counter() - started:8.2f} s")
+        started = time.perf_counter()
+        SimilarityIndex().load(path)
+        print(f"load:                        {time.perf_counter() - started:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,23 @@
 from fastapi import FastAPI
-from app.database import Base, engine
 from app.lessonLearned.lessonLearnedController import router as lessonRouter
+from app.lessonLearned.lessonLearnedAnalysis import router as lessonAnalysis
+from app.lessonLearned.lessonLearnedSimilarity import startSimilarityIndex, stopSimilarityIndex
+from app.lessonLearned.lessonLearnedDuplicates import startDuplicateIndex, stopDuplicateIndex
+from app.lessonLearned.lessonLearnedStats import startStatsRefresher, stopStatsRefresher
 from app.documents.documentController import router as documents
+from app.documents.documentText import startDocumentTextExtractor, stopDocumentTextExtractor
 from app.user.userController import router as user
 from app.auditLog.auditlogController import router as auditlog
+from app.auditLog.auditlogEvents import startAuditWriter, stopAuditWriter
+from app.auditLog.auditlogPartitions import startPartitionMaintenance, stopPartitionMaintenance
 from app.message.messageController import router as message
+from app.message.messageWriter import startMessageWriter, stopMessageWriter
+from app.socketCommunication import router as socket, startConnectionManager, stopConnectionManager
 from app.subCategories.subCategoryController import router as subcategory
 from fastapi.middleware.cors import CORSMiddleware
 
 
-Base.metadata.create_all(bind=engine)
-
-
-
+# The schema is managed by Alembic (alembic upgrade head), not created at startup
 app = FastAPI()
 
 app.add_middleware(
@@ -23,11 +28,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_event_handler("startup", startSimilarityIndex)
+app.add_event_handler("shutdown", stopSimilarityIndex)
+app.add_event_handler("startup", startDuplicateIndex)
+app.add_event_handler("shutdown", stopDuplicateIndex)
+app.add_event_handler("startup", startStatsRefresher)
+app.add_event_handler("shutdown", stopStatsRefresher)
+app.add_event_handler("startup", startPartitionMaintenance)
+app.add_event_handler("shutdown", stopPartitionMaintenance)
+app.add_event_handler("startup", startAuditWriter)
+app.add_event_handler("shutdown", stopAuditWriter)
+app.add_event_handler("startup", startDocumentTextExtractor)
+app.add_event_handler("shutdown", stopDocumentTextExtractor)
+app.add_event_handler("startup", startMessageWriter)
+app.add_event_handler("startup", startConnectionManager)
+# Shutdown handlers run in registration order: stop the sockets before the writer's final flush
+app.add_event_handler("shutdown", stopConnectionManager)
+app.add_event_handler("shutdown", stopMessageWriter)
+
+# Registered ahead of lessonRouter so /lessons/analysis is not captured by /lessons/{lessonId}
+app.include_router(lessonAnalysis)
 app.include_router(lessonRouter)
 app.include_router(documents)
 app.include_router(user)
 app.include_router(auditlog)
 app.include_router(message)
+app.include_router(socket)
 app.include_router(subcategory)
 # Optional: Root endpoint
 #@app.get("/")
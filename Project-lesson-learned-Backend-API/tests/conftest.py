@@ -0,0 +1,115 @@
+import os
+from pathlib import Path
+from typing import Callable, List
+from uuid import UUID
+
+import httpx
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # app.database reads DATABASE_URL when it is first imported
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+import app.models  # noqa: E402,F401
+from app.auditLog.auditlogModel import AuditActionEnum, AuditLog  # noqa: E402
+from app.database import SyncSessionLocal, engine  # noqa: E402
+from app.documents.documentModel import Document  # noqa: E402
+from app.lessonLearned.lessonLearnedModel import Categories, Impacts, LessonLearned  # noqa: E402
+from app.subCategories.subCategoryModel import SubCategory  # noqa: E402
+from app.user.userModel import User  # noqa: E402
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="session")
+def database():
+    """A dedicated, disposable Postgres database migrated to head; tests that need one are skipped without it."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    config = Config(str(PROJECT_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(PROJECT_ROOT / "app" / "migrations"))
+    command.upgrade(config, "head")
+    yield
+    command.downgrade(config, "base")
+
+
+@pytest.fixture
+async def client(database):
+    from main import app
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
+    # Pooled asyncpg connections are bound to this test's event loop
+    await engine.dispose()
+
+
+@pytest.fixture
+async def audit_writer(database):
+    """The audit write-behind writer running on the test's event loop; stopping it flushes the buffer."""
+    from app.auditLog.auditlogEvents import auditWriter
+
+    auditWriter.start()
+    yield auditWriter
+    await auditWriter.stop()
+    await engine.dispose()
+
+
+@pytest.fixture
+def query_counter(database) -> List[str]:
+    """Every SQL statement the async engine sends while the test runs."""
+    statements: List[str] = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+@pytest.fixture
+def make_lesson(database) -> Callable[..., UUID]:
+    """Insert a lesson with its submitter, subcategory and the given number of documents and audit logs.
+
+    Keyword arguments override the lesson's column values.
+    """
+
+    def make(documents: int = 0, audit_logs: int = 0, **fields) -> UUID:
+        with SyncSessionLocal() as db:
+            user = User(name="Tester", email=f"{os.urandom(6).hex()}@example.com", password_hash="x")
+            subcategory = SubCategory(main_category=Categories.technical_solution.value, name="Cabling")
+            values = dict(
+                project_name="MeerKAT",
+                category_main=Categories.technical_solution,
+                description="Conduit was not sealed",
+                root_cause="Rodents",
+                outcomes="Cable replaced",
+                impact=Impacts.negative,
+            )
+            values.update(fields)
+            lesson = LessonLearned(**values, subcategory=subcategory, submitted_by_user=user)
+            lesson.documents = [Document(filename=f"doc{i}.pdf", file_path=f"/docs/doc{i}.pdf") for i in range(documents)]
+            lesson.audit_logs = [AuditLog(action=AuditActionEnum.updated, user=user) for _ in range(audit_logs)]
+            db.add(lesson)
+            db.commit()
+            return lesson.lesson_id
+
+    return make
+
+
+@pytest.fixture
+def make_users(database) -> Callable[[int], List[UUID]]:
+    """Insert the given number of users and return their ids."""
+
+    def make(count: int) -> List[UUID]:
+        with SyncSessionLocal() as db:
+            users = [User(name=f"user{n}", email=f"{os.urandom(6).hex()}@example.com", password_hash="x") for n in range(count)]
+            db.add_all(users)
+            db.commit()
+            return [user.user_id for user in users]
+
+    return make
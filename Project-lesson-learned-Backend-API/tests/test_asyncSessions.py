@@ -0,0 +1,52 @@
+import asyncio
+import time
+from uuid import uuid4
+
+from sqlalchemy import text
+
+import app.lessonLearned.lessonLearnedController as lessonController
+
+QUERY_SECONDS = 0.3
+REQUESTS = 5
+
+
+async def test_slow_queries_do_not_block_the_event_loop(client, make_lesson, monkeypatch):
+    lesson_ids = [make_lesson() for _ in range(REQUESTS)]
+    original = lessonController.getLessonById
+
+    async def slowGetLessonById(db, lesson_id):
+        await db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": QUERY_SECONDS})
+        return await original(db, lesson_id)
+
+    monkeypatch.setattr(lessonController, "getLessonById", slowGetLessonById)
+    gaps = []
+
+    async def tick():
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(0.01)
+            gaps.append(time.monotonic() - started)
+
+    ticker = asyncio.create_task(tick())
+    started = time.monotonic()
+    responses = await asyncio.gather(*[client.get(f"/lessons/{lesson_id}") for lesson_id in lesson_ids])
+    elapsed = time.monotonic() - started
+    ticker.cancel()
+
+    assert [response.status_code for response in responses] == [200] * REQUESTS
+    # The requests wait on the database together, and the loop keeps running meanwhile
+    assert elapsed < QUERY_SECONDS * REQUESTS / 2
+    assert max(gaps) < QUERY_SECONDS / 2
+
+
+async def test_user_round_trip(client):
+    email = f"{uuid4().hex}@example.com"
+
+    created = await client.post("/users/", json={"name": "Ada", "email": email, "role": "Admin", "password_hash": "x"})
+
+    assert created.status_code == 200
+    user = created.json()
+    assert (user["email"], user["role"], user["is_active"]) == (email, "Admin", True)
+    assert (await client.get(f"/users/{user['user_id']}")).json() == user
+    assert user in (await client.get("/users/")).json()
+    assert (await client.get(f"/users/{uuid4()}")).status_code == 404
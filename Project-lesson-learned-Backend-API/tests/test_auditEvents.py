@@ -0,0 +1,97 @@
+from sqlalchemy import select
+
+from app.auditLog.auditlogEvents import setAuditActor
+from app.auditLog.auditlogModel import AuditActionEnum, AuditLog
+from app.database import SyncSessionLocal, engine
+from app.lessonLearned.lessonLearnedModel import LessonLearned, Status
+from app.writeBehind import WriteBehindWriter
+
+UPDATE_FIELDS = (
+    "project_name", "category_main", "category_sub", "description", "root_cause", "outcomes",
+    "impact", "suggested_actions", "tags", "status", "approved_by",
+)
+
+
+def audit_trail(lesson_id):
+    with SyncSessionLocal() as db:
+        logs = db.scalars(select(AuditLog).where(AuditLog.lesson_id == lesson_id).order_by(AuditLog.timestamp))
+        return [(log.action, log.performed_by) for log in logs]
+
+
+async def test_lesson_changes_are_audited_after_commit(audit_writer, make_lesson, make_users):
+    lesson_id = make_lesson()
+    [editor] = make_users(1)
+    with SyncSessionLocal() as db:
+        lesson = db.get(LessonLearned, lesson_id)
+        submitter = lesson.submitted_by
+        setAuditActor(db, editor)
+        lesson.outcomes = "Cable replaced and conduit sealed"
+        db.commit()
+        # The actor only covers its own transaction; an update nobody is known to have made is not audited
+        lesson.outcomes = "Cable replaced"
+        db.commit()
+        lesson.status = Status.approved
+        lesson.approved_by = submitter
+        db.commit()
+        # Neither a no-op assignment nor a rolled back change is audited
+        lesson.outcomes = lesson.outcomes
+        db.commit()
+        lesson.status = Status.rejected
+        db.flush()
+        db.rollback()
+
+    await audit_writer.flush()
+
+    assert audit_trail(lesson_id) == [
+        (AuditActionEnum.created, submitter),
+        (AuditActionEnum.updated, editor),
+        (AuditActionEnum.approved, submitter),
+    ]
+    metrics = audit_writer.metrics()
+    assert metrics["written"] >= 3
+    assert metrics["depth"] == 0
+
+
+async def test_lesson_updates_are_audited_as_the_acting_user(client, audit_writer, make_lesson, make_users):
+    lesson_id = make_lesson()
+    [editor] = make_users(1)
+    lesson = (await client.get(f"/lessons/{lesson_id}")).json()
+    update = {field: lesson[field] for field in UPDATE_FIELDS}
+
+    first = await client.put(f"/lessons/{lesson_id}", params={"performed_by": str(editor)}, json={**update, "outcomes": "Sealed"})
+    second = await client.put(f"/lessons/{lesson_id}", json={**update, "outcomes": "Resealed"})
+    await audit_writer.flush()
+
+    assert (first.status_code, second.status_code) == (200, 200)
+    assert audit_trail(lesson_id)[1:] == [(AuditActionEnum.updated, editor)]
+
+
+async def test_writer_metrics_endpoint(client, audit_writer, make_lesson):
+    make_lesson()
+    await audit_writer.flush()
+
+    response = await client.get("/audit-logs/writer")
+
+    assert response.status_code == 200
+    assert response.json()["table"] == "audit_logs"
+    assert response.json()["running"] is True
+    assert response.json()["written"] >= 1
+
+
+async def test_full_buffer_drops_and_write_waits_for_commit(database, make_lesson):
+    lesson_id = make_lesson()
+    with SyncSessionLocal() as db:
+        performed_by = db.get(LessonLearned, lesson_id).submitted_by
+    row = {"lesson_id": lesson_id, "action": AuditActionEnum.updated, "performed_by": performed_by}
+    writer = WriteBehindWriter(AuditLog.__table__, max_pending=2)
+    writer.start()
+
+    # The background task has not run yet, so the third row finds the buffer full
+    assert [writer.enqueue(dict(row)) for _ in range(3)] == [True, True, False]
+    await writer.write(dict(row))
+    await writer.stop()
+    await engine.dispose()
+
+    assert writer.metrics()["dropped"] == 1
+    assert writer.metrics()["written"] == 3
+    assert len(audit_trail(lesson_id)) == 3
@@ -0,0 +1,88 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select, text
+
+from app.auditLog.auditlogModel import AuditActionEnum, AuditLog
+from app.auditLog.auditlogPartitions import detachPartitionsBefore, listPartitions
+from app.database import SyncSessionLocal, syncEngine
+from app.lessonLearned.lessonLearnedModel import LessonLearned
+
+
+@pytest.fixture
+def trail(make_lesson):
+    """Twelve audit rows, one every ten days back from now, so the trail spans several monthly partitions."""
+    lesson_id = make_lesson()
+    now = datetime.utcnow()
+    with SyncSessionLocal() as db:
+        performed_by = db.get(LessonLearned, lesson_id).submitted_by
+        rows = [
+            {
+                "lesson_id": lesson_id,
+                "action": AuditActionEnum.approved if n % 3 == 0 else AuditActionEnum.updated,
+                "performed_by": performed_by,
+                "timestamp": now - timedelta(days=10 * n),
+            }
+            for n in range(12)
+        ]
+        db.execute(text("SELECT ensure_audit_log_partitions(:since, 0)"), {"since": rows[-1]["timestamp"]})
+        db.execute(insert(AuditLog), rows)
+        db.commit()
+    return {"performed_by": performed_by, "timestamps": [row["timestamp"] for row in rows]}
+
+
+def test_upcoming_months_have_partitions(database):
+    with syncEngine.connect() as connection:
+        months = [start for _, start, _ in listPartitions(connection)]
+
+    this_month = date.today().replace(day=1)
+    assert this_month in months
+    assert max(months) > this_month
+
+
+async def test_keyset_pages_cover_the_time_range(client, trail):
+    since, until = trail["timestamps"][9], trail["timestamps"][1]
+    params = {"performed_by": str(trail["performed_by"]), "since": since.isoformat(), "until": until.isoformat(), "limit": 3}
+
+    seen, cursor = [], None
+    while True:
+        response = await client.get("/audit-logs/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json()
+        seen += [datetime.fromisoformat(log["timestamp"]) for log in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    # since is inclusive and until exclusive, newest first
+    assert seen == trail["timestamps"][2:10]
+
+
+async def test_list_filters_by_action(client, trail):
+    response = await client.get("/audit-logs/", params={"performed_by": str(trail["performed_by"]), "action": "Approved"})
+
+    assert [datetime.fromisoformat(log["timestamp"]) for log in response.json()["items"]] == trail["timestamps"][::3]
+
+
+def test_time_range_only_scans_matching_partitions(database):
+    month = date.today().replace(day=1)
+    query = select(AuditLog).where(AuditLog.timestamp >= month, AuditLog.timestamp < month + timedelta(days=1))
+    with SyncSessionLocal() as db:
+        plan = "\n".join(db.scalars(text("EXPLAIN " + str(query.compile(compile_kwargs={"literal_binds": True})))))
+
+    assert f"audit_logs_{month:%Y_%m}" in plan
+    assert f"audit_logs_{(month + timedelta(days=40)):%Y_%m}" not in plan
+
+
+def test_detach_old_partitions(database):
+    with syncEngine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(
+            "CREATE TABLE audit_logs_2001_01 PARTITION OF audit_logs FOR VALUES FROM ('2001-01-01') TO ('2001-02-01')"
+        ))
+        try:
+            assert detachPartitionsBefore(connection, date(2001, 2, 1)) == ["audit_logs_2001_01"]
+            assert "audit_logs_2001_01" not in [name for name, _, _ in listPartitions(connection)]
+            # The detached month stays behind as a plain table for the archive
+            assert connection.execute(text("SELECT to_regclass('audit_logs_2001_01')")).scalar() is not None
+        finally:
+            connection.execute(text("DROP TABLE IF EXISTS audit_logs_2001_01"))
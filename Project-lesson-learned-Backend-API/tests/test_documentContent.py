@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from app.documents.documentContent import DocumentContentResponse, ZERO_COPY_EXTENSION
+from app.documents.documentStorage import documentStore
+
+
+@pytest.fixture
+async def stored(client, make_lesson, tmp_path, monkeypatch):
+    monkeypatch.setattr(documentStore, "root", str(tmp_path))
+    content = os.urandom(200_000)
+    response = await client.post(
+        f"/documents/lesson/{make_lesson()}", files={"file": ("plan é.pdf", content, "application/pdf")}
+    )
+    return response.json()[0], content
+
+
+async def test_full_download_with_validators(client, stored):
+    doc, content = stored
+
+    response = await client.get(f"/documents/{doc['id']}/content")
+
+    assert response.status_code == 200
+    assert response.content == content
+    assert response.headers["etag"] == f'"{doc["content_hash"]}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["content-disposition"] == "attachment; filename*=utf-8''plan%20%C3%A9.pdf"
+
+    etag, last_modified = response.headers["etag"], response.headers["last-modified"]
+    assert (await client.get(f"/documents/{doc['id']}/content", headers={"If-None-Match": etag})).status_code == 304
+    assert (await client.get(f"/documents/{doc['id']}/content", headers={"If-Modified-Since": last_modified})).status_code == 304
+
+    head = await client.head(f"/documents/{doc['id']}/content")
+    assert (head.status_code, head.headers["content-length"], head.content) == (200, str(len(content)), b"")
+
+
+async def test_ranges(client, stored):
+    doc, content = stored
+    url = f"/documents/{doc['id']}/content"
+
+    response = await client.get(url, headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(content)}"
+    assert response.content == content[100:200]
+
+    response = await client.get(url, headers={"Range": "bytes=-500"})
+    assert (response.status_code, response.content) == (206, content[-500:])
+
+    response = await client.get(url, headers={"Range": "bytes=199990-"})
+    assert (response.status_code, response.content) == (206, content[199990:])
+
+    # Resuming against a changed validator restarts the download
+    response = await client.get(url, headers={"Range": "bytes=100-", "If-Range": '"other"'})
+    assert (response.status_code, response.content) == (200, content)
+    response = await client.get(url, headers={"Range": "bytes=100-", "If-Range": response.headers["etag"]})
+    assert (response.status_code, response.content) == (206, content[100:])
+
+    response = await client.get(url, headers={"Range": f"bytes={len(content)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(content)}"
+
+    # Several ranges are answered with the whole file
+    response = await client.get(url, headers={"Range": "bytes=0-1,5-6"})
+    assert (response.status_code, response.content) == (200, content)
+
+
+async def test_missing_content_is_404(client, stored, make_lesson):
+    doc, _ = stored
+    os.remove(documentStore.path(doc["content_hash"]))
+    assert (await client.get(f"/documents/{doc['id']}/content")).status_code == 404
+
+
+async def test_zero_copy_send_when_the_server_offers_it(tmp_path):
+    path = tmp_path / "blob"
+    path.write_bytes(b"0123456789")
+    sent = []
+
+    async def send(message):
+        if message["type"] == ZERO_COPY_EXTENSION:
+            message["file"].seek(message["offset"])
+            message = {**message, "data": message["file"].read(message["count"])}
+        sent.append(message)
+
+    response = DocumentContentResponse(str(path), 2, 5, 206, {}, "application/octet-stream")
+    await response({"type": "http", "method": "GET", "extensions": {ZERO_COPY_EXTENSION: {}}}, None, send)
+
+    assert [m["type"] for m in sent] == ["http.response.start", ZERO_COPY_EXTENSION]
+    assert sent[1]["data"] == b"23456"
+    assert (b"content-length", b"5") in sent[0]["headers"]
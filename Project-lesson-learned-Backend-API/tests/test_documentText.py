@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import docx
+import pytest
+from sqlalchemy import select, update
+
+from app.database import SyncSessionLocal, engine, syncEngine
+from app.documents.documentModel import Document, DocumentText, ExtractionStatus
+from app.documents.documentStorage import documentStore
+from app.documents.documentText import DocumentTextExtractor, extract_text, queue_missing_texts
+
+
+def minimal_pdf(text):
+    content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    return pdf + b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+
+def test_extractors(tmp_path):
+    pdf = tmp_path / "report.pdf"
+    pdf.write_bytes(minimal_pdf("Conduit flooding"))
+    status, text, _ = extract_text(str(pdf), "report.pdf", "application/pdf")
+    assert (status, "Conduit flooding" in text) == (ExtractionStatus.done, True)
+
+    word = docx.Document()
+    word.add_paragraph("Torque spec exceeded")
+    word.add_table(rows=1, cols=1).cell(0, 0).text = "Bolt M12"
+    word.save(tmp_path / "notes.docx")
+    status, text, _ = extract_text(str(tmp_path / "notes.docx"), "notes.docx", None)
+    assert status == ExtractionStatus.done
+    assert "Torque spec exceeded" in text and "Bolt M12" in text
+
+    (tmp_path / "log.txt").write_bytes(b"plain\x00text")
+    assert extract_text(str(tmp_path / "log.txt"), "log.txt", "text/plain") == (ExtractionStatus.done, "plaintext", None)
+
+    assert extract_text(str(pdf), "photo.jpg", "image/jpeg")[0] == ExtractionStatus.skipped
+    assert extract_text(None, "old.pdf", None)[0] == ExtractionStatus.skipped
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    assert extract_text(str(tmp_path / "broken.pdf"), "broken.pdf", None)[0] == ExtractionStatus.failed
+
+
+@pytest.fixture(params=[False, True], ids=["threads", "processes"])
+def extractor(request):
+    extractor = DocumentTextExtractor(workers=1, processes=request.param)
+    yield extractor
+    extractor._pool and extractor._pool.shutdown()
+
+
+async def test_uploaded_text_becomes_searchable(client, make_lesson, extractor, tmp_path, monkeypatch):
+    monkeypatch.setattr(documentStore, "root", str(tmp_path))
+    word = f"xylo{uuid4().hex[:8]}"
+    lesson_id = make_lesson()
+    response = await client.post(
+        f"/documents/lesson/{lesson_id}", files={"file": ("report.pdf", minimal_pdf(f"Pump {word} failure"), "application/pdf")}
+    )
+    document_id = response.json()[0]["id"]
+
+    # Nothing is extracted in the request
+    with SyncSessionLocal() as db:
+        assert db.get(DocumentText, document_id).status == ExtractionStatus.pending
+    assert (await client.get("/lessons/search", params={"q": word})).json()["items"] == []
+
+    assert await extractor.drain() >= 1
+    await engine.dispose()
+
+    with SyncSessionLocal() as db:
+        text = db.get(DocumentText, document_id)
+        assert (text.status, text.attempts, word in text.text) == (ExtractionStatus.done, 1, True)
+    hits = (await client.get("/lessons/search", params={"q": word})).json()["items"]
+    assert [hit["lesson"]["lesson_id"] for hit in hits] == [str(lesson_id)]
+    assert (await client.get("/lessons/search", params={"q": word, "documents": "false"})).json()["items"] == []
+
+    # The extracted text goes with the document
+    await client.delete(f"/documents/{document_id}")
+    with SyncSessionLocal() as db:
+        assert db.get(DocumentText, document_id) is None
+
+
+async def test_backfill_and_abandoned_claims(database, make_lesson, extractor):
+    lesson_id = make_lesson(documents=1)
+    with SyncSessionLocal() as db:
+        document_id = db.scalar(select(Document.id).where(Document.lesson_id == lesson_id))
+
+    with syncEngine.begin() as connection:
+        assert queue_missing_texts(connection) >= 1
+        assert queue_missing_texts(connection) == 0
+
+    await extractor.drain()
+    with SyncSessionLocal() as db:
+        # JSON-created documents only name a path, which is not read without DOCUMENT_LEGACY_ROOT
+        assert db.get(DocumentText, document_id).status == ExtractionStatus.skipped
+        db.execute(
+            update(DocumentText)
+            .where(DocumentText.document_id == document_id)
+            .values(status=ExtractionStatus.processing, attempts=extractor.max_attempts, claimed_at=datetime.utcnow() - timedelta(days=1))
+        )
+        db.commit()
+
+    await extractor.drain()
+    await engine.dispose()
+    with SyncSessionLocal() as db:
+        text = db.get(DocumentText, document_id)
+        assert (text.status, text.error) == (ExtractionStatus.failed, f"Gave up after {extractor.max_attempts} attempts")
+
+    with syncEngine.begin() as connection:
+        assert queue_missing_texts(connection, retry=True) >= 1
+    with SyncSessionLocal() as db:
+        assert db.get(DocumentText, document_id).status == ExtractionStatus.pending
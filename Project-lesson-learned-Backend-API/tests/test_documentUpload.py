@@ -0,0 +1,131 @@
+import os
+import tracemalloc
+from uuid import uuid4
+
+import pytest
+from starlette.requests import Request
+
+import app.documents.documentService as documentService
+from app.documents.documentStorage import ContentAddressedStore, documentStore, receive_files
+
+BOUNDARY = "lessonboundary"
+
+
+@pytest.fixture
+def store_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(documentStore, "root", str(tmp_path))
+    return tmp_path
+
+
+def stored_blobs(root):
+    return sorted(path.name for path in root.rglob("*") if path.is_file() and path.parent.name != "tmp")
+
+
+async def test_identical_uploads_share_one_blob(client, make_lesson, store_root):
+    first, second = make_lesson(), make_lesson()
+    content = os.urandom(300_000)
+
+    uploaded = []
+    for lesson_id in (first, second):
+        response = await client.post(
+            f"/documents/lesson/{lesson_id}",
+            files={"file": ("design.pdf", content, "application/pdf")},
+        )
+        assert response.status_code == 201, response.text
+        uploaded.extend(response.json())
+
+    assert {doc["content_hash"] for doc in uploaded} == {stored_blobs(store_root)[0]}
+    assert len(stored_blobs(store_root)) == 1
+    assert {(doc["size_bytes"], doc["content_type"], doc["filename"]) for doc in uploaded} == {
+        (len(content), "application/pdf", "design.pdf")
+    }
+    assert (store_root / uploaded[0]["file_path"]).read_bytes() == content
+
+    # The blob goes away with the last document that references it
+    assert (await client.delete(f"/documents/{uploaded[0]['id']}")).status_code == 204
+    assert len(stored_blobs(store_root)) == 1
+    assert (await client.delete(f"/documents/{uploaded[1]['id']}")).status_code == 204
+    assert stored_blobs(store_root) == []
+
+
+async def test_a_failed_upload_leaves_no_new_blobs(client, make_lesson, store_root, monkeypatch):
+    lesson_id = make_lesson()
+    existing = os.urandom(1000)
+    assert (await client.post(f"/documents/lesson/{lesson_id}", files={"file": ("a.bin", existing)})).status_code == 201
+    [kept] = stored_blobs(store_root)
+
+    def fail(db, doc):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(documentService, "queue_document_text", fail)
+    with pytest.raises(RuntimeError):
+        await client.post(f"/documents/lesson/{lesson_id}", files=[("file", ("a.bin", existing)), ("file", ("b.bin", os.urandom(1000)))])
+
+    # Content another document already used stays; the new blob and the temp files go
+    assert stored_blobs(store_root) == [kept]
+    assert list((store_root / "tmp").iterdir()) == []
+
+
+async def test_upload_rejects_unknown_lesson_and_empty_forms(client, make_lesson, store_root):
+    response = await client.post(f"/documents/lesson/{uuid4()}", files={"file": ("a.txt", b"a", "text/plain")})
+    assert response.status_code == 404
+
+    response = await client.post(f"/documents/lesson/{make_lesson()}", data={"note": "no file"}, files={})
+    assert response.status_code in (400, 415)
+    assert stored_blobs(store_root) == []
+
+
+def multipart_request(chunks):
+    async def receive():
+        try:
+            return {"type": "http.request", "body": next(chunks), "more_body": True}
+        except StopIteration:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())],
+    }
+    return Request(scope, receive)
+
+
+def upload_body(size, chunk_size=64 * 1024):
+    yield (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"C:\\\\plans\\\\big.pdf\"\r\n"
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode()
+    block = b"x" * chunk_size
+    for _ in range(size // chunk_size):
+        yield block
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def test_large_upload_streams_with_constant_memory(tmp_path):
+    store = ContentAddressedStore(str(tmp_path))
+    size = 32 * 1024 * 1024
+
+    tracemalloc.start()
+    files = await receive_files(multipart_request(upload_body(size)), store)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert [(f.filename, f.content_type, f.blob.size) for f in files] == [("big.pdf", "application/pdf", size)]
+    assert peak < 2 * 1024 * 1024, peak
+    digest = await store.commit(files[0].blob)
+    assert os.path.getsize(store.path(digest)) == size
+
+
+async def test_limit_and_truncation_remove_temp_files(tmp_path):
+    from fastapi import HTTPException
+
+    store = ContentAddressedStore(str(tmp_path))
+    with pytest.raises(HTTPException) as too_large:
+        await receive_files(multipart_request(upload_body(1024 * 1024)), store, max_bytes=100_000)
+    assert too_large.value.status_code == 413
+
+    truncated = list(upload_body(256 * 1024))[:-1]
+    with pytest.raises(HTTPException) as cut_off:
+        await receive_files(multipart_request(iter(truncated)), store)
+    assert cut_off.value.status_code == 400
+    assert list((tmp_path / "tmp").iterdir()) == []
@@ -0,0 +1,35 @@
+from uuid import uuid4
+
+import pytest
+
+
+async def test_detail_includes_relations(client, make_lesson):
+    lesson_id = make_lesson(documents=2, audit_logs=3)
+
+    response = await client.get(f"/lessons/{lesson_id}/detail")
+
+    assert response.status_code == 200
+    detail = response.json()
+    assert detail["lesson_id"] == str(lesson_id)
+    assert detail["subcategory"]["name"] == "Cabling"
+    assert detail["submitted_by_user"]["name"] == "Tester"
+    assert sorted(document["filename"] for document in detail["documents"]) == ["doc0.pdf", "doc1.pdf"]
+    assert len(detail["audit_logs"]) == 3
+
+
+@pytest.mark.parametrize("attachments", [0, 1, 25])
+async def test_detail_query_count_does_not_grow_with_relations(client, make_lesson, query_counter, attachments):
+    lesson_id = make_lesson(documents=attachments, audit_logs=attachments)
+
+    response = await client.get(f"/lessons/{lesson_id}/detail")
+
+    assert response.status_code == 200
+    assert len(response.json()["documents"]) == attachments
+    # One joined query for the lesson, subcategory and submitter, plus one per collection
+    assert len(query_counter) <= 3, query_counter
+
+
+async def test_detail_missing_lesson(client):
+    response = await client.get(f"/lessons/{uuid4()}/detail")
+
+    assert response.status_code == 404
@@ -0,0 +1,97 @@
+import os
+from uuid import uuid4
+
+import numpy as np
+
+import app.lessonLearned.lessonLearnedDuplicates as lessonDuplicates
+from app.lessonLearned.lessonLearnedDuplicates import DuplicateIndex, duplicateIndex
+
+REPORT = "The cooling fan on rack seven failed because the dust filter was never replaced during the annual service"
+FIELDS = ("project_name", "category_main", "category_sub", "outcomes", "impact", "submitted_by")
+
+
+def test_near_duplicates_are_found_above_the_threshold(tmp_path):
+    index = DuplicateIndex(path=str(tmp_path / "index.npz"))
+    original, reworded, unrelated = uuid4(), uuid4(), uuid4()
+    index.upsert(original, REPORT)
+    index.upsert(reworded, REPORT.replace("annual service", "yearly service visit"))
+    index.upsert(unrelated, "Procurement approved the wrong cable gauge for the antenna feed")
+
+    hits = index.query(REPORT)
+
+    assert [lesson_id for lesson_id, _ in hits][:2] == [original, reworded]
+    assert hits[0][1] == 1.0
+    assert unrelated not in dict(hits)
+    assert original not in dict(index.query(REPORT, exclude=original))
+    assert index.query("") == []
+
+    index.remove(original)
+    assert original not in dict(index.query(REPORT))
+
+
+def test_permutations_match_exact_integer_arithmetic():
+    prime = (1 << 61) - 1
+    hashed = np.array([0, 1, 0xDEADBEEF, (1 << 32) - 1], dtype=np.uint64)
+
+    permuted = lessonDuplicates._modPrime(lessonDuplicates._mulModPrime(hashed[:, None], lessonDuplicates._PERM_A) + lessonDuplicates._PERM_B)
+
+    expected = [[(int(a) * int(x) + int(b)) % prime for a, b in zip(lessonDuplicates._PERM_A, lessonDuplicates._PERM_B)] for x in hashed]
+    assert permuted.tolist() == expected
+
+
+def test_snapshots_round_trip(tmp_path):
+    path = tmp_path / "index.npz"
+    index = DuplicateIndex(path=str(path))
+    lesson_id = uuid4()
+    index.upsert(lesson_id, REPORT)
+
+    index.save()
+    index.save()
+    restored = DuplicateIndex(path=str(path))
+    restored.load()
+
+    assert restored.query(REPORT) == index.query(REPORT)
+    assert os.listdir(tmp_path) == ["index.npz"]
+
+
+def test_snapshots_from_an_older_version_are_ignored(tmp_path, monkeypatch):
+    path = tmp_path / "index.npz"
+    index = DuplicateIndex(path=str(path))
+    index.upsert(uuid4(), REPORT)
+    monkeypatch.setattr(DuplicateIndex, "SNAPSHOT_VERSION", 1)
+    index.save()
+    monkeypatch.undo()
+
+    restored = DuplicateIndex(path=str(path))
+    restored.load()
+
+    assert restored.query(REPORT) == []
+    assert restored.watermark is None
+
+
+async def test_duplicates_endpoint(client, make_lesson):
+    template = (await client.get(f"/lessons/{make_lesson()}")).json()
+    body = {field: template[field] for field in FIELDS}
+    marker = uuid4().hex
+    description = f"{REPORT} {marker}"
+    lesson_id = (await client.post("/lessons/", json={**body, "description": description, "root_cause": "Dust"})).json()["lesson_id"]
+
+    response = await client.post("/lessons/duplicates", json={"description": description, "root_cause": "Dust"})
+
+    assert response.status_code == 200
+    candidates = response.json()
+    assert candidates[0]["lesson_id"] == lesson_id
+    assert candidates[0]["similarity"] == 1.0
+    excluded = await client.post("/lessons/duplicates", json={"description": description, "root_cause": "Dust", "exclude_lesson_id": lesson_id})
+    assert lesson_id not in [candidate["lesson_id"] for candidate in excluded.json()]
+
+
+async def test_duplicates_endpoint_is_unavailable_while_the_index_loads(client):
+    duplicateIndex._ready.clear()
+    try:
+        response = await client.post("/lessons/duplicates", json={"description": REPORT})
+    finally:
+        duplicateIndex._ready.set()
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "10"
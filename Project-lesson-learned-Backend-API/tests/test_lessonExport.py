@@ -0,0 +1,66 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import app.lessonLearned.lessonLearnedExport as lessonExport
+from app.lessonLearned.lessonLearnedExport import EXPORT_FIELDS, exportLessons
+from app.lessonLearned.lessonLearnedModel import Status
+from app.lessonLearned.lessonLearnedSchemas import LessonLearnedFilter
+
+
+def make_project(make_lesson, count):
+    """A project of lessons created a minute apart, oldest first."""
+    project = f"Export-{uuid4().hex[:8]}"
+    start = datetime(2024, 3, 1)
+    ids = [
+        make_lesson(project_name=project, description=f"lesson {n}", tags=["rfi", "cabling"] if n == 0 else [], created_at=start + timedelta(minutes=n))
+        for n in range(count)
+    ]
+    return project, ids
+
+
+async def test_csv_export_streams_every_matching_lesson_in_chunks(client, make_lesson, monkeypatch):
+    monkeypatch.setattr(lessonExport, "EXPORT_CHUNK_SIZE", 2)
+    project, ids = make_project(make_lesson, 5)
+
+    response = await client.get("/lessons/export", params={"project_name": project})
+    # The test transport buffers the body, so count the chunks at the generator
+    chunks = list(exportLessons(LessonLearnedFilter(project_name=project), "csv"))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="lessons.csv"'
+    # The header rides with the first chunk, then one chunk per two lessons
+    assert len(chunks) == 3
+    assert b"".join(chunks) == response.content
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == EXPORT_FIELDS
+    assert [row["lesson_id"] for row in rows] == [str(lesson_id) for lesson_id in ids]
+    assert (rows[0]["tags"], rows[0]["status"], rows[0]["category_main"]) == ("rfi;cabling", "Pending", "Technical Solution")
+    assert rows[1]["suggested_actions"] == ""
+
+
+async def test_gzipped_jsonl_export(client, make_lesson):
+    project, ids = make_project(make_lesson, 3)
+
+    response = await client.get("/lessons/export", params={"project_name": project, "format": "jsonl", "gzip": True})
+
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"] == 'attachment; filename="lessons.jsonl.gz"'
+    lessons = [json.loads(line) for line in gzip.decompress(response.content).decode().splitlines()]
+    assert [lesson["lesson_id"] for lesson in lessons] == [str(lesson_id) for lesson_id in ids]
+    assert (lessons[0]["tags"], lessons[0]["status"], lessons[0]["created_at"]) == (["rfi", "cabling"], Status.pending.value, "2024-03-01T00:00:00")
+
+
+async def test_an_empty_export(client):
+    params = {"project_name": f"Export-{uuid4().hex[:8]}"}
+
+    csv_export = await client.get("/lessons/export", params=params)
+    jsonl_export = await client.get("/lessons/export", params={**params, "format": "jsonl"})
+
+    assert csv_export.text.splitlines() == [",".join(EXPORT_FIELDS)]
+    assert jsonl_export.content == b""
+    assert (await client.get("/lessons/export", params={"format": "xml"})).status_code == 422
@@ -0,0 +1,69 @@
+from uuid import uuid4
+
+from app.lessonLearned.lessonLearnedModel import Impacts, Status
+
+
+def counts(facet):
+    return {entry["value"]: entry["count"] for entry in facet}
+
+
+async def test_facets_count_tags_and_columns(client, make_lesson):
+    project = f"Facets-{uuid4().hex[:8]}"
+    make_lesson(project_name=project, tags=["rfi", "cabling"], impact=Impacts.positive)
+    make_lesson(project_name=project, tags=["rfi"], status=Status.approved)
+    make_lesson(project_name=project, tags=[])
+
+    response = await client.get("/lessons/facets", params={"project_name": project})
+
+    assert response.status_code == 200
+    facets = response.json()
+    assert facets["tags"] == [{"value": "rfi", "count": 2}, {"value": "cabling", "count": 1}]
+    assert counts(facets["category_main"]) == {"Technical Solution": 3}
+    assert counts(facets["impact"]) == {"Negative": 2, "Positive": 1}
+    assert counts(facets["status"]) == {"Pending": 2, "Approved": 1}
+
+
+async def test_facets_honor_list_filters(client, make_lesson):
+    project = f"Facets-{uuid4().hex[:8]}"
+    make_lesson(project_name=project, tags=["rfi", "cabling"])
+    make_lesson(project_name=project, tags=["cabling"])
+
+    response = await client.get("/lessons/facets", params={"project_name": project, "tags": "rfi", "tag_limit": 1})
+
+    facets = response.json()
+    assert facets["tags"] == [{"value": "cabling", "count": 1}]
+    assert counts(facets["status"]) == {"Pending": 1}
+
+
+async def test_facets_are_cached_until_a_lesson_changes(client, make_lesson):
+    project = f"Facets-{uuid4().hex[:8]}"
+    lesson_id = make_lesson(project_name=project)
+    params = {"project_name": project}
+
+    first = await client.get("/lessons/facets", params=params)
+    cached = await client.get("/lessons/facets", params=params, headers={"If-None-Match": first.headers["etag"]})
+    assert cached.status_code == 304
+
+    lesson = (await client.get(f"/lessons/{lesson_id}")).json()
+    update = {field: lesson[field] for field in (
+        "project_name", "category_main", "category_sub", "description", "root_cause", "outcomes",
+        "impact", "suggested_actions", "tags", "approved_by",
+    )}
+    assert (await client.put(f"/lessons/{lesson_id}", json={**update, "status": "Rejected"})).status_code == 200
+
+    refreshed = await client.get("/lessons/facets", params=params, headers={"If-None-Match": first.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert counts(refreshed.json()["status"]) == {"Rejected": 1}
+
+
+async def test_unfiltered_facets_change_with_the_next_write(client, make_lesson):
+    template = (await client.get(f"/lessons/{make_lesson()}")).json()
+    body = {field: template[field] for field in ("project_name", "category_main", "category_sub", "description", "root_cause", "outcomes", "impact", "submitted_by")}
+    tag = f"tag-{uuid4().hex[:8]}"
+    first = await client.get("/lessons/facets", params={"tag_limit": 500})
+
+    assert (await client.post("/lessons/", json={**body, "tags": [tag]})).status_code == 200
+
+    after = await client.get("/lessons/facets", params={"tag_limit": 500}, headers={"If-None-Match": first.headers["etag"]})
+    assert after.status_code == 200
+    assert counts(after.json()["tags"])[tag] == 1
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from app.database import SyncSessionLocal
+from app.lessonLearned.lessonLearnedModel import LessonLearned, Status
+
+FIELDS = ("project_name", "category_main", "category_sub", "description", "root_cause", "outcomes", "impact", "submitted_by")
+
+
+async def template(client, make_lesson, project):
+    lesson = (await client.get(f"/lessons/{make_lesson()}")).json()
+    return {**{field: lesson[field] for field in FIELDS}, "project_name": project}
+
+
+def imported(project):
+    with SyncSessionLocal() as db:
+        return db.scalars(select(LessonLearned).where(LessonLearned.project_name == project).order_by(LessonLearned.description)).all()
+
+
+async def upload(client, name, content, **params):
+    return await client.post("/lessons/import", params=params, files={"file": (name, content.encode())})
+
+
+async def test_csv_import_applies_defaults_and_reports_bad_rows(client, make_lesson):
+    project = f"Import-{uuid4().hex[:8]}"
+    row = await template(client, make_lesson, project)
+    columns = list(FIELDS) + ["status", "tags", "suggested_actions"]
+    text = io.StringIO()
+    writer = csv.DictWriter(text, columns)
+    writer.writeheader()
+    writer.writerow({**row, "description": "a", "status": "", "tags": "", "suggested_actions": ""})
+    writer.writerow({**row, "description": "b", "status": "Approved", "tags": "rfi; cabling"})
+    writer.writerow({**row, "description": "c", "impact": "Catastrophic"})
+    # Valid for the schema, rejected by the foreign key; only this row fails
+    writer.writerow({**row, "description": "d", "category_sub": str(uuid4())})
+
+    response = await upload(client, "lessons.csv", text.getvalue())
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["imported"], result["failed"], result["errors_truncated"]) == (2, 2, False)
+    assert [error["row"] for error in result["errors"]] == [4, 5]
+    assert result["errors"][0]["errors"][0].startswith("impact:")
+    first, second = imported(project)
+    assert (first.status, first.tags, first.suggested_actions) == (Status.pending, [], None)
+    assert (second.status, second.tags) == (Status.approved, ["rfi", "cabling"])
+
+
+async def test_jsonl_import_reports_unparseable_lines(client, make_lesson):
+    project = f"Import-{uuid4().hex[:8]}"
+    row = await template(client, make_lesson, project)
+    lines = [json.dumps({**row, "status": None}), "{not json", "", json.dumps(["not", "an", "object"])]
+
+    response = await upload(client, "lessons.txt", "\n".join(lines), format="jsonl")
+
+    result = response.json()
+    assert (result["imported"], result["failed"]) == (1, 2)
+    assert [error["row"] for error in result["errors"]] == [2, 4]
+    assert [lesson.status for lesson in imported(project)] == [Status.pending]
+
+
+async def test_unreadable_file(client):
+    response = await client.post("/lessons/import", files={"file": ("lessons.csv", b"\xff\xfe\x00bad")})
+
+    assert response.status_code == 400
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from app.lessonLearned.lessonLearnedModel import Status
+
+
+async def walk(client, params, limit):
+    """Every page of /lessons/ for params; the ids in the order they were served."""
+    ids, cursor = [], None
+    while True:
+        response = await client.get("/lessons/", params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= limit
+        ids.extend(item["lesson_id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+async def test_pages_follow_the_keyset_without_gaps_or_repeats(client, make_lesson):
+    project = f"Listing-{uuid4().hex[:8]}"
+    start = datetime.utcnow() - timedelta(days=3)
+    # Two pairs share a created_at, so the lesson_id tiebreak decides their order
+    created = [start, start, start + timedelta(hours=1), start + timedelta(hours=2), start + timedelta(hours=2), start + timedelta(hours=3), start + timedelta(hours=4)]
+    lessons = [(at, make_lesson(project_name=project, created_at=at)) for at in created]
+
+    ids = await walk(client, {"project_name": project}, 3)
+
+    assert ids == [str(lesson_id) for _, lesson_id in sorted(lessons, reverse=True)]
+
+
+async def test_filters_combine(client, make_lesson):
+    project = f"Listing-{uuid4().hex[:8]}"
+    approved = make_lesson(project_name=project, status=Status.approved, tags=["rfi", "cabling"])
+    make_lesson(project_name=project, status=Status.approved, tags=["cabling"])
+    make_lesson(project_name=project, tags=["rfi"])
+
+    ids = await walk(client, {"project_name": project, "status": "Approved", "tags": "rfi"}, 10)
+
+    assert ids == [str(approved)]
+
+
+async def test_invalid_cursor(client):
+    response = await client.get("/lessons/", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
@@ -0,0 +1,53 @@
+import random
+import string
+from uuid import uuid4
+
+
+def unique_word() -> str:
+    return "".join(random.choices(string.ascii_lowercase, k=12))
+
+
+async def search(client, **params):
+    response = await client.get("/lessons/search", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_stronger_matches_rank_first_and_pages_do_not_repeat(client, make_lesson):
+    project, word = f"Search-{uuid4().hex[:8]}", unique_word()
+    # Description is weighted above outcomes
+    strong = make_lesson(project_name=project, description=f"{word} broke the {word} link")
+    weak = [make_lesson(project_name=project, outcomes=f"Replaced the {word}") for _ in range(4)]
+    make_lesson(project_name=project)
+
+    hits, cursor = [], None
+    while True:
+        page = await search(client, q=word, project_name=project, limit=2, documents=False, **({"cursor": cursor} if cursor else {}))
+        hits.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [hit["lesson"]["lesson_id"] for hit in hits][0] == str(strong)
+    assert sorted(hit["lesson"]["lesson_id"] for hit in hits[1:]) == sorted(str(lesson_id) for lesson_id in weak)
+    ranks = [hit["rank"] for hit in hits]
+    assert ranks == sorted(ranks, reverse=True)
+    # Equal ranks are ordered by lesson_id, so ties split across pages neither repeat nor vanish
+    assert [hit["lesson"]["lesson_id"] for hit in hits[1:]] == sorted((str(lesson_id) for lesson_id in weak), reverse=True)
+    assert f"<mark>{word}</mark>" in hits[0]["snippet"]
+
+
+async def test_search_honours_filters_and_highlight(client, make_lesson):
+    project, word = f"Search-{uuid4().hex[:8]}", unique_word()
+    make_lesson(project_name=project, description=f"{word} fault")
+    make_lesson(description=f"{word} fault")
+
+    page = await search(client, q=word, project_name=project, highlight=False)
+
+    assert len(page["items"]) == 1
+    assert page["items"][0]["snippet"] is None
+    assert page["next_cursor"] is None
+
+
+async def test_search_needs_a_query(client):
+    assert (await client.get("/lessons/search", params={"q": ""})).status_code == 422
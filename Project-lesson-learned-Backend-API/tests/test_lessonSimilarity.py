@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from app.lessonLearned.lessonLearnedSimilarity import SimilarityIndex, similarityIndex
+
+FIELDS = ("project_name", "category_main", "category_sub", "root_cause", "outcomes", "impact", "submitted_by")
+
+
+def filled_index(path, ids=None):
+    index = SimilarityIndex(path=str(path))
+    ids = ids or [uuid4() for _ in range(4)]
+    index.upsert(ids[0], "hydraulic pump seal leaked under pressure")
+    index.upsert(ids[1], "pump seal leaked again under high pressure")
+    index.upsert(ids[2], "vendor invoice arrived late")
+    index.upsert(ids[3], "")
+    return index, ids
+
+
+def test_nearest_lessons_share_the_most_weighted_terms(tmp_path):
+    index, ids = filled_index(tmp_path / "index.npz")
+
+    assert [lesson_id for lesson_id, _ in index.similar(ids[0], 3)] == [ids[1]]
+    assert index.similar(uuid4()) is None
+
+    # An update replaces the lesson's row
+    index.upsert(ids[2], "hydraulic pump seal leaked under pressure")
+    assert [lesson_id for lesson_id, _ in index.similar(ids[0], 3)] == [ids[2], ids[1]]
+    assert len(index) == 4
+
+
+def test_snapshots_round_trip_and_concurrent_saves_never_tear(tmp_path):
+    path = tmp_path / "index.npz"
+    first, ids = filled_index(path)
+    second, _ = filled_index(path, ids)
+
+    # Several app workers saving the same index at once
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda index: index.save(), [first, second] * 10))
+
+    restored = SimilarityIndex(path=str(path))
+    restored.load()
+    assert len(restored) == 4
+    assert os.listdir(tmp_path) == ["index.npz"]
+    assert restored.similar(ids[0], 3) == first.similar(ids[0], 3)
+
+
+def test_periodic_snapshots_include_database_changes(database, make_lesson, tmp_path):
+    make_lesson()
+    index = SimilarityIndex(path=str(tmp_path / "index.npz"))
+    index.start(save_interval=0.05)
+    try:
+        assert index.waitUntilReady(5)
+        assert index.watermark is not None
+        # Local writes do not move the watermark; only reading the database does
+        watermark = index.watermark
+        index.upsert(uuid4(), "local only")
+        assert index.watermark == watermark
+
+        lesson_id = make_lesson(description=f"Snapshot {uuid4().hex}")
+        deadline = time.monotonic() + 5
+        while index.similar(lesson_id) is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        index.stop()
+
+    restored = SimilarityIndex(path=index.path)
+    restored.load()
+    assert restored.similar(lesson_id) is not None
+    assert restored.watermark > watermark
+
+
+def test_start_builds_the_index_off_the_callers_thread(tmp_path, monkeypatch):
+    index = SimilarityIndex(path=str(tmp_path / "index.npz"))
+    release = threading.Event()
+    monkeypatch.setattr(index, "sync", lambda: release.wait(5))
+
+    index.start(save_interval=0)
+    try:
+        assert not index.ready
+    finally:
+        release.set()
+        assert index.waitUntilReady(5)
+        index.stop()
+
+
+async def test_similar_endpoint_is_unavailable_while_the_index_loads(client, make_lesson):
+    lesson_id = make_lesson()
+    similarityIndex._ready.clear()
+    try:
+        response = await client.get(f"/lessons/{lesson_id}/similar")
+    finally:
+        similarityIndex._ready.set()
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "10"
+
+
+async def test_similar_endpoint(client, make_lesson):
+    template = (await client.get(f"/lessons/{make_lesson()}")).json()
+    body = {field: template[field] for field in FIELDS}
+    word = uuid4().hex
+    created = [
+        (await client.post("/lessons/", json={**body, "description": description})).json()["lesson_id"]
+        for description in (f"{word} gearbox bearing overheated", f"gearbox bearing {word} overheated twice", "Unrelated paperwork")
+    ]
+
+    response = await client.get(f"/lessons/{created[0]}/similar", params={"k": 5})
+
+    assert response.status_code == 200
+    hits = response.json()
+    scores = {hit["lesson"]["lesson_id"]: hit["score"] for hit in hits}
+    assert hits[0]["lesson"]["lesson_id"] == created[1]
+    # The third lesson only shares the template's root cause and outcome
+    assert scores[created[1]] > scores.get(created[2], 0)
+    assert (await client.get(f"/lessons/{uuid4()}/similar")).status_code == 404
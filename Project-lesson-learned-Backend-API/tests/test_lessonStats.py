@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from uuid import uuid4
+
+from app.database import SessionLocal, engine
+from app.lessonLearned.lessonLearnedModel import Impacts, Status
+from app.lessonLearned.lessonLearnedStats import StatsRefresher, getLessonStats, refreshStats
+
+
+async def refresh():
+    async with SessionLocal() as db:
+        assert await refreshStats(db)
+
+
+async def test_stats_come_from_the_refreshed_views(client, make_lesson, query_counter):
+    project = f"Stats-{uuid4().hex[:8]}"
+    make_lesson(project_name=project)
+    make_lesson(project_name=project, status=Status.approved, impact=Impacts.positive)
+    await refresh()
+    query_counter.clear()
+
+    response = await client.get("/lessons/stats")
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["refreshed_at"]
+    row = next(row for row in stats["projects"] if row["project_name"] == project)
+    assert (row["lesson_count"], row["pending_count"], row["approved_count"], row["rejected_count"]) == (2, 1, 1, 0)
+    assert {"category_main", "impact", "status"} <= set(stats["months"][0])
+    # Rows carry the enum values, whatever other tests stored in the same database
+    assert "Technical Solution" in {month["category_main"] for month in stats["months"]}
+    # One statement reads both views and the freshness timestamp
+    assert len([s for s in query_counter if not s.startswith(("BEGIN", "COMMIT", "ROLLBACK"))]) == 1, query_counter
+
+
+async def test_stats_etag_changes_only_on_refresh(client, make_lesson):
+    first = await client.get("/lessons/stats")
+    make_lesson(project_name=f"Stats-{uuid4().hex[:8]}")
+
+    cached = await client.get("/lessons/stats", headers={"If-None-Match": first.headers["etag"]})
+    assert cached.status_code == 304
+
+    await refresh()
+    refreshed = await client.get("/lessons/stats", headers={"If-None-Match": first.headers["etag"]})
+    assert refreshed.status_code == 200
+    assert refreshed.json()["refreshed_at"] > first.json()["refreshed_at"]
+
+
+async def test_refresher_runs_after_enough_writes(make_lesson):
+    project = f"Stats-{uuid4().hex[:8]}"
+    make_lesson(project_name=project)
+    refresher = StatsRefresher(interval=60, after_writes=2)
+    refresher.start()
+    try:
+        refresher.noteWrites()
+        refresher.noteWrites()
+        for _ in range(50):
+            await asyncio.sleep(0.1)
+            async with SessionLocal() as db:
+                projects = (await getLessonStats(db))["projects"]
+            if any(row["project_name"] == project for row in projects):
+                break
+        else:
+            raise AssertionError("the views were not refreshed")
+        assert refresher.pending_writes == 0
+    finally:
+        await refresher.stop()
+        await engine.dispose()
+
+
+
+class SlowCount(int):
+    """An int whose additions give up the GIL between the read and the write."""
+
+    def __add__(self, other):
+        time.sleep(0.001)
+        return SlowCount(int(self) + other)
+
+
+def test_writes_counted_from_many_threads_are_not_lost():
+    refresher = StatsRefresher(interval=60, after_writes=10**9)
+    refresher.pending_writes = SlowCount(0)
+    threads = [threading.Thread(target=lambda: [refresher.noteWrites() for _ in range(20)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert refresher.pending_writes == 8 * 20
@@ -0,0 +1,66 @@
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from app.auditLog.auditlogModel import AuditActionEnum, AuditLog
+from app.database import SyncSessionLocal
+from app.lessonLearned.lessonLearnedModel import LessonLearned, Status
+
+
+def submitter(lesson_id):
+    with SyncSessionLocal() as db:
+        return db.get(LessonLearned, lesson_id).submitted_by
+
+
+async def test_bulk_approve_reports_each_id(client, make_lesson, query_counter):
+    pending = [make_lesson(), make_lesson()]
+    approved = make_lesson(status=Status.approved)
+    missing = uuid4()
+    manager = submitter(pending[0])
+
+    response = await client.post("/lessons/status", json={
+        "lesson_ids": [str(i) for i in (*pending, approved, missing, pending[0])],
+        "status": "Approved",
+        "performed_by": str(manager),
+    })
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"lesson_id": str(pending[0]), "result": "updated"},
+        {"lesson_id": str(pending[1]), "result": "updated"},
+        {"lesson_id": str(approved), "result": "unchanged"},
+        {"lesson_id": str(missing), "result": "not_found"},
+    ]
+    # UPDATE ... RETURNING, the lookup for ids it did not touch, and one multi-row audit INSERT
+    assert len([s for s in query_counter if not s.startswith(("BEGIN", "COMMIT", "ROLLBACK"))]) == 3, query_counter
+    with SyncSessionLocal() as db:
+        lessons = db.scalars(select(LessonLearned).where(LessonLearned.lesson_id.in_(pending))).all()
+        assert {(lesson.status, lesson.approved_by) for lesson in lessons} == {(Status.approved, manager)}
+        logs = db.scalars(select(AuditLog).where(AuditLog.lesson_id.in_([*pending, approved]))).all()
+        assert sorted((log.lesson_id, log.action) for log in logs) == sorted(
+            (lesson_id, AuditActionEnum.approved) for lesson_id in pending
+        )
+
+
+async def test_bulk_reject_invalidates_cached_lesson(client, make_lesson):
+    lesson_id = make_lesson()
+    before = await client.get(f"/lessons/{lesson_id}")
+
+    response = await client.post("/lessons/status", json={
+        "lesson_ids": [str(lesson_id)], "status": "Rejected", "performed_by": str(submitter(lesson_id)),
+    })
+
+    assert response.json() == [{"lesson_id": str(lesson_id), "result": "updated"}]
+    after = await client.get(f"/lessons/{lesson_id}", headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert after.json()["status"] == "Rejected"
+
+
+async def test_bulk_status_only_approves_or_rejects(client, make_lesson):
+    lesson_id = make_lesson(status=Status.approved)
+
+    response = await client.post("/lessons/status", json={
+        "lesson_ids": [str(lesson_id)], "status": "Pending", "performed_by": str(submitter(lesson_id)),
+    })
+
+    assert response.status_code == 422
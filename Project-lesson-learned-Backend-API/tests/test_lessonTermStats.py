@@ -0,0 +1,96 @@
+import random
+import string
+import threading
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import select
+
+import app.lessonLearned.lessonLearnedServices as lessonServices
+from app.database import SyncSessionLocal
+from app.lessonLearned.lessonLearnedAnalysisEngine import AnalysisEngine, streamLessons
+from app.lessonLearned.lessonLearnedModel import LessonLearned, LessonTermCount, TermMonthlyStat
+
+UPDATE_FIELDS = (
+    "project_name", "category_main", "category_sub", "description", "root_cause", "outcomes",
+    "impact", "suggested_actions", "tags", "status", "approved_by",
+)
+
+
+def unique_term() -> str:
+    return "".join(random.choices(string.ascii_lowercase, k=14))
+
+
+def lesson_term(row):
+    return row["lesson_id"], row["term"]
+
+
+def monthly(term):
+    with SyncSessionLocal() as db:
+        return db.execute(
+            select(TermMonthlyStat.term_count, TermMonthlyStat.lesson_count).where(TermMonthlyStat.term == term)
+        ).all()
+
+
+def lesson_terms(lesson_id):
+    with SyncSessionLocal() as db:
+        return dict(db.execute(select(LessonTermCount.term, LessonTermCount.count).where(LessonTermCount.lesson_id == lesson_id)).all())
+
+
+async def test_lesson_writes_keep_term_stats_current(client, make_lesson, monkeypatch):
+    threads = []
+
+    def termCounts(text):
+        threads.append(threading.current_thread())
+        return original(text)
+
+    original = lessonServices.termCounts
+    monkeypatch.setattr(lessonServices, "termCounts", termCounts)
+    word, other = unique_term(), unique_term()
+    template = (await client.get(f"/lessons/{make_lesson()}")).json()
+    body = {field: template[field] for field in ("project_name", "category_main", "category_sub", "root_cause", "outcomes", "impact", "submitted_by")}
+
+    first = (await client.post("/lessons/", json={**body, "description": f"{word} {word} conduit"})).json()
+    await client.post("/lessons/", json={**body, "description": word})
+
+    assert monthly(word) == [(3, 2)]
+    assert lesson_terms(first["lesson_id"])[word] == 2
+
+    update = {field: first[field] for field in UPDATE_FIELDS}
+    response = await client.put(f"/lessons/{first['lesson_id']}", json={**update, "description": f"{other} conduit"})
+
+    assert response.status_code == 200
+    assert monthly(word) == [(1, 1)]
+    assert monthly(other) == [(1, 1)]
+    assert word not in lesson_terms(first["lesson_id"])
+    # Tokenizing never runs on the event loop's thread
+    assert threads and threading.main_thread() not in threads
+
+
+def test_worker_processes_count_like_a_single_process():
+    words = [unique_term() for _ in range(5)]
+    rows = [
+        (uuid4(), " ".join(random.choices(words, k=6)), datetime(2024, 1 + n % 3, 5))
+        for n in range(200)
+    ]
+    chunks = [rows[start:start + 30] for start in range(0, len(rows), 30)]
+    single_terms = []
+    parallel_terms = []
+
+    single = AnalysisEngine(workers=1).analyze(chunks, single_terms.extend)
+    parallel = AnalysisEngine(workers=2).analyze(chunks, parallel_terms.extend)
+
+    assert parallel == single
+    assert sorted(parallel_terms, key=lesson_term) == sorted(single_terms, key=lesson_term)
+
+
+def test_lessons_stream_in_chunks_of_the_matching_rows(make_lesson):
+    project = f"Terms-{uuid4().hex[:8]}"
+    ids = {make_lesson(project_name=project) for _ in range(3)}
+    make_lesson()
+
+    with SyncSessionLocal() as db:
+        chunks = list(streamLessons(db, LessonLearned.project_name == project, chunk_size=2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert {row[0] for chunk in chunks for row in chunk} == ids
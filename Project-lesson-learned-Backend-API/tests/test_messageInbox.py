@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.database import SyncSessionLocal
+from app.message.messageModel import Message
+
+
+async def test_inbox_pages_newest_first(client, make_users):
+    sender, receiver = make_users(2)
+    start = datetime.utcnow() - timedelta(days=1)
+    with SyncSessionLocal() as db:
+        db.execute(insert(Message), [
+            {"sender_id": sender, "receiver_id": receiver, "content": f"m{n}", "timestamp": start + timedelta(minutes=n // 2), "is_read": n % 3 == 0}
+            for n in range(25)
+        ])
+        db.commit()
+
+    contents, cursor = [], None
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get(f"/messages/inbox/{receiver}", params=params)).json()
+        contents += [message["content"] for message in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    # Messages sharing a timestamp are neither repeated nor skipped across pages
+    assert sorted(contents) == sorted(f"m{n}" for n in range(25))
+    timestamps = [m["timestamp"] for m in (await client.get(f"/messages/inbox/{receiver}", params={"limit": 25})).json()["items"]]
+    assert timestamps == sorted(timestamps, reverse=True)
+
+    unread = (await client.get(f"/messages/inbox/{receiver}", params={"unread": "true", "limit": 200})).json()["items"]
+    assert {m["content"] for m in unread} == {f"m{n}" for n in range(25) if n % 3}
+    assert (await client.get(f"/messages/unread-count/{receiver}")).json() == {"user_id": str(receiver), "unread": len(unread)}
+    assert (await client.get(f"/messages/unread-count/{sender}")).json()["unread"] == 0
+
+
+async def test_reading_a_message_updates_the_count(client, make_users):
+    sender, receiver = make_users(2)
+    sent = await client.post("/messages/", json={"sender_id": str(sender), "receiver_id": str(receiver), "content": "hi"})
+    assert (await client.get(f"/messages/unread-count/{receiver}")).json()["unread"] == 1
+
+    await client.patch(f"/messages/read/{sent.json()['message_id']}")
+
+    assert (await client.get(f"/messages/unread-count/{receiver}")).json()["unread"] == 0
+    assert (await client.get("/messages/inbox/not-a-uuid")).status_code == 422
+    assert (await client.get(f"/messages/inbox/{receiver}", params={"cursor": "bogus"})).status_code == 400
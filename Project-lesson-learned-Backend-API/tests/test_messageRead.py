@@ -0,0 +1,127 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.database import SyncSessionLocal
+from app.message.messageModel import Message
+from app.socketCommunication import manager
+
+
+class FakeSocket:
+    def __init__(self, broken=False):
+        self.sent = []
+        self.broken = broken
+
+    async def send_text(self, text):
+        if self.broken:
+            raise RuntimeError("socket is closed")
+        self.sent.append(json.loads(text))
+
+
+@pytest.fixture
+async def sockets():
+    """Register fake sockets with the running connection manager."""
+    await manager.start()
+
+    def connect(user_id, socket):
+        manager.register(socket, str(user_id))
+        return socket
+
+    yield connect
+    # Stopping disconnects every registered socket
+    await manager.stop()
+
+
+def send(sender, receiver, count, start):
+    with SyncSessionLocal() as db:
+        ids = db.scalars(insert(Message).returning(Message.message_id), [
+            {"sender_id": sender, "receiver_id": receiver, "content": f"m{n}", "timestamp": start + timedelta(minutes=n), "is_read": False}
+            for n in range(count)
+        ]).all()
+        db.commit()
+        return ids
+
+
+async def test_read_conversation_up_to_a_timestamp(client, make_users, sockets, query_counter):
+    alice, bob, carol = make_users(3)
+    start = datetime.utcnow() - timedelta(hours=5)
+    from_alice = send(alice, bob, 200, start)
+    send(carol, bob, 3, start)
+    alice_socket, bob_socket = sockets(alice, FakeSocket()), sockets(bob, FakeSocket())
+    query_counter.clear()
+
+    response = await client.patch("/messages/read", json={
+        "receiver_id": str(bob), "sender_id": str(alice), "up_to": (start + timedelta(minutes=149)).isoformat(),
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["updated"], body["unread"]) == (150, 53)
+    assert sorted(body["message_ids"]) == sorted(str(i) for i in from_alice[:150])
+    # One UPDATE ... RETURNING and the unread count
+    assert len([s for s in query_counter if not s.startswith(("BEGIN", "COMMIT", "ROLLBACK"))]) == 2, query_counter
+    await manager.flush()
+    [receipt] = alice_socket.sent
+    assert (receipt["type"], receipt["reader_id"], len(receipt["message_ids"])) == ("read_receipt", str(bob), 150)
+    [own] = bob_socket.sent
+    assert (own["type"], own["unread"]) == ("messages_read", 53)
+
+    # Already read messages are not counted or announced again
+    again = await client.patch("/messages/read", json={"receiver_id": str(bob), "sender_id": str(alice)})
+    assert (again.json()["updated"], again.json()["unread"]) == (50, 3)
+    await manager.flush()
+    assert len(alice_socket.sent) == 2
+
+
+async def test_read_by_ids_only_touches_the_readers_messages(client, make_users, sockets):
+    alice, bob, carol = make_users(3)
+    start = datetime.utcnow()
+    to_bob = send(alice, bob, 3, start)
+    to_carol = send(alice, carol, 1, start)
+    dead = sockets(alice, FakeSocket(broken=True))
+
+    response = await client.patch("/messages/read", json={
+        "receiver_id": str(bob), "message_ids": [str(i) for i in [to_bob[0], to_bob[1], to_bob[1], to_carol[0]]],
+    })
+
+    assert response.status_code == 200
+    assert (response.json()["updated"], response.json()["unread"]) == (2, 1)
+    # A dead socket does not fail the request; it is dropped
+    await manager.flush()
+    assert dead not in {connection.websocket for connection in manager.active_connections.get(str(alice), ())}
+    with SyncSessionLocal() as db:
+        assert db.scalar(select(Message.is_read).where(Message.message_id == to_carol[0])) is False
+
+
+async def test_a_broker_failure_still_reports_the_committed_update(client, make_users, monkeypatch):
+    alice, bob = make_users(2)
+    ids = send(alice, bob, 2, datetime.utcnow())
+
+    async def unavailable(user_id, event):
+        raise ConnectionError("broker is down")
+
+    monkeypatch.setattr(manager, "send_event", unavailable)
+    response = await client.patch("/messages/read", json={"receiver_id": str(bob), "sender_id": str(alice)})
+
+    assert response.status_code == 200
+    assert (response.json()["updated"], response.json()["unread"]) == (2, 0)
+    with SyncSessionLocal() as db:
+        assert db.scalars(select(Message.is_read).where(Message.message_id.in_(ids))).all() == [True, True]
+
+
+async def test_read_request_validation(client, make_users):
+    alice, bob = make_users(2)
+    for body in (
+        {"receiver_id": str(bob)},
+        {"receiver_id": str(bob), "sender_id": str(alice), "message_ids": []},
+        {"receiver_id": str(bob), "message_ids": []},
+    ):
+        assert (await client.patch("/messages/read", json=body)).status_code == 422
+
+
+def test_websocket_route_is_mounted():
+    from main import app
+
+    assert "/ws/{user_id}" in {route.path for route in app.routes}
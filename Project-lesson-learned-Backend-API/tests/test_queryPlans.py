@@ -0,0 +1,181 @@
+import random
+from datetime import datetime, timedelta
+from typing import Iterator
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, insert, or_, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.auditLog.auditlogModel import AuditActionEnum, AuditLog
+from app.database import SyncSessionLocal
+from app.documents.documentModel import Document
+from app.lessonLearned.lessonLearnedModel import Categories, Impacts, LessonLearned, Status
+from app.lessonLearned.lessonLearnedSchemas import LessonLearnedFilter
+from app.lessonLearned.lessonLearnedServices import filterLessons
+from app.message.messageModel import Message
+from app.message.messageService import inbox_query, unread_count_query
+from app.pagination import DEFAULT_PAGE_SIZE
+from app.subCategories.subCategoryModel import SubCategory
+from app.user.userModel import User
+
+SEED_LESSONS = 20000
+SEED_USERS = 200
+SEED_SUBCATEGORIES = 50
+TAGS = [f"tag{n}" for n in range(100)]
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compileExplain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def planNodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from planNodes(child)
+
+
+def batches(rows, size=5000):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+@pytest.fixture(scope="module")
+def seed(database):
+    """A register large enough that the planner prefers an index wherever one applies, deleted afterwards."""
+    rng = random.Random(5)
+    now = datetime.utcnow()
+    users = [
+        {"user_id": uuid4(), "name": f"user{n}", "email": f"{uuid4().hex}@example.com", "password_hash": "x"}
+        for n in range(SEED_USERS)
+    ]
+    subcategories = [
+        {"subcategory_id": uuid4(), "main_category": Categories.technical_solution.value, "name": f"sub{n}"}
+        for n in range(SEED_SUBCATEGORIES)
+    ]
+    lessons = [
+        {
+            "lesson_id": uuid4(),
+            "project_name": f"project{rng.randrange(40)}",
+            "category_main": rng.choice(list(Categories)),
+            "category_sub": rng.choice(subcategories)["subcategory_id"],
+            "description": "seeded lesson",
+            "root_cause": "seeded",
+            "outcomes": "seeded",
+            "impact": rng.choice(list(Impacts)),
+            "tags": rng.sample(TAGS, 2),
+            "status": rng.choices(list(Status), weights=[2, 7, 1])[0],
+            "submitted_by": rng.choice(users)["user_id"],
+            "created_at": now - timedelta(minutes=n),
+            "updated_at": now - timedelta(minutes=n),
+        }
+        for n in range(SEED_LESSONS)
+    ]
+    with SyncSessionLocal() as db:
+        db.execute(
+            text("SELECT ensure_audit_log_partitions(:since, 0)"),
+            {"since": lessons[-1]["created_at"]},
+        )
+        db.execute(insert(User), users)
+        db.execute(insert(SubCategory), subcategories)
+        for batch in batches(lessons):
+            db.execute(insert(LessonLearned), batch)
+        for batch in batches(lessons):
+            db.execute(insert(Document), [
+                {"lesson_id": lesson["lesson_id"], "filename": "report.pdf", "file_path": "/docs/report.pdf"}
+                for lesson in batch
+            ])
+            db.execute(insert(AuditLog), [
+                {
+                    "lesson_id": lesson["lesson_id"],
+                    "action": AuditActionEnum.created,
+                    "performed_by": lesson["submitted_by"],
+                    "timestamp": lesson["created_at"],
+                }
+                for lesson in batch
+            ])
+            db.execute(insert(Message), [
+                {
+                    "sender_id": lesson["submitted_by"],
+                    "receiver_id": rng.choice(users)["user_id"],
+                    "content": "seeded",
+                    "timestamp": lesson["created_at"],
+                    "is_read": rng.random() < 0.8,
+                }
+                for lesson in batch
+            ])
+        db.commit()
+        # ANALYZE is transactional: its statistics are rolled back unless committed
+        db.execute(text("ANALYZE"))
+        db.commit()
+    yield {
+        "user": users[0]["user_id"],
+        "subcategory": subcategories[0]["subcategory_id"],
+        "lesson": lessons[SEED_LESSONS // 2]["lesson_id"],
+        "since": now - timedelta(hours=1),
+    }
+
+    user_ids = [user["user_id"] for user in users]
+    seeded_lessons = select(LessonLearned.lesson_id).where(LessonLearned.submitted_by.in_(user_ids))
+    with SyncSessionLocal() as db:
+        db.execute(delete(Message).where(or_(Message.sender_id.in_(user_ids), Message.receiver_id.in_(user_ids))))
+        db.execute(delete(AuditLog).where(AuditLog.lesson_id.in_(seeded_lessons)))
+        db.execute(delete(Document).where(Document.lesson_id.in_(seeded_lessons)))
+        db.execute(delete(LessonLearned).where(LessonLearned.submitted_by.in_(user_ids)))
+        db.execute(delete(SubCategory).where(SubCategory.subcategory_id.in_([sub["subcategory_id"] for sub in subcategories])))
+        db.execute(delete(User).where(User.user_id.in_(user_ids)))
+        db.commit()
+
+
+def lessonPage(filters: LessonLearnedFilter):
+    return (
+        filterLessons(select(LessonLearned), filters)
+        .order_by(LessonLearned.created_at.desc(), LessonLearned.lesson_id.desc())
+        .limit(DEFAULT_PAGE_SIZE + 1)
+    )
+
+
+HOT_QUERIES = {
+    "lessons newest first": lambda seed: lessonPage(LessonLearnedFilter()),
+    "lessons by status": lambda seed: lessonPage(LessonLearnedFilter(status=Status.rejected)),
+    "lessons by submitter": lambda seed: lessonPage(LessonLearnedFilter(submitted_by=seed["user"])),
+    "lessons by tag": lambda seed: lessonPage(LessonLearnedFilter(tags=[TAGS[0]])),
+    "lessons by subcategory": lambda seed: select(LessonLearned).where(LessonLearned.category_sub == seed["subcategory"]),
+    "documents of a lesson": lambda seed: select(Document).where(Document.lesson_id == seed["lesson"]),
+    "audit trail of a lesson": lambda seed: (
+        select(AuditLog).where(AuditLog.lesson_id == seed["lesson"]).order_by(AuditLog.timestamp)
+    ),
+    "recent audit activity": lambda seed: (
+        select(AuditLog).where(AuditLog.timestamp >= seed["since"]).order_by(AuditLog.timestamp.desc())
+    ),
+    "unread inbox": lambda seed: (
+        select(Message).where(Message.receiver_id == seed["user"], Message.is_read.is_(False))
+    ),
+    "inbox page": lambda seed: inbox_query(seed["user"], DEFAULT_PAGE_SIZE, after=(seed["since"], uuid4())),
+    "unread inbox page": lambda seed: inbox_query(seed["user"], DEFAULT_PAGE_SIZE, unread=True),
+    "unread count": lambda seed: unread_count_query(seed["user"]),
+}
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_an_index(seed, name):
+    with SyncSessionLocal() as db:
+        plan = db.connection().execute(Explain(HOT_QUERIES[name](seed))).scalar()
+        # A partition that fits in one page (an upcoming month) is cheapest to read with a scan
+        tiny = set(db.scalars(text("SELECT relname FROM pg_class WHERE relkind = 'r' AND relpages <= 1")))
+
+    seq_scans = [
+        node["Relation Name"]
+        for node in planNodes(plan[0]["Plan"])
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] not in tiny
+    ]
+    assert not seq_scans, f"{name} falls back to a sequential scan on {seq_scans}"
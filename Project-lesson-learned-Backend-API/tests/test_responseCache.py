@@ -0,0 +1,105 @@
+from datetime import datetime
+from uuid import uuid4
+
+from app.responseCache import CachedResponse, LRUCacheBackend, etagMatches
+
+UPDATE_FIELDS = (
+    "project_name", "category_main", "category_sub", "description", "root_cause", "outcomes",
+    "impact", "suggested_actions", "tags", "status", "approved_by",
+)
+
+
+def test_lru_backend_evicts_by_count_size_and_age():
+    backend = LRUCacheBackend(max_entries=2, max_bytes=10, ttl=30)
+    backend.set("a", CachedResponse(b"1234", '"a"'))
+    backend.set("b", CachedResponse(b"1234", '"b"'))
+    backend.get("a")
+    backend.set("c", CachedResponse(b"1234", '"c"'))
+
+    # b was the least recently used
+    assert (backend.get("a"), backend.get("b")) == (CachedResponse(b"1234", '"a"'), None)
+    backend.set("d", CachedResponse(b"12345678", '"d"'))
+    assert [key for key in "acd" if backend.get(key)] == ["d"]
+    backend.set("huge", CachedResponse(b"x" * 11, '"huge"'))
+    assert backend.get("huge") is None
+
+    expired = LRUCacheBackend(ttl=-1)
+    expired.set("a", CachedResponse(b"1234", '"a"'))
+    assert expired.get("a") is None
+
+
+def test_lru_backend_invalidates_by_prefix():
+    backend = LRUCacheBackend()
+    for key in ("lessons:/lessons/1", "lessons:/lessons/2", "lesson-stats:/lessons/stats"):
+        backend.set(key, CachedResponse(b"{}", '"x"'))
+
+    backend.invalidate("lessons:")
+
+    assert backend.get("lessons:/lessons/1") is None
+    assert backend.get("lesson-stats:/lessons/stats") is not None
+
+
+def test_if_none_match_uses_the_weak_comparison():
+    assert etagMatches('"a"', '"a"')
+    assert etagMatches('W/"a"', '"a"')
+    assert etagMatches('"b", W/"a"', '"a"')
+    assert etagMatches("*", '"a"')
+    assert not etagMatches('"b"', '"a"')
+    assert not etagMatches(None, '"a"')
+
+
+async def test_a_cached_lesson_is_revalidated_without_a_query(client, make_lesson, query_counter):
+    lesson_id = make_lesson()
+    first = await client.get(f"/lessons/{lesson_id}")
+    etag = first.headers["etag"]
+    query_counter.clear()
+
+    cached = await client.get(f"/lessons/{lesson_id}", headers={"If-None-Match": etag})
+    again = await client.get(f"/lessons/{lesson_id}")
+
+    assert (cached.status_code, cached.content, cached.headers["etag"]) == (304, b"", etag)
+    assert cached.headers["cache-control"] == "no-cache"
+    assert (again.status_code, again.json()) == (200, first.json())
+    assert query_counter == []
+
+
+async def test_a_write_invalidates_the_lesson_and_its_lists(client, make_lesson):
+    project = f"Cache-{uuid4().hex[:8]}"
+    lesson_id = make_lesson(project_name=project)
+    lesson = await client.get(f"/lessons/{lesson_id}")
+    page = await client.get("/lessons/", params={"project_name": project})
+    assert page.json()["items"][0]["outcomes"] == "Cable replaced"
+
+    update = {field: lesson.json()[field] for field in UPDATE_FIELDS}
+    assert (await client.put(f"/lessons/{lesson_id}", json={**update, "outcomes": "Conduit sealed"})).status_code == 200
+
+    changed = await client.get(f"/lessons/{lesson_id}", headers={"If-None-Match": lesson.headers["etag"]})
+    changed_page = await client.get("/lessons/", params={"project_name": project}, headers={"If-None-Match": page.headers["etag"]})
+    assert (changed.status_code, changed.json()["outcomes"]) == (200, "Conduit sealed")
+    assert changed.headers["etag"] != lesson.headers["etag"]
+    assert (changed_page.status_code, changed_page.json()["items"][0]["outcomes"]) == (200, "Conduit sealed")
+
+
+async def test_a_page_is_revalidated_when_only_its_next_cursor_changes(client, make_lesson, make_users):
+    project = f"Cache-{uuid4().hex[:8]}"
+    older = make_lesson(project_name=project, created_at=datetime(2024, 1, 1))
+    make_lesson(project_name=project, created_at=datetime(2024, 1, 2))
+    params = {"project_name": project, "status": "Pending", "limit": 1}
+    page = await client.get("/lessons/", params=params)
+    assert page.json()["next_cursor"] is not None
+
+    response = await client.post("/lessons/status", json={"lesson_ids": [str(older)], "status": "Rejected", "performed_by": str(make_users(1)[0])})
+    assert response.status_code == 200
+
+    changed = await client.get("/lessons/", params=params, headers={"If-None-Match": page.headers["etag"]})
+    assert changed.status_code == 200
+    assert changed.json()["items"] == page.json()["items"]
+    assert changed.json()["next_cursor"] is None
+
+
+async def test_a_missing_lesson_is_not_cached(client, make_lesson):
+    lesson_id = uuid4()
+
+    assert (await client.get(f"/lessons/{lesson_id}")).status_code == 404
+    make_lesson(lesson_id=lesson_id)
+    assert (await client.get(f"/lessons/{lesson_id}")).status_code == 200
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import pytest
+
+from app.database import engine
+from app.socketBroker import InProcessBroker, PostgresBroker, create_broker, encode_notifications
+from app.socketCommunication import ConnectionManager
+
+
+class FakeSocket:
+    def __init__(self):
+        self.received = asyncio.Queue()
+
+    async def send_text(self, text):
+        self.received.put_nowait(text)
+
+
+def test_create_broker():
+    assert isinstance(create_broker("memory"), InProcessBroker)
+    assert isinstance(create_broker("postgres"), PostgresBroker)
+    with pytest.raises(ValueError):
+        create_broker("carrier-pigeon")
+
+
+@pytest.mark.parametrize("text", ["é\u0001\"" * 5000, "\U0001F600" * 3000, "ab\U0001F600" * 4000])
+def test_long_deliveries_are_split_under_the_notify_limit(text):
+    payloads = encode_notifications("user", text)
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) < 8000 for payload in payloads)
+    pieces = [json.loads(payload[1:]) for payload in payloads]
+    assert json.loads("".join(piece[3] for piece in pieces)) == ["user", text]
+
+
+def test_short_deliveries_fit_one_notification():
+    assert encode_notifications("user", "hi") == ['m["user", "hi"]']
+
+
+@pytest.fixture
+async def workers(database):
+    """Two connection managers on separate Postgres brokers, as two uvicorn workers would have."""
+    managers = [ConnectionManager(PostgresBroker()), ConnectionManager(PostgresBroker())]
+    for manager in managers:
+        await manager.start()
+    yield managers
+    for manager in managers:
+        await manager.stop()
+    await engine.dispose()
+
+
+async def test_delivery_reaches_a_socket_on_another_worker(workers):
+    first, second = workers
+    socket = FakeSocket()
+    second.register(socket, "bob")
+    long_text = json.dumps({"content": "ü\U0001F600" * 10000}, ensure_ascii=False)
+
+    await first.send_to_user("bob", "hello")
+    await first.send_event("bob", {"type": "ping"})
+    await first.send_to_user("bob", long_text)
+    await first.send_to_user("nobody", "dropped")
+
+    received = [await asyncio.wait_for(socket.received.get(), 5) for _ in range(3)]
+    assert received == ["hello", '{"type": "ping"}', long_text]
+    assert socket.received.empty()
@@ -0,0 +1,194 @@
+import asyncio
+import json
+from uuid import uuid4
+
+import pytest
+from fastapi import WebSocketDisconnect
+from sqlalchemy import func, select
+
+import app.socketCommunication as socketCommunication
+from app.database import SyncSessionLocal, engine
+from app.message.messageModel import Message
+from app.message.messageWriter import messageWriter
+from app.socketBroker import InProcessBroker
+from app.socketCommunication import ConnectionManager, manager, websocket_endpoint
+
+
+class FakeWebSocket:
+    """Feeds queued frames to the endpoint and collects what it sends back."""
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = asyncio.Queue()
+
+    async def accept(self):
+        pass
+
+    async def receive_text(self):
+        frame = await self.incoming.get()
+        if frame is None:
+            raise WebSocketDisconnect()
+        return frame
+
+    async def send_text(self, text):
+        self.sent.put_nowait(text)
+
+    async def close(self, code):
+        # The client answers the close handshake after the frames it already sent
+        self.incoming.put_nowait(None)
+
+    def send(self, **frame):
+        self.incoming.put_nowait(json.dumps(frame))
+
+    async def next(self):
+        return await asyncio.wait_for(self.sent.get(), 5)
+
+    async def next_json(self):
+        return json.loads(await self.next())
+
+
+@pytest.fixture
+async def chat(database):
+    """Connect fake sockets to the endpoint with the message writer and connection manager running."""
+    messageWriter.start()
+    await manager.start()
+    sessions = []
+
+    def connect(user_id):
+        socket = FakeWebSocket()
+        sessions.append((socket, asyncio.create_task(websocket_endpoint(socket, str(user_id)))))
+        return socket
+
+    yield connect
+    for socket, _ in sessions:
+        socket.incoming.put_nowait(None)
+    await asyncio.gather(*[task for _, task in sessions])
+    await messageWriter.stop()
+    await manager.stop()
+    await engine.dispose()
+
+
+def stored_messages(sender_id):
+    with SyncSessionLocal() as db:
+        return db.scalars(select(Message).where(Message.sender_id == sender_id)).all()
+
+
+async def test_message_is_acked_after_commit_and_delivered(chat, make_users):
+    alice, bob = make_users(2)
+    alice_socket, bob_socket = chat(alice), chat(bob)
+
+    alice_socket.send(id="c1", to=str(bob), message="Conduit sealed")
+
+    ack = await alice_socket.next_json()
+    assert (ack["type"], ack["id"]) == ("ack", "c1")
+    [stored] = stored_messages(alice)
+    assert (str(stored.message_id), stored.receiver_id, stored.content, stored.is_read) == (ack["message_id"], bob, "Conduit sealed", False)
+    assert await bob_socket.next() == f"[From {alice}] Conduit sealed"
+
+
+async def test_malformed_frames_get_an_error(chat, make_users):
+    [alice] = make_users(1)
+    socket = chat(alice)
+
+    socket.send(id="c1", to="nobody", message="hi")
+    socket.incoming.put_nowait("not json")
+
+    first, second = await socket.next_json(), await socket.next_json()
+    assert (first["type"], first["id"]) == ("error", "c1")
+    assert (second["type"], second["id"]) == ("error", None)
+    assert stored_messages(alice) == []
+
+
+async def test_a_burst_is_written_in_group_commits(chat, make_users):
+    alice, bob = make_users(2)
+    socket = chat(alice)
+    batches = messageWriter.batches
+
+    for n in range(300):
+        socket.send(id=n, to=str(bob), message=f"m{n}")
+    acks = [await socket.next_json() for _ in range(300)]
+
+    assert sorted(ack["id"] for ack in acks) == list(range(300))
+    with SyncSessionLocal() as db:
+        assert db.scalar(select(func.count()).where(Message.sender_id == alice)) == 300
+    assert messageWriter.batches - batches < 300
+
+
+async def test_an_unknown_receiver_only_fails_its_own_message(chat, make_users, monkeypatch):
+    alice, bob = make_users(2)
+    socket = chat(alice)
+    inserts = []
+    insert = messageWriter._insert
+
+    async def counting_insert(rows):
+        inserts.append(len(rows))
+        await insert(rows)
+
+    monkeypatch.setattr(messageWriter, "_insert", counting_insert)
+    for n in range(64):
+        socket.send(id=n, to=str(uuid4() if n == 10 else bob), message=f"m{n}")
+    replies = {reply["id"]: reply["type"] for reply in [await socket.next_json() for _ in range(64)]}
+
+    assert [n for n, kind in replies.items() if kind == "error"] == [10]
+    assert len(stored_messages(alice)) == 63
+    # Bisecting the failed batch, not retrying every row on its own
+    assert len(inserts) < 32
+
+
+async def test_shutdown_stores_the_messages_already_sent(database, make_users):
+    alice, bob = make_users(2)
+    messageWriter.start()
+    await manager.start()
+    socket = FakeWebSocket()
+    endpoint = asyncio.create_task(websocket_endpoint(socket, str(alice)))
+    await asyncio.sleep(0)
+
+    for n in range(50):
+        socket.send(id=n, to=str(bob), message=f"m{n}")
+    # The order main.py registers the shutdown handlers in
+    await manager.stop()
+    await messageWriter.stop()
+    await endpoint
+    await engine.dispose()
+
+    assert len(stored_messages(alice)) == 50
+
+
+class StalledSocket:
+    """A client that stopped reading: every send hangs."""
+
+    def __init__(self):
+        self.closed_with = None
+
+    async def send_text(self, text):
+        await asyncio.Event().wait()
+
+    async def close(self, code):
+        self.closed_with = code
+
+
+async def test_a_stalled_socket_only_delays_itself(monkeypatch):
+    monkeypatch.setattr(socketCommunication, "WS_SEND_QUEUE_SIZE", 4)
+    monkeypatch.setattr(socketCommunication, "WS_SEND_TIMEOUT", 0.2)
+    connections = ConnectionManager(InProcessBroker())
+    await connections.start()
+    phone, laptop = FakeWebSocket(), StalledSocket()
+    connections.register(phone, "bob")
+    stalled = connections.register(laptop, "bob")
+
+    for n in range(10):
+        await connections.send_to_user("bob", f"m{n}")
+        await asyncio.sleep(0.01)
+
+    # The phone gets every frame while the laptop is stuck on the first
+    assert [await phone.next() for _ in range(10)] == [f"m{n}" for n in range(10)]
+    metrics = connections.metrics()
+    assert (metrics["connections"], metrics["queued_frames"], metrics["dropped_frames"]) == (2, 4, 5)
+
+    await asyncio.wait_for(connections.flush(), 5)
+    assert laptop.closed_with == 1013
+    assert [connection.websocket for connection in connections.active_connections["bob"]] == [phone]
+    assert stalled.closed and not stalled.send("late")
+    assert connections.metrics()["evicted_connections"] == 1
+    await connections.stop()
+    assert connections.active_connections == {}